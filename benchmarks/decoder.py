@@ -0,0 +1,294 @@
+# benchmarks/decoder.py
+"""``yahoo_decode`` against the ``_safe_iter``/``_first`` walkers it replaced.
+
+Run from the repo root:  python benchmarks/decoder.py [--teams 8 12 20] [--seconds 0.3]
+
+The ``legacy_*`` functions below are the pre-decoder parsers from ``main.py``,
+kept verbatim (minus comments) as the reference.  Each pair is first checked
+for identical output on the synthetic payload, then timed with the same
+harness as ``parsers.py``.
+"""
+import argparse, os, sys
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Set, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import routes  # noqa: E402  (configures the environment and imports main)
+from parsers import _throughput  # noqa: E402
+from synthetic_league import SyntheticLeague  # noqa: E402
+
+
+# ─────────────────────── legacy walkers ───────────────────────
+def _safe_iter(container: Any, key: str) -> Iterator[Any]:
+    if not container: return
+    iterable: Iterable[Any] = container.values() if isinstance(container, dict) else container
+    for itm in iterable:
+        if isinstance(itm, dict) and key in itm:
+            yield itm[key]
+
+def _first(container: Any, key: str) -> Any:
+    for blk in _safe_iter(container, key): return blk
+    return None
+
+def _attr(blob: Any, key: str) -> Any:
+    if isinstance(blob, dict):
+        return blob.get(key)
+    return _first(blob, key)
+
+def _is_owner(managers_blob: Any, guid: str) -> bool:
+    for m in _safe_iter(managers_blob, "manager"):
+        if _first(m, "guid") == guid or str(_first(m, "is_current_login")) == "1":
+            return True
+    return False
+
+def _league_section(payload: Dict[str, Any], section: str):
+    league = payload.get("fantasy_content", {}).get("league")
+    if isinstance(league, list):
+        for piece in league:
+            if isinstance(piece, dict) and section in piece:
+                return piece[section]
+    elif isinstance(league, dict):
+        return league.get(section)
+    return None
+
+
+def legacy_teams_meta(teams_payload: Dict[str, Any]) -> List[Dict[str, Any]]:
+    teams_section = _league_section(teams_payload, "teams")
+    results: List[Dict[str, Any]] = []
+    if not isinstance(teams_section, dict):
+        return results
+    for key, entry in teams_section.items():
+        if key == "count":
+            continue
+        team_wrapper = entry.get("team") if isinstance(entry, dict) else None
+        if not team_wrapper:
+            continue
+        team_core = None
+        if isinstance(team_wrapper, list):
+            for block in team_wrapper:
+                if isinstance(block, list):
+                    team_core = block
+                    break
+            if team_core is None and team_wrapper and isinstance(team_wrapper[0], list):
+                team_core = team_wrapper[0]
+        if not isinstance(team_core, list):
+            continue
+        team_key = _first(team_core, "team_key")
+        team_name = _first(team_core, "name")
+        logo_url = None
+        for logo in _safe_iter(_first(team_core, "team_logos"), "team_logo"):
+            if isinstance(logo, dict) and logo.get("url"):
+                logo_url = logo["url"]
+                break
+        manager_name = None
+        manager_guid = None
+        is_current_login = False
+        for attr in team_core:
+            if not isinstance(attr, dict) or "managers" not in attr:
+                continue
+            for manager in _safe_iter(attr["managers"], "manager"):
+                if not isinstance(manager, dict):
+                    continue
+                manager_name = manager_name or _attr(manager, "nickname") or _attr(manager, "guid") or manager.get("manager_id")
+                manager_guid = manager_guid or _attr(manager, "guid") or manager.get("manager_id")
+                if str(_attr(manager, "is_current_login")) == "1":
+                    is_current_login = True
+                if manager_name and manager_guid and is_current_login:
+                    break
+            if manager_name and manager_guid and is_current_login:
+                break
+        if team_key:
+            team_id = ""
+            if isinstance(team_key, str) and ".t." in team_key:
+                _, _, team_id = team_key.partition(".t.")
+            results.append({
+                "team_key": team_key,
+                "team_name": team_name or "(Team)",
+                "team_id": team_id,
+                "manager_name": manager_name or "",
+                "manager_guid": manager_guid or "",
+                "is_current_login": is_current_login,
+                "logo_url": logo_url,
+            })
+    results.sort(key=lambda item: (item["team_name"] or "").lower())
+    return results
+
+
+def legacy_keeper_players(keepers_payload: Dict[str, Any], resolve_nba_ids: Callable) -> List[Dict[str, Any]]:
+    players_section = _league_section(keepers_payload, "players")
+    keepers: List[Dict[str, Any]] = []
+    if not isinstance(players_section, dict):
+        return keepers
+    for key, entry in players_section.items():
+        if key == "count":
+            continue
+        player_sections = entry.get("player") if isinstance(entry, dict) else None
+        if not player_sections:
+            continue
+        player_core = None
+        ownership_blob = None
+        if isinstance(player_sections, list):
+            for section in player_sections:
+                if isinstance(section, list) and player_core is None:
+                    player_core = section
+                elif isinstance(section, dict) and "ownership" in section and ownership_blob is None:
+                    ownership_blob = section["ownership"]
+            if player_core is None and player_sections:
+                first_section = player_sections[0]
+                if isinstance(first_section, list):
+                    player_core = first_section
+        if not isinstance(player_core, list):
+            continue
+        if ownership_blob is None:
+            for attr in player_core:
+                if isinstance(attr, dict) and "ownership" in attr:
+                    ownership_blob = attr["ownership"]
+                    break
+        owner_team_key = ownership_blob.get("owner_team_key") if isinstance(ownership_blob, dict) else None
+        name_block = _first(player_core, "name")
+        name_full = ""
+        if isinstance(name_block, dict):
+            name_full = name_block.get("full") or " ".join(filter(None, [name_block.get("first"), name_block.get("last")]))
+        display_position = _first(player_core, "display_position")
+        keepers.append({
+            "player_key": _first(player_core, "player_key"),
+            "player_id": _first(player_core, "player_id"),
+            "name_full": name_full or "",
+            "display_position": display_position or "",
+            "owner_team_key": owner_team_key,
+            "badge": "Keeper",
+            "nba_id": None,
+            "is_keeper": True,
+        })
+    nba_ids = resolve_nba_ids(keeper["name_full"] for keeper in keepers)
+    for keeper in keepers:
+        keeper["nba_id"] = nba_ids.get(keeper["name_full"])
+    return keepers
+
+
+def _legacy_team_stat_row(team: Any) -> Any:
+    if not isinstance(team, list) or len(team) < 2:
+        return None
+    team_key, name, is_mine = None, None, False
+    for attr in team[0] if isinstance(team[0], list) else []:
+        if not isinstance(attr, dict):
+            continue
+        team_key = attr.get("team_key", team_key)
+        name = attr.get("name", name)
+        if str(attr.get("is_owned_by_current_login")) == "1" or str(attr.get("is_current_login")) == "1":
+            is_mine = True
+        if "managers" in attr and any(
+            isinstance(m, dict) and str(m.get("is_current_login")) == "1"
+            for m in _safe_iter(attr["managers"], "manager")
+        ):
+            is_mine = True
+    stats_blob = next((b["team_stats"] for b in team[1:] if isinstance(b, dict) and "team_stats" in b), {})
+    stats = {
+        str(stat.get("stat_id")): stat.get("value")
+        for stat in _safe_iter(stats_blob.get("stats"), "stat")
+        if isinstance(stat, dict)
+    }
+    return {"team_key": team_key, "name": name or "(Team)", "is_mine": is_mine, "stats": stats}
+
+
+def legacy_league_matchups(matchups_payload: Dict[str, Any]) -> List[Dict[str, Any]]:
+    seen: Set[Tuple[int, Tuple[str, ...]]] = set()
+    matchups: List[Dict[str, Any]] = []
+    for team in _safe_iter(_league_section(matchups_payload, "teams"), "team"):
+        if not isinstance(team, list):
+            continue
+        blob = next((b["matchups"] for b in team[1:] if isinstance(b, dict) and "matchups" in b), None)
+        for matchup in _safe_iter(blob, "matchup"):
+            if not isinstance(matchup, dict):
+                continue
+            teams_blob = matchup.get("teams") or (matchup.get("0") or {}).get("teams")
+            rows = [row for row in map(_legacy_team_stat_row, _safe_iter(teams_blob, "team")) if row]
+            if len(rows) != 2 or not all(row["team_key"] for row in rows):
+                continue
+            try:
+                week = int(matchup.get("week"))
+            except (TypeError, ValueError):
+                continue
+            key = (week, tuple(sorted(row["team_key"] for row in rows)))
+            if key in seen:
+                continue
+            seen.add(key)
+            matchups.append({"week": week, "status": matchup.get("status"), "teams": rows})
+    return matchups
+
+
+def legacy_user_leagues(raw: Dict[str, Any]) -> List[Dict[str, str]]:
+    fc = raw.get("fantasy_content", raw)
+    leagues: List[Dict[str, str]] = []
+    for user in _safe_iter(fc.get("users", {}), "user"):
+        guid = _first(user, "guid")
+        for game in _safe_iter(_first(user, "games"), "game"):
+            season = _first(game, "season")
+            for lg in _safe_iter(_first(game, "leagues"), "league"):
+                if _first(lg, "scoring_type") != "head": continue
+                league_season = season or _first(lg, "season")
+                owner_team, fallback = None, None
+                for team_container in _safe_iter(_first(lg, "teams"), "team"):
+                    team_data_list = team_container[0] if isinstance(team_container, list) and team_container else []
+                    for entry in team_data_list:
+                        if not isinstance(entry, dict): continue
+                        if "name" in entry: fallback = fallback or entry["name"]
+                        if "managers" in entry and _is_owner(entry["managers"], guid):
+                            owner_team = entry.get("name", fallback)
+                            break
+                    if owner_team:
+                        break
+                leagues.append({
+                    "season": str(league_season) if league_season else "N/A",
+                    "league_key": str(_first(lg, "league_key")) if _first(lg, "league_key") else "N/A",
+                    "team_name": owner_team or fallback or "(team?)",
+                })
+    leagues.sort(key=lambda x: (-int(x["season"]) if x["season"].isdigit() else 0, x["team_name"]))
+    return leagues
+
+
+# ─────────────────────── harness ───────────────────────
+def pairs(main, teams: int) -> Dict[str, Tuple[Callable[[], Any], Callable[[], Any]]]:
+    """Parser name -> (legacy call, decoder call) on the same synthetic payload."""
+    league = SyntheticLeague(teams)
+    lk = league.league_key
+    teams_payload = league.teams_payload(lk)
+    keepers = league.keepers(lk)
+    user_leagues = league.user_leagues()
+    matchups = league.matchups(lk, list(range(1, league.current_week)))
+    return {
+        "teams_meta": (lambda: legacy_teams_meta(teams_payload), lambda: main._parse_teams_meta(teams_payload)),
+        "keeper_players": (lambda: legacy_keeper_players(keepers, main._resolve_nba_player_ids), lambda: main._parse_keeper_players(keepers)),
+        "user_leagues": (lambda: legacy_user_leagues(user_leagues), lambda: main._parse_user_leagues(user_leagues)),
+        "league_matchups": (lambda: legacy_league_matchups(matchups), lambda: main._parse_league_matchups(matchups)),
+    }
+
+
+def run(teams_list: List[int], seconds: float = 0.3) -> Dict[str, Dict[str, float]]:
+    """``{"<parser>@<teams>": {"legacy_us", "decoder_us", "speedup"}}``; raises if any pair disagrees."""
+    results: Dict[str, Dict[str, float]] = {}
+    for teams in teams_list:
+        main = routes._load_app(teams, 0.0)
+        for name, (legacy, decoder) in pairs(main, teams).items():
+            if legacy() != decoder():
+                raise AssertionError(f"{name}@{teams}: decoder output differs from the legacy walker")
+            legacy_us, decoder_us = _throughput(legacy, seconds), _throughput(decoder, seconds)
+            results[f"{name}@{teams}"] = {"legacy_us": legacy_us, "decoder_us": decoder_us,
+                                          "speedup": legacy_us / decoder_us}
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--teams", type=int, nargs="+", default=[8, 12, 20])
+    parser.add_argument("--seconds", type=float, default=0.3, help="time budget per parser, side and league size")
+    args = parser.parse_args()
+
+    print(f"{'parser':<20}{'teams':>6}{'legacy us':>12}{'decoder us':>12}{'speedup':>9}")
+    for key, row in run(args.teams, args.seconds).items():
+        name, _, teams = key.partition("@")
+        print(f"{name:<20}{teams:>6}{row['legacy_us']:>12.1f}{row['decoder_us']:>12.1f}{row['speedup']:>8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+# benchmarks/parsers.py
+"""Parser throughput on synthetic 8/12/20-team Yahoo payloads.
+
+Run from the repo root:  python benchmarks/parsers.py [--teams 8 12 20] [--seconds 0.3]
+
+Each parser gets an already-decoded payload (what ``yahoo_api`` hands it), so
+the numbers are pure walk-and-extract time.  ``get_user_team_key`` runs with a
+warm team directory, the way every request after the first sees it.
+"""
+import argparse, os, sys, time
+from typing import Any, Callable, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import routes  # noqa: E402  (configures the environment and imports main)
+from synthetic_league import SyntheticLeague  # noqa: E402
+
+
+def _throughput(fn: Callable[[], Any], seconds: float) -> float:
+    """Best-of-three microseconds per call, each round running for about ``seconds / 3``."""
+    fn()
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= seconds / 30 or loops >= 1 << 20:
+            break
+        loops *= 2
+    rounds = max(1, int(seconds / 3 / max(elapsed, 1e-9)))
+    best = float("inf")
+    for _ in range(3):
+        start = time.perf_counter()
+        for _ in range(rounds * loops):
+            fn()
+        best = min(best, (time.perf_counter() - start) / (rounds * loops))
+    return best * 1e6
+
+
+def cases(main, teams: int) -> Dict[str, Callable[[], Any]]:
+    """Parser name -> zero-argument call; needs a request context (the team directory lives behind the session)."""
+    league = SyntheticLeague(teams)
+    lk = league.league_key
+    settings = league.settings(lk)
+    teams_payload = league.teams_payload(lk)
+    keepers = league.keepers(lk)
+    user_leagues = league.user_leagues()
+    matchups = league.matchups(lk, list(range(1, league.current_week)))
+
+    main.session["token"] = {"access_token": "bench", "refresh_token": "bench", "xoauth_yahoo_guid": "BENCHUSERGUID",
+                             "expires_at": time.time() + 3600}
+    main.session["league_key"] = lk
+    routes._reset(main)
+    main.team_directory(lk)  # warm
+
+    return {
+        "_parse_teams_meta": lambda: main._parse_teams_meta(teams_payload),
+        "_parse_keeper_players": lambda: main._parse_keeper_players(keepers),
+        "_parse_user_leagues": lambda: main._parse_user_leagues(user_leagues),
+        "_previous_league_key": lambda: main._previous_league_key(settings),
+        "_parse_league_matchups": lambda: main._parse_league_matchups(matchups),
+        "get_user_team_key": lambda: main.get_user_team_key(lk, league.my_team_name),
+    }
+
+
+def run(teams_list: List[int], seconds: float = 0.3) -> Dict[str, Dict[str, float]]:
+    """``{"<parser>@<teams>": {"us_per_call", "ops_per_sec"}}``."""
+    results: Dict[str, Dict[str, float]] = {}
+    for teams in teams_list:
+        main = routes._load_app(teams, 0.0)
+        with main.app.test_request_context():
+            for name, fn in cases(main, teams).items():
+                us = _throughput(fn, seconds)
+                results[f"{name}@{teams}"] = {"us_per_call": us, "ops_per_sec": 1e6 / us}
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--teams", type=int, nargs="+", default=[8, 12, 20])
+    parser.add_argument("--seconds", type=float, default=0.3, help="time budget per parser and league size")
+    args = parser.parse_args()
+
+    print(f"{'parser':<34}{'teams':>6}{'us/call':>12}{'ops/s':>12}")
+    for key, row in run(args.teams, args.seconds).items():
+        name, _, teams = key.partition("@")
+        print(f"{name:<34}{teams:>6}{row['us_per_call']:>12.1f}{row['ops_per_sec']:>12,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+# benchmarks/response_pipeline.py
+"""Bytes on the wire and server milliseconds: Flask ``jsonify`` vs ``responses.json_response``.
+
+Run from the repo root:  python benchmarks/response_pipeline.py [--teams 12] [--weeks 20] [--repeat 20]
+
+Payloads come from ``synthetic_league.SyntheticLeague``: the same Yahoo blobs
+each route proxies in ``routes.py``, with every requested week finished.
+"""
+import argparse, json, os, sys, time
+from typing import Any, Callable, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from flask import Flask, jsonify  # noqa: E402
+
+import responses  # noqa: E402
+from synthetic_league import SyntheticLeague  # noqa: E402
+
+
+def _timed(fn: Callable[[], Any], repeat: int) -> Tuple[float, int]:
+    size, best = 0, float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        resp = fn()
+        body = b"".join(resp.response) if resp.is_streamed else resp.get_data()
+        best = min(best, time.perf_counter() - start)
+        size = len(body)
+    return best * 1000, size
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--teams", type=int, default=12)
+    parser.add_argument("--weeks", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    league = SyntheticLeague(args.teams, current_week=args.weeks + 1, end_week=max(20, args.weeks + 1))
+    league_key = league.league_key
+    routes = {
+        "/api/season_avg": league.season_stats(league_key),
+        "/api/scoreboard": league.scoreboard(league_key, 5),
+        "/api/bulk_matchups": league.matchups(league_key, list(range(1, args.weeks + 1))),
+    }
+    app = Flask(__name__)
+    print(f"orjson: {'yes' if responses.orjson else 'no'}  brotli: {'yes' if responses.brotli else 'no'}")
+    print(f"{'route':<22}{'variant':<24}{'bytes':>11}{'ms':>9}{'bytes saved':>13}{'ms saved':>10}")
+    for route, payload in routes.items():
+        variants = [("jsonify", "identity", lambda p=payload: jsonify(p))]
+        for encoding in ("identity", "gzip", "br"):
+            if encoding == "br" and responses.brotli is None:
+                continue
+            variants.append(("json_response", encoding, lambda p=payload: responses.json_response(p)))
+        baseline = None
+        for name, encoding, fn in variants:
+            with app.test_request_context(route, headers={"Accept-Encoding": encoding}):
+                ms, size = _timed(fn, args.repeat)
+            if baseline is None:
+                baseline = (ms, size)
+            label = f"{name}/{encoding}" if name != "jsonify" else name
+            print(f"{route:<22}{label:<24}{size:>11,}{ms:>9.2f}{baseline[1] - size:>13,}{baseline[0] - ms:>10.2f}")
+
+    # /debug/* dumps: one indented string built in memory vs streamed (and compressed) output.
+    payload = routes["/api/bulk_matchups"]
+    with app.test_request_context("/debug/scoreboard", headers={"Accept-Encoding": "identity"}):
+        start = time.perf_counter()
+        page = f"<pre>{json.dumps(payload, indent=2)}</pre>".encode("utf-8")
+        base_ms, base_size = (time.perf_counter() - start) * 1000, len(page)
+    print(f"{'/debug/* (bulk)':<22}{'f-string':<24}{base_size:>11,}{base_ms:>9.2f}{0:>13,}{0:>10.2f}")
+    for encoding in ("identity", "gzip", "br"):
+        if encoding == "br" and responses.brotli is None:
+            continue
+        with app.test_request_context("/debug/scoreboard", headers={"Accept-Encoding": encoding}):
+            ms, size = _timed(lambda: responses.pretty_json_page(payload), max(1, args.repeat // 4))
+        print(f"{'/debug/* (bulk)':<22}{'stream/' + encoding:<24}{size:>11,}{ms:>9.2f}{base_size - size:>13,}{base_ms - ms:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+# benchmarks/routes.py
+"""End-to-end route latency against a synthetic league served through the upstream replay layer.
+
+Run from the repo root:  python benchmarks/routes.py [--teams 12] [--repeat 5] [--latency-ms 0]
+
+Every request goes through the real stack (Flask test client, rate limiter,
+response cache, league history store, parsers and serialisation).  Only the
+socket is replaced: ``upstream_replay`` answers Yahoo and nba_api from
+``synthetic_league``.  "cold" clears the caches and history store before each
+request, and "warm" repeats the request with them populated.  Pass
+``--latency-ms`` to add a simulated upstream round trip to every cold call.
+"""
+import argparse, os, sys, tempfile, time
+from typing import Any, Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+ROUTES = [
+    "/select",
+    "/api/league_settings",
+    "/api/season_avg",
+    "/api/scoreboard?week=9",
+    "/api/trends",
+    "/api/player_contributions",
+    "/api/draft/keepers",
+    "/api/team_logo",
+    "/api/playoff_odds?simulations=2000&seed=1",
+    "/api/bulk_matchups?weeks=1-9",
+    "/api/nba_players",
+]
+
+_main = None
+_state: Dict[str, Any] = {}
+
+
+def _load_app(teams: int, latency_ms: float):
+    """Import ``main`` once, configured for an isolated offline run, and point the replay layer at ``teams``."""
+    global _main
+    if _main is None:
+        scratch = tempfile.mkdtemp(prefix="fantasy-bench-")
+        os.environ.update({
+            "YAHOO_CLIENT_ID": os.getenv("YAHOO_CLIENT_ID", "bench"),
+            "YAHOO_CLIENT_SECRET": os.getenv("YAHOO_CLIENT_SECRET", "bench"),
+            "YAHOO_RATE_PER_SECOND": "100000", "YAHOO_RATE_BURST": "100000",
+            "YAHOO_CACHE_BACKEND": "memory", "PREFETCH_ON_GREET": "0", "TRACE_SAMPLE_RATE": "0",
+            "LEAGUE_HISTORY_DB_PATH": os.path.join(scratch, "league_history.sqlite3"),
+            "NBA_STATS_DB_PATH": os.path.join(scratch, "nba_stats.sqlite3"),
+            "IRONMAN_DB_PATH": os.path.join(scratch, "ironman.sqlite3"),
+        })
+        os.environ.pop("UPSTREAM_REPLAY", None)
+        os.environ.pop("METRICS_DIR", None)
+        import logging
+        logging.disable(logging.WARNING)
+        import main
+        _main = main
+        _state["scratch"] = scratch
+    if _state.get("teams") != teams or _state.get("latency_ms") != latency_ms:
+        import upstream_replay
+        from synthetic_league import SyntheticLeague
+
+        league = SyntheticLeague(teams)
+        adapter = upstream_replay.install(_main._yahoo_http, upstream_replay.FixtureStore(responder=league.respond),
+                                          latency_ms=latency_ms)
+        _state.update(teams=teams, latency_ms=latency_ms, league=league, adapter=adapter)
+    return _main
+
+
+def _reset(main) -> None:
+    # Forget everything a previous request left behind: Yahoo responses, team directories, stored weeks, NBA lists.
+    from league_history import LeagueHistoryStore
+
+    main.yahoo_cache.clear()
+    main._TEAM_DIRECTORY.clear()
+    main._NBA_PLAYERS_PAYLOADS.clear()
+    _state["generation"] = _state.get("generation", 0) + 1
+    main.league_history = LeagueHistoryStore(os.path.join(_state["scratch"], f"history-{_state['generation']}.sqlite3"))
+    main.nba_stats_store._conn.execute("DELETE FROM player_index")
+    main.nba_stats_store._conn.commit()
+
+
+def _client(main):
+    league = _state["league"]
+    client = main.app.test_client()
+    with client.session_transaction() as sess:
+        sess["token"] = {"access_token": "bench", "refresh_token": "bench", "xoauth_yahoo_guid": "BENCHUSERGUID",
+                         "expires_at": time.time() + 3600}
+        sess["league_key"] = league.league_key
+        sess["team_name"] = league.my_team_name
+    return client
+
+
+def _timed(client, route: str) -> float:
+    start = time.perf_counter()
+    resp = client.get(route, headers={"Accept-Encoding": "identity"})
+    resp.get_data()
+    elapsed = (time.perf_counter() - start) * 1000
+    if resp.status_code != 200:
+        raise RuntimeError(f"{route} returned {resp.status_code}: {resp.get_data(as_text=True)[:200]}")
+    return elapsed
+
+
+def run(teams: int = 12, repeat: int = 5, latency_ms: float = 0.0,
+        routes: Optional[List[str]] = None) -> Dict[str, Dict[str, float]]:
+    """``{route: {"cold_ms", "warm_ms", "upstream_calls"}}``, best of ``repeat`` for each."""
+    main = _load_app(teams, latency_ms)
+    client = _client(main)
+    adapter = _state["adapter"]
+    results: Dict[str, Dict[str, float]] = {}
+    for route in routes or ROUTES:
+        cold, warm, calls = float("inf"), float("inf"), 0
+        for _ in range(repeat):
+            _reset(main)
+            served = adapter.served
+            cold = min(cold, _timed(client, route))
+            calls = adapter.served - served
+            warm = min(warm, _timed(client, route))
+        results[route] = {"cold_ms": cold, "warm_ms": warm, "upstream_calls": calls}
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--teams", type=int, nargs="+", default=[12])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    args = parser.parse_args()
+
+    print(f"{'teams':>5}  {'route':<44}{'cold ms':>10}{'warm ms':>10}{'upstream':>10}")
+    for teams in args.teams:
+        for route, row in run(teams, args.repeat, args.latency_ms).items():
+            print(f"{teams:>5}  {route:<44}{row['cold_ms']:>10.2f}{row['warm_ms']:>10.2f}{row['upstream_calls']:>10}")
+
+
+if __name__ == "__main__":
+    main()
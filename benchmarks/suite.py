@@ -0,0 +1,180 @@
+# benchmarks/suite.py
+"""Parser throughput + route latency, recorded and compared against a committed baseline.
+
+Run from the repo root:
+  python benchmarks/suite.py                        # print results
+  python benchmarks/suite.py --compare              # exit 1 if anything still regresses past --threshold
+                                                    # after --retries re-runs (best of each entry is kept)
+  python benchmarks/suite.py --update-baseline      # rewrite benchmarks/baseline.json (best of 1 + --retries runs)
+  python benchmarks/suite.py --save results.json    # keep this run (e.g. as a CI artifact)
+
+Timings are divided by a fixed pure-Python calibration loop measured in the
+same run, so a baseline recorded on a laptop still means something on a CI
+runner; it is re-measured before each league size.  The suite re-runs itself
+with ``PYTHONHASHSEED=0``: with a random seed, dict-heavy code (the
+calibration loop included) swung by 50% between otherwise identical runs.
+Upstream call counts are compared exactly: one more Yahoo request per page is
+a regression whatever the clock says.
+"""
+import argparse, json, os, platform, sys, time
+from typing import Any, Dict, List
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+
+import parsers, routes  # noqa: E402
+
+BASELINE_PATH = os.path.join(HERE, "baseline.json")
+TEAM_SIZES = [8, 12, 20]
+# Growth below these absolute amounts is treated as scheduler noise, whatever the percentage.
+MIN_PARSER_DELTA_US = 5.0
+MIN_ROUTE_DELTA_MS = 2.0
+# On a shared single-core VM, best-of-three timings of unchanged code still moved by up to ~50% between
+# runs, so 25% failed on noise alone. 75% still catches the slowdowns this gate exists for (a cache that stops
+# hitting, a parser gone quadratic); extra upstream calls fail at any size.
+DEFAULT_THRESHOLD = 0.75
+HASH_SEED = "0"  # string hashing order moves timings more than most real regressions
+
+
+def calibrate() -> float:
+    """Milliseconds for a fixed dict/str/int workload, best of five; the unit every timing is divided by."""
+    best = float("inf")
+    for _ in range(5):
+        start = time.perf_counter()
+        blob: Dict[str, Any] = {}
+        for i in range(100_000):
+            blob[str(i)] = {"stat_id": i % 11, "value": f"{i * 7 % 1000}"}
+        total = sum(int(v["value"]) for v in blob.values() if v["stat_id"] != 3)
+        best = min(best, (time.perf_counter() - start) * 1000)
+    assert total > 0
+    return best
+
+
+def collect(teams: List[int], repeat: int, seconds: float) -> Dict[str, Any]:
+    results: Dict[str, Any] = {
+        "recorded_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "parsers": {},
+        "routes": {},
+    }
+    # Re-calibrated before every league size: a shared VM's speed drifts over a run, and each timing is
+    # divided by the unit measured next to it rather than one taken minutes earlier.
+    units = []
+    for size in teams:
+        unit = calibrate()
+        units.append(unit)
+        for key, row in parsers.run([size], seconds).items():
+            results["parsers"][key] = {"us_per_call": round(row["us_per_call"], 2),
+                                       "normalized": row["us_per_call"] / 1000 / unit}
+        for route, row in routes.run(size, repeat).items():
+            key = f"{route}@{size}"
+            results["routes"][key] = {
+                "cold_ms": round(row["cold_ms"], 3), "warm_ms": round(row["warm_ms"], 3),
+                "cold_normalized": row["cold_ms"] / unit, "warm_normalized": row["warm_ms"] / unit,
+                "upstream_calls": row["upstream_calls"],
+            }
+    results["calibration_ms"] = round(sorted(units)[len(units) // 2], 3)
+    return results
+
+
+def best_of(first: Dict[str, Any], second: Dict[str, Any]) -> Dict[str, Any]:
+    """Two runs merged entry by entry, keeping the faster normalized timing of each (call counts: the lower)."""
+    merged = dict(first, parsers=dict(first["parsers"]), routes=dict(first["routes"]))
+    for key, row in second["parsers"].items():
+        if key not in merged["parsers"] or row["normalized"] < merged["parsers"][key]["normalized"]:
+            merged["parsers"][key] = row
+    for key, row in second["routes"].items():
+        base = merged["routes"].get(key)
+        if base is None:
+            merged["routes"][key] = row
+            continue
+        best = dict(base, upstream_calls=min(base["upstream_calls"], row["upstream_calls"]))
+        for phase in ("cold", "warm"):
+            if row[f"{phase}_normalized"] < base[f"{phase}_normalized"]:
+                best[f"{phase}_ms"], best[f"{phase}_normalized"] = row[f"{phase}_ms"], row[f"{phase}_normalized"]
+        merged["routes"][key] = best
+    return merged
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """Human-readable regressions, empty when ``current`` is within ``threshold`` of ``baseline`` everywhere."""
+    regressions: List[str] = []
+    unit = current["calibration_ms"]
+    for key, row in current["parsers"].items():
+        base = baseline.get("parsers", {}).get(key)
+        if (base and row["normalized"] > base["normalized"] * (1 + threshold)
+                and (row["normalized"] - base["normalized"]) * unit * 1000 > MIN_PARSER_DELTA_US):
+            regressions.append(f"parser {key}: {row['normalized'] / base['normalized'] - 1:+.0%} "
+                               f"({row['us_per_call']:.1f} us/call)")
+    for key, row in current["routes"].items():
+        base = baseline.get("routes", {}).get(key)
+        if not base:
+            continue
+        if row["upstream_calls"] > base["upstream_calls"]:
+            regressions.append(f"route {key}: {row['upstream_calls']} upstream calls (baseline {base['upstream_calls']})")
+        for phase in ("cold", "warm"):
+            now, then = row[f"{phase}_normalized"], base[f"{phase}_normalized"]
+            if now > then * (1 + threshold) and (now - then) * unit > MIN_ROUTE_DELTA_MS:
+                regressions.append(f"route {key} {phase}: {now / then - 1:+.0%} ({row[f'{phase}_ms']:.2f} ms)")
+    return regressions
+
+
+def main() -> None:
+    if os.environ.get("PYTHONHASHSEED") != HASH_SEED:
+        os.execve(sys.executable, [sys.executable] + sys.argv, {**os.environ, "PYTHONHASHSEED": HASH_SEED})
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--teams", type=int, nargs="+", default=TEAM_SIZES)
+    parser.add_argument("--repeat", type=int, default=5, help="route runs per measurement (best is kept)")
+    parser.add_argument("--seconds", type=float, default=0.3, help="time budget per parser and league size")
+    parser.add_argument("--compare", nargs="?", const=BASELINE_PATH, metavar="BASELINE",
+                        help=f"fail on regressions against BASELINE (default {os.path.relpath(BASELINE_PATH)})")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed slowdown before failing (0.75 = 75%%)")
+    parser.add_argument("--retries", type=int, default=2,
+                        help="extra runs whose best entries are kept: always with --update-baseline, and with"
+                             " --compare only while anything regresses")
+    parser.add_argument("--save", metavar="PATH", help="write this run's results as JSON")
+    parser.add_argument("--update-baseline", action="store_true", help=f"write results to {os.path.relpath(BASELINE_PATH)}")
+    args = parser.parse_args()
+
+    results = collect(args.teams, args.repeat, args.seconds)
+    if args.update_baseline:
+        # The baseline is the best of as many runs as --compare may take, so both sides are measured alike.
+        for _ in range(args.retries):
+            results = best_of(results, collect(args.teams, args.repeat, args.seconds))
+    print(f"calibration: {results['calibration_ms']:.2f} ms")
+    print(f"{'parser':<44}{'us/call':>12}")
+    for key, row in results["parsers"].items():
+        print(f"{key:<44}{row['us_per_call']:>12.1f}")
+    print(f"{'route':<52}{'cold ms':>10}{'warm ms':>10}{'upstream':>10}")
+    for key, row in results["routes"].items():
+        print(f"{key:<52}{row['cold_ms']:>10.2f}{row['warm_ms']:>10.2f}{row['upstream_calls']:>10}")
+
+    for path in filter(None, (args.save, BASELINE_PATH if args.update_baseline else None)):
+        with open(path, "w", encoding="utf-8") as fh:
+            json.dump(results, fh, indent=1, sort_keys=True)
+            fh.write("\n")
+        print(f"wrote {path}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as fh:
+            baseline = json.load(fh)
+        regressions = compare(results, baseline, args.threshold)
+        for attempt in range(args.retries):
+            if not regressions:
+                break
+            # A real slowdown survives a re-run; a noisy neighbour on a shared runner usually doesn't.
+            print(f"\n{len(regressions)} possible regression(s); re-running ({attempt + 1}/{args.retries})")
+            results = best_of(results, collect(args.teams, args.repeat, args.seconds))
+            regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) past {args.threshold:.0%} vs {args.compare}:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"\nno regressions past {args.threshold:.0%} vs {args.compare}")
+
+
+if __name__ == "__main__":
+    main()
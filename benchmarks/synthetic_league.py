@@ -0,0 +1,360 @@
+# benchmarks/synthetic_league.py
+"""Synthetic Yahoo Fantasy leagues, plus the NBA Stats responses the app asks for, for offline benchmarks.
+
+``SyntheticLeague(teams=12)`` answers every Yahoo path the app requests for one
+league: settings, teams, season stats, scoreboards, matchups, player stats and
+keepers.  It also covers the previous season's league, the ``/select`` league
+list and nba_api's PlayerIndex, player dashboard, league per-game stats and
+player game logs.
+Pass ``league.respond`` to ``upstream_replay.FixtureStore(responder=...)``.
+The output depends only on the constructor arguments.
+"""
+import random, re
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+GAME_KEY = "454"
+PREVIOUS_GAME_KEY = "428"
+USER_GUID = "BENCHUSERGUID"
+# Scoring categories (9-cat) and the display-only made/attempted pairs, in Yahoo's order.
+CATEGORIES = [("9004003", "FGM/A", "1", True), ("5", "FG%", "1", False), ("9007006", "FTM/A", "1", True),
+              ("8", "FT%", "1", False), ("10", "3PTM", "1", False), ("12", "PTS", "1", False),
+              ("15", "REB", "1", False), ("16", "AST", "1", False), ("17", "ST", "1", False),
+              ("18", "BLK", "1", False), ("19", "TO", "0", False)]
+PLAYERS_PER_TEAM = 13
+KEEPERS_PER_TEAM = 2
+
+
+def _wrap(items: List[Any], key: str) -> Dict[str, Any]:
+    # Yahoo's {"0": {key: ...}, "1": ..., "count": n} collections.
+    blob: Dict[str, Any] = {str(i): {key: item} for i, item in enumerate(items)}
+    blob["count"] = len(items)
+    return blob
+
+
+def _parse_weeks(raw: str) -> List[int]:
+    weeks: List[int] = []
+    for part in raw.split(","):
+        start, sep, end = part.partition("-")
+        weeks.extend(range(int(start), int(end) + 1) if sep else [int(start)])
+    return weeks
+
+
+class SyntheticLeague:
+    def __init__(self, teams: int = 12, *, current_week: int = 10, end_week: int = 20, league_id: int = 77,
+                 seed: int = 7):
+        if teams < 4 or teams % 2:
+            raise ValueError("teams must be an even number >= 4")
+        self.teams = teams
+        self.current_week = current_week
+        self.end_week = end_week
+        self.playoff_start_week = end_week - 2
+        self.num_playoff_teams = 6 if teams >= 10 else 4
+        self.league_id = league_id
+        self.seed = seed
+        self.league_key = f"{GAME_KEY}.l.{league_id}"
+        self.previous_league_key = f"{PREVIOUS_GAME_KEY}.l.{league_id}"
+        self.my_team_name = self._team_name(1)
+        self._names = _player_names(teams * PLAYERS_PER_TEAM)
+
+    # ─────────────── building blocks ───────────────
+    def _rng(self, *parts: Any) -> random.Random:
+        return random.Random("|".join(map(str, (self.seed, *parts))))
+
+    def _team_name(self, i: int) -> str:
+        return f"Team {i} Ballers"
+
+    def _meta(self, league_key: str) -> Dict[str, Any]:
+        previous = league_key == self.previous_league_key
+        return {
+            "league_key": league_key, "league_id": str(self.league_id), "name": "Benchmark League",
+            "url": f"https://basketball.fantasysports.yahoo.com/nba/{self.league_id}",
+            "draft_status": "postdraft", "num_teams": self.teams, "scoring_type": "head",
+            "current_week": str(self.end_week if previous else self.current_week), "start_week": "1",
+            "end_week": str(self.end_week), "season": "2024" if previous else "2025", "game_code": "nba",
+            "renew": "" if previous else f"{PREVIOUS_GAME_KEY}_{self.league_id}",
+            "renewed": f"{GAME_KEY}_{self.league_id}" if previous else "",
+        }
+
+    def _team_attrs(self, league_key: str, i: int) -> List[Any]:
+        rng = self._rng("team", league_key, i)
+        manager: Dict[str, Any] = {"manager_id": str(i), "nickname": f"manager{i}",
+                                   "guid": USER_GUID if i == 1 else f"GUID{i:04d}", "is_commissioner": "0"}
+        if i == 1:
+            manager["is_current_login"] = "1"
+        return [
+            {"team_key": f"{league_key}.t.{i}"}, {"team_id": str(i)}, {"name": self._team_name(i)}, [],
+            {"url": f"https://basketball.fantasysports.yahoo.com/nba/{self.league_id}/{i}"},
+            {"team_logos": [{"team_logo": {"size": "large", "url": f"https://s.yimg.com/bench/logo{i}.png"}}]},
+            {"waiver_priority": i}, {"number_of_moves": rng.randint(0, 40)}, {"number_of_trades": rng.randint(0, 5)},
+            {"league_scoring_type": "head"}, {"has_draft_grade": 0},
+            {"managers": [{"manager": manager}]},
+        ]
+
+    def _team_stats(self, league_key: str, team: int, week: Optional[int]) -> Dict[str, Any]:
+        coverage = {"coverage_type": "season"} if week is None else {"coverage_type": "week", "week": str(week)}
+        if week is not None and week > self.current_week:
+            return {"team_stats": {**coverage, "stats": [{"stat": {"stat_id": s, "value": ""}} for s, *_ in CATEGORIES]}}
+        rng = self._rng("stats", league_key, team, week)
+        scale = 1 if week is not None else self.current_week
+        fgm, fga = rng.randint(150, 230) * scale, rng.randint(330, 470) * scale
+        ftm, fta = rng.randint(50, 100) * scale, rng.randint(70, 125) * scale
+        values = {
+            "9004003": f"{fgm}/{fga}", "5": f"{fgm / fga:.3f}", "9007006": f"{ftm}/{fta}", "8": f"{ftm / fta:.3f}",
+            "10": rng.randint(40, 90) * scale, "12": rng.randint(450, 650) * scale, "15": rng.randint(170, 260) * scale,
+            "16": rng.randint(90, 160) * scale, "17": rng.randint(25, 50) * scale, "18": rng.randint(15, 40) * scale,
+            "19": rng.randint(50, 90) * scale,
+        }
+        return {"team_stats": {**coverage, "stats": [{"stat": {"stat_id": s, "value": str(values[s])}} for s, *_ in CATEGORIES]},
+                "team_points": {**coverage, "total": "0"}}
+
+    def pairings(self, week: int) -> List[Tuple[int, int]]:
+        """Round-robin (circle method) opponents for ``week``; teams are numbered from 1."""
+        others = list(range(2, self.teams + 1))
+        shift = (week - 1) % (self.teams - 1)
+        others = others[shift:] + others[:shift]
+        ring = [1] + others
+        return [(ring[k], ring[-1 - k]) for k in range(self.teams // 2)]
+
+    def _status(self, league_key: str, week: int) -> str:
+        if league_key == self.previous_league_key or week < self.current_week:
+            return "postevent"
+        return "midevent" if week == self.current_week else "preevent"
+
+    def _matchup(self, league_key: str, week: int, a: int, b: int) -> Dict[str, Any]:
+        status = self._status(league_key, week)
+        pair = [[self._team_attrs(league_key, t), self._team_stats(league_key, t, week)] for t in (a, b)]
+        matchup: Dict[str, Any] = {
+            "week": str(week), "week_start": f"2025-10-{20 + week:02d}", "status": status,
+            "is_playoffs": "1" if week >= self.playoff_start_week else "0", "is_consolation": "0",
+        }
+        if status == "postevent":
+            winners = [{"stat_winner": {"stat_id": s, "winner_team_key": f"{league_key}.t.{a if self._rng(week, a, s).random() < .5 else b}"}}
+                       for s, _, _, display in CATEGORIES if not display]
+            matchup.update({"is_tied": 0, "winner_team_key": f"{league_key}.t.{a}", "stat_winners": winners})
+        matchup["0"] = {"teams": _wrap(pair, "team")}
+        return matchup
+
+    def _player(self, team: int, slot: int) -> Tuple[str, str, str]:
+        n = (team - 1) * PLAYERS_PER_TEAM + slot
+        return f"{GAME_KEY}.p.{6000 + n}", str(6000 + n), self._names[n]
+
+    def _player_core(self, team: int, slot: int) -> List[Any]:
+        player_key, player_id, name = self._player(team, slot)
+        first, _, last = name.partition(" ")
+        return [{"player_key": player_key}, {"player_id": player_id},
+                {"name": {"full": name, "first": first, "last": last, "ascii_first": first, "ascii_last": last}},
+                {"editorial_team_abbr": "BEN"}, {"display_position": ("PG", "SG", "SF", "PF", "C")[slot % 5]},
+                {"position_type": "P"}]
+
+    def _player_stats(self, team: int, slot: int, week: Optional[int]) -> Dict[str, Any]:
+        rng = self._rng("player", team, slot, week)
+        games = 1 if week is None else 3
+        scale = games * (self.current_week if week is None else 1)
+        fga, fta, tpa = rng.randint(8, 20) * scale, rng.randint(2, 9) * scale, rng.randint(1, 9) * scale
+        fgm, ftm, tpm = int(fga * rng.uniform(.4, .55)), int(fta * rng.uniform(.65, .9)), int(tpa * rng.uniform(.3, .42))
+        values = {"9004003": f"{fgm}/{fga}", "5": f"{fgm / fga:.3f}", "9007006": f"{ftm}/{fta}", "8": f"{ftm / fta:.3f}",
+                  "10": tpm, "12": 2 * fgm + tpm + ftm, "15": rng.randint(2, 12) * scale, "16": rng.randint(1, 9) * scale,
+                  "17": rng.randint(0, 2) * scale, "18": rng.randint(0, 2) * scale, "19": rng.randint(0, 4) * scale}
+        coverage = {"coverage_type": "season", "season": "2025"} if week is None else {"coverage_type": "week", "week": str(week)}
+        return {"player_stats": {**coverage, "stats": [{"stat": {"stat_id": s, "value": str(values[s])}} for s, *_ in CATEGORIES]}}
+
+    # ─────────────── Yahoo resources ───────────────
+    def settings(self, league_key: str) -> Dict[str, Any]:
+        stats = []
+        for stat_id, name, sort_order, display_only in CATEGORIES:
+            stat = {"stat_id": int(stat_id), "enabled": "1", "name": name, "display_name": name,
+                    "sort_order": sort_order, "position_type": "P", "stat_position_types": [{"stat_position_type": {"position_type": "P"}}]}
+            if display_only:
+                stat["is_only_display_stat"] = "1"
+            stats.append({"stat": stat})
+        settings = {
+            "draft_type": "live", "scoring_type": "head", "uses_playoff": "1", "has_playoff_consolation_games": True,
+            "playoff_start_week": str(self.playoff_start_week), "num_playoff_teams": str(self.num_playoff_teams),
+            "max_teams": str(self.teams), "trade_end_date": "2026-02-05", "stat_categories": {"stats": stats},
+            "roster_positions": [{"roster_position": {"position": p, "count": 1}} for p in ("PG", "SG", "G", "SF", "PF", "F", "C", "Util", "BN")],
+        }
+        return {"fantasy_content": {"league": [self._meta(league_key), {"settings": [settings]}]}}
+
+    def teams_payload(self, league_key: str) -> Dict[str, Any]:
+        teams = [[self._team_attrs(league_key, i)] for i in range(1, self.teams + 1)]
+        return {"fantasy_content": {"league": [self._meta(league_key), {"teams": _wrap(teams, "team")}]}}
+
+    def season_stats(self, league_key: str) -> Dict[str, Any]:
+        teams = [[self._team_attrs(league_key, i), self._team_stats(league_key, i, None)] for i in range(1, self.teams + 1)]
+        return {"fantasy_content": {"league": [self._meta(league_key), {"teams": _wrap(teams, "team")}]}}
+
+    def scoreboard(self, league_key: str, week: int) -> Dict[str, Any]:
+        matchups = [self._matchup(league_key, week, a, b) for a, b in self.pairings(week)]
+        return {"fantasy_content": {"league": [self._meta(league_key),
+                                               {"scoreboard": {"0": {"matchups": _wrap(matchups, "matchup")}, "week": str(week)}}]}}
+
+    def matchups(self, league_key: str, weeks: List[int]) -> Dict[str, Any]:
+        teams = []
+        for i in range(1, self.teams + 1):
+            mine = []
+            for week in weeks:
+                a, b = next(pair for pair in self.pairings(week) if i in pair)
+                mine.append(self._matchup(league_key, week, i, b if a == i else a))
+            teams.append([self._team_attrs(league_key, i), {"matchups": _wrap(mine, "matchup")}])
+        return {"fantasy_content": {"league": [self._meta(league_key), {"teams": _wrap(teams, "team")}]}}
+
+    def team_player_stats(self, league_key: str, team: int, week: Optional[int]) -> Dict[str, Any]:
+        players = [[self._player_core(team, slot), self._player_stats(team, slot, week)] for slot in range(PLAYERS_PER_TEAM)]
+        return {"fantasy_content": {"team": [self._team_attrs(league_key, team), {"players": _wrap(players, "player")}]}}
+
+    def keepers(self, league_key: str) -> Dict[str, Any]:
+        players = []
+        for team in range(1, self.teams + 1):
+            for slot in range(KEEPERS_PER_TEAM):
+                ownership = {"ownership_type": "team", "owner_team_key": f"{league_key}.t.{team}",
+                             "owner_team_name": self._team_name(team)}
+                players.append([self._player_core(team, slot), {"ownership": ownership}])
+        return {"fantasy_content": {"league": [self._meta(league_key), {"players": _wrap(players, "player")}]}}
+
+    def user_leagues(self, other_leagues: int = 3) -> Dict[str, Any]:
+        """The ``/select`` payload: this league and its predecessor, plus ``other_leagues`` more per season."""
+        games = []
+        for game_key, season, own_key in ((GAME_KEY, "2025", self.league_key), (PREVIOUS_GAME_KEY, "2024", self.previous_league_key)):
+            leagues = []
+            for n in range(other_leagues + 1):
+                key = own_key if n == 0 else f"{game_key}.l.{self.league_id + 1000 + n}"
+                meta = {**self._meta(own_key), "league_key": key, "season": season,
+                        "scoring_type": "head" if n % 3 != 2 else "point"}
+                teams = [[self._team_attrs(key, i)] for i in range(1, self.teams + 1)]
+                leagues.append([meta, {"teams": _wrap(teams, "team")}])
+            games.append([{"game_key": game_key, "code": "nba", "season": season, "type": "full"},
+                          {"leagues": _wrap(leagues, "league")}])
+        user = [{"guid": USER_GUID}, {"games": _wrap(games, "game")}]
+        return {"fantasy_content": {"users": _wrap([user], "user")}}
+
+    # ─────────────── NBA Stats resources ───────────────
+    def nba_player_index(self) -> Dict[str, Any]:
+        rows = []
+        for n, name in enumerate(self._names):
+            first, _, last = name.partition(" ")
+            rows.append({"PERSON_ID": 1_630_000 + n, "PLAYER_LAST_NAME": last, "PLAYER_FIRST_NAME": first,
+                         "TEAM_ID": 1_610_612_737 + n % 30, "TEAM_ABBREVIATION": "BEN", "POSITION": ("G", "F", "C")[n % 3]})
+        return _result_sets("playerindex", "PlayerIndex", {"PlayerIndex": rows})
+
+    def _nba_averages(self, player_id: int) -> Dict[str, Any]:
+        rng = self._rng("nba", player_id)
+        return {"GROUP_SET": "Overall", "GROUP_VALUE": "2025-26", "GP": rng.randint(20, 60), "MIN": rng.uniform(18, 36),
+               "PTS": rng.uniform(6, 30), "REB": rng.uniform(2, 12), "AST": rng.uniform(1, 9), "STL": rng.uniform(0, 2),
+               "BLK": rng.uniform(0, 2), "TOV": rng.uniform(0.5, 4), "FG3M": rng.uniform(0, 4), "FGM": rng.uniform(2, 11),
+               "FGA": rng.uniform(5, 22), "FTM": rng.uniform(0.5, 7), "FTA": rng.uniform(1, 8), "FG3A": rng.uniform(0.5, 10),
+               "FG_PCT": rng.uniform(.4, .6), "FT_PCT": rng.uniform(.6, .92), "FG3_PCT": rng.uniform(.28, .42),
+               "DD2": rng.randint(0, 20), "TD3": rng.randint(0, 3)}
+
+    def nba_player_dashboard(self, player_id: int) -> Dict[str, Any]:
+        row = self._nba_averages(player_id)
+        return _result_sets("playerdashboardbygeneralsplits", "PlayerDashboardByGeneralSplits", {"OverallPlayerDashboard": [row]})
+
+    def nba_league_per_game(self) -> Dict[str, Any]:
+        rows = []
+        for n, name in enumerate(self._names):
+            rows.append({**self._nba_averages(1_630_000 + n), "PLAYER_ID": 1_630_000 + n,
+                         "PLAYER_NAME": name, "TEAM_ABBREVIATION": "BEN", "TEAM_ID": 1_610_612_737 + n % 30})
+        return _result_sets("leaguedashplayerstats", "LeagueDashPlayerStats", {"LeagueDashPlayerStats": rows})
+
+    def nba_player_game_logs(self, season: str, date_from: Optional[str] = None) -> Dict[str, Any]:
+        """Regular-season PlayerGameLogs: each player sits out a random share of games; ``date_from`` is MM/DD/YYYY."""
+        opener = date(int(season[:4]), 10, 22)
+        since = datetime.strptime(date_from, "%m/%d/%Y").date() if date_from else opener
+        rows = []
+        for n, name in enumerate(self._names):
+            player_id = 1_630_000 + n
+            rng = self._rng("games", season, player_id)
+            avg = self._nba_averages(player_id)
+            missed = rng.choice((0.02, 0.1, 0.3, 1.0))  # 1.0: not in the league that season
+            for game in range(82):
+                played_on = opener + timedelta(days=2 * game)
+                if rng.random() < missed:
+                    continue
+                line = {key: max(0.0, avg[key] * rng.uniform(0.5, 1.5)) for key in
+                        ("MIN", "PTS", "REB", "AST", "STL", "BLK", "TOV", "FG3A", "FGA", "FTA")}
+                if played_on < since:
+                    continue
+                line["FGM"] = round(line["FGA"] * avg["FG_PCT"])
+                line["FG3M"] = min(line["FGM"], round(line["FG3A"] * avg["FG3_PCT"]))
+                line["FTM"] = round(line["FTA"] * avg["FT_PCT"])
+                rows.append({**line, "SEASON_YEAR": season, "PLAYER_ID": player_id, "PLAYER_NAME": name,
+                             "TEAM_ABBREVIATION": "BEN", "GAME_ID": f"002{season[2:4]}{game:05d}",
+                             "GAME_DATE": f"{played_on.isoformat()}T00:00:00",
+                             "DD2": int(sum(line[key] >= 10 for key in ("PTS", "REB", "AST")) >= 2)})
+        return _result_sets("playergamelogs", "PlayerGameLogs", {"PlayerGameLogs": rows})
+
+    # ─────────────── replay responder ───────────────
+    def respond(self, method: str, url: str) -> Optional[Dict[str, Any]]:
+        """``FixtureStore`` responder: a fixture for any URL this league knows, else ``None``."""
+        parts = urlsplit(url)
+        body = self._body(parts.netloc, parts.path, parts.query)
+        return None if body is None else {"status": 200, "content_type": "application/json", "json": body}
+
+    @lru_cache(maxsize=None)
+    def _body(self, host: str, path: str, query: str) -> Optional[Dict[str, Any]]:
+        if host == "stats.nba.com":
+            endpoint = path.rsplit("/", 1)[-1]
+            if endpoint == "playerindex":
+                return self.nba_player_index()
+            if endpoint == "playerdashboardbygeneralsplits":
+                match = re.search(r"PlayerID=(\d+)", query)
+                return self.nba_player_dashboard(int(match.group(1)) if match else 0)
+            if endpoint == "leaguedashplayerstats":
+                return self.nba_league_per_game()
+            if endpoint == "playergamelogs":
+                params = dict(parse_qsl(query))
+                return self.nba_player_game_logs(params.get("Season", "2024-25"), params.get("DateFrom") or None)
+            return None
+        path = path.split("/fantasy/v2/", 1)[-1]
+        if path.startswith("users;use_login=1/games"):
+            return self.user_leagues()
+        match = re.fullmatch(r"league/([\d.l]+)/(.+)", path)
+        if match:
+            league_key, resource = match.groups()
+            if league_key not in (self.league_key, self.previous_league_key):
+                return None
+            if resource == "settings":
+                return self.settings(league_key)
+            if resource == "teams":
+                return self.teams_payload(league_key)
+            if resource == "teams;out=stats;type=season":
+                return self.season_stats(league_key)
+            if resource == "players;status=K;out=ownership":
+                return self.keepers(league_key)
+            week = re.fullmatch(r"scoreboard;week=(\d+)", resource)
+            if week:
+                return self.scoreboard(league_key, int(week.group(1)))
+            weeks = re.fullmatch(r"teams;out=matchups;weeks=([\d,\-]+)", resource)
+            if weeks:
+                return self.matchups(league_key, _parse_weeks(weeks.group(1)))
+            return None
+        match = re.fullmatch(r"team/([\d.l]+)\.t\.(\d+)/players/stats;type=(week|season)(?:;week=(\d+))?", path)
+        if match:
+            league_key, team, kind, week = match.groups()
+            return self.team_player_stats(league_key, int(team), int(week) if kind == "week" else None)
+        return None
+
+
+def _result_sets(resource: str, endpoint_class: str, rows_by_set: Dict[str, List[Dict[str, Any]]]) -> Dict[str, Any]:
+    # Every result set nba_api expects for the endpoint, with its real headers; missing columns are null.
+    from nba_api.stats import endpoints
+
+    expected = getattr(getattr(endpoints, resource), endpoint_class).expected_data
+    result_sets = []
+    for name, headers in expected.items():
+        rows = rows_by_set.get(name, [])
+        result_sets.append({"name": name, "headers": headers, "rowSet": [[row.get(h) for h in headers] for row in rows]})
+    return {"resource": resource, "parameters": {}, "resultSets": result_sets}
+
+
+def _player_names(count: int) -> List[str]:
+    # Real active-player names, so keeper name resolution does the work it does in production.
+    from nba_api.stats.static import players
+
+    names = sorted(p["full_name"] for p in players.get_active_players())
+    while len(names) < count:
+        names += [f"{name} II" for name in names[:count - len(names)]]
+    return names[:count] if count else names
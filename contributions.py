@@ -0,0 +1,125 @@
+# contributions.py
+"""Server-side aggregation for the Player Contributions tab.
+
+Weekly (or season) ``team/{key}/players/stats`` payloads are folded into a
+``players x stats`` NumPy matrix; shooting percentages are recomputed from
+made/attempted totals rather than averaged.
+"""
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from yahoo_decode import decode_team_payload
+
+# percentage stat_id -> (made stat_id, attempted stat_id, Yahoo's "made/attempted" display stat_id)
+SHOOTING_SPLITS: Dict[str, Tuple[str, str, Optional[str]]] = {
+    "5": ("4", "3", "9004003"),   # FG%
+    "8": ("7", "6", "9007006"),   # FT%
+    "11": ("10", "9", None),      # 3PT%
+}
+
+
+def _to_number(raw: Any) -> float:
+    # Yahoo uses "-" / "" for "no games"; the JS treated those as 0 and so do we.
+    if raw is None or raw == "" or raw == "-":
+        return 0.0
+    try:
+        return float(raw)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def extract_players(payload: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Return ``[{player_key, name, stats: {stat_id: raw}}]`` from a ``team/.../players/stats`` payload."""
+    return [
+        {"player_key": player.player_key or player.name_full, "name": player.name_full or "Unknown Player",
+         "stats": player.stats}
+        for player in decode_team_payload(payload or {}).players
+    ]
+
+
+def _split_made_attempted(raw: Any) -> Tuple[float, float]:
+    if isinstance(raw, str) and "/" in raw:
+        made, _, attempted = raw.partition("/")
+        return _to_number(made.strip()), _to_number(attempted.strip())
+    return 0.0, 0.0
+
+
+def aggregate(player_batches: Iterable[List[Dict[str, Any]]], stat_ids: Optional[List[str]] = None) -> Dict[str, Any]:
+    """Sum every batch into a ``players x stats`` matrix and return per-player values and contribution shares.
+
+    ``shares`` are percentages of the team total; for shooting percentages a
+    player's share is their share of attempts, matching the original chart.
+    """
+    player_index: Dict[str, int] = {}
+    players: List[Dict[str, Any]] = []
+    seen_stats: List[str] = []
+    col_index: Dict[str, int] = {}
+    # One (player row, stat column, value) triple per stat cell, summed into the matrix in one np.add.at.
+    cell_rows: List[int] = []
+    cell_cols: List[int] = []
+    cell_values: List[float] = []
+
+    def _add(idx: int, stat_id: str, value: float) -> None:
+        cell_rows.append(idx)
+        cell_cols.append(col_index.setdefault(stat_id, len(col_index)))
+        cell_values.append(value)
+
+    for batch in player_batches:
+        for player in batch:
+            idx = player_index.setdefault(player["player_key"], len(players))
+            if idx == len(players):
+                players.append({"player_key": player["player_key"], "name": player["name"]})
+            stats = player["stats"]
+            for stat_id, raw in stats.items():
+                if stat_id not in seen_stats:
+                    seen_stats.append(stat_id)
+                _add(idx, stat_id, _to_number(raw))
+            for made, attempted, composite in SHOOTING_SPLITS.values():
+                if composite and composite in stats and made not in stats and attempted not in stats:
+                    m, a = _split_made_attempted(stats[composite])
+                    _add(idx, made, m)
+                    _add(idx, attempted, a)
+
+    # Every shooting split needs its made/attempted columns, even if Yahoo only sent the composite.
+    for made, attempted, _ in SHOOTING_SPLITS.values():
+        for stat_id in (made, attempted):
+            col_index.setdefault(stat_id, len(col_index))
+
+    matrix = np.zeros((len(players), len(col_index)), dtype=np.float64)
+    np.add.at(matrix, (np.array(cell_rows, dtype=np.intp), np.array(cell_cols, dtype=np.intp)),
+              np.array(cell_values, dtype=np.float64))
+
+    wanted = [s for s in (stat_ids or seen_stats) if s in col_index or s in SHOOTING_SPLITS]
+    values: Dict[str, List[Optional[float]]] = {}
+    shares: Dict[str, List[float]] = {}
+    weights: Dict[str, List[float]] = {}
+    totals: Dict[str, Optional[float]] = {}
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for stat_id in wanted:
+            if stat_id in SHOOTING_SPLITS:
+                made_id, attempted_id, _ = SHOOTING_SPLITS[stat_id]
+                made = matrix[:, col_index[made_id]]
+                attempted = matrix[:, col_index[attempted_id]]
+                total_attempted = attempted.sum()
+                pct = np.where(attempted > 0, made / attempted, np.nan)
+                values[stat_id] = [None if np.isnan(v) else round(float(v), 4) for v in pct]
+                share = attempted / total_attempted * 100 if total_attempted > 0 else np.zeros_like(attempted)
+                weights[stat_id] = attempted.tolist()
+                totals[stat_id] = round(float(made.sum() / total_attempted), 4) if total_attempted > 0 else None
+            else:
+                column = matrix[:, col_index[stat_id]]
+                total = column.sum()
+                values[stat_id] = column.tolist()
+                share = column / total * 100 if total > 0 else np.zeros_like(column)
+                totals[stat_id] = float(total)
+            shares[stat_id] = np.round(share, 3).tolist()
+
+    return {
+        "players": players,
+        "stat_ids": wanted,
+        "values": values,
+        "shares": shares,
+        "weights": weights,
+        "totals": totals,
+    }
@@ -0,0 +1,69 @@
+# gunicorn.conf.py
+"""Gunicorn settings for `web: gunicorn main:app` (read automatically from the working directory).
+
+The app is imported once in the master and the static indexes are built
+before fork, so workers share them copy-on-write.  Mutable caches (Yahoo
+responses, team directories, the NBA player list, per-game stats) live in
+local SQLite files that every worker reads and writes.  The worker count comes
+from gunicorn's usual ``WEB_CONCURRENCY`` / ``--workers``.
+"""
+import gc, os, shutil, tempfile, time
+
+preload_app = os.getenv("GUNICORN_PRELOAD", "1") != "0"
+
+# One shared response cache instead of one per worker; set YAHOO_CACHE_BACKEND to override.
+os.environ.setdefault("YAHOO_CACHE_BACKEND", "sqlite")
+# Workers drop their metric samples here so /metrics reports every worker, not just the one scraped.
+# Per master pid, so a restart starts from zero instead of re-adding an old run's counters.
+_OWN_METRICS_DIR = not os.getenv("METRICS_DIR")
+if _OWN_METRICS_DIR:
+    os.environ["METRICS_DIR"] = os.path.join(tempfile.gettempdir(), f"fantasy-app-metrics-{os.getpid()}")
+
+
+def on_starting(server):
+    # The resolved worker count (--workers or WEB_CONCURRENCY), for per-worker pool sizing such as the trade finder's.
+    os.environ["WEB_CONCURRENCY"] = str(server.cfg.workers)
+
+
+def when_ready(server):
+    # Master, after the preloaded app is imported and before any worker is forked.
+    if not server.cfg.preload_app:
+        return
+    import main
+    from prefork import process_memory
+
+    report = main.warm_shared_state()
+    # Keep the warmed objects out of the GC's generations so collections in workers don't dirty their pages.
+    gc.freeze()
+    server.log.info("Warm-up in master (pid %s): %.1f ms %s; master RSS %s kB",
+                    report["pid"], report["total_ms"], report["steps_ms"], process_memory()["rss_kb"])
+
+
+def post_worker_init(worker):
+    import main
+    from prefork import process_memory
+
+    started = time.perf_counter()
+    if not worker.cfg.preload_app:
+        main.warm_shared_state()  # nothing inherited; warm before the first request instead of during it
+    memory = process_memory()
+    worker.log.info("Worker %s ready in %.1f ms (warm-up %s): RSS %s kB, shared %s kB, private %s kB",
+                    worker.pid, (time.perf_counter() - started) * 1000,
+                    "inherited from master" if main.WARMUP.report()["inherited"] else "in worker",
+                    memory["rss_kb"], memory["shared_kb"], memory["private_kb"])
+
+
+def worker_exit(server, worker):
+    # Runs in the worker, so this is the worker's own footprint after serving traffic.
+    import metrics
+    from prefork import process_memory
+
+    metrics.flush(force=True)  # keep its final counts in the server-wide totals
+    memory = process_memory()
+    server.log.info("Worker %s exiting: RSS %s kB, PSS %s kB, shared %s kB, private %s kB",
+                    worker.pid, memory["rss_kb"], memory["pss_kb"], memory["shared_kb"], memory["private_kb"])
+
+
+def on_exit(server):
+    if _OWN_METRICS_DIR:
+        shutil.rmtree(os.environ["METRICS_DIR"], ignore_errors=True)
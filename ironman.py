@@ -0,0 +1,327 @@
+# ironman.py
+"""Ironman rankings: who stays on the floor, and what they do while there.
+
+Season totals from ``ironman_store`` (up to three seasons, most recent first)
+become one row per player, with five z-scored components:
+
+* durability - games played per season, weighted 0.6/0.3/0.1 starting from the
+  most recent season the player appeared in, blended with the median and less
+  a penalty for season-to-season swings (``Durability_Composite``).  The live
+  season counts at its full-season pace (games played over the team's games so
+  far, times 82) and only once teams have played ``LIVE_MIN_GAMES``;
+* production - mean z-score of per-game PTS, REB, AST, STL, BLK, 3PM and DD2;
+* efficiency - mean z-score of FG%, 3P%, FT% and turnovers (negated);
+* minutes - z-score of minutes per game;
+* value - production and durability above what the player's ADP predicts.
+
+Per-game and shooting numbers come from the most recent season played.  Every
+z-score is taken over the whole player pool, on a ``players x seasons`` games
+matrix and a ``players x stats`` totals matrix, without a per-player loop.
+"""
+import csv, io
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from ironman_store import GAME_STATS
+from player_names import normalize_player_name
+
+SEASON_WEIGHTS = np.array([0.6, 0.3, 0.1])
+WEIGHTED_GP_SHARE = 0.7   # Durability_Composite = 0.7 * Weighted_GP + 0.3 * GP_Median - Durability_Penalty
+PENALTY_DIVISOR = 20.0    # Durability_Penalty = variance of per-season GP / 20
+FULL_SEASON_GAMES = 82    # the live season's GP is pro-rated to this many team games
+LIVE_MIN_GAMES = 10       # team games before the live season enters the durability window
+PRODUCTION_STATS: Tuple[str, ...] = ("PTS", "REB", "AST", "STL", "BLK", "FG3M", "DD2")
+EFFICIENCY_STATS: Tuple[str, ...] = ("FG_PCT", "FG3_PCT", "FT_PCT", "TOV")
+NEGATIVE_STATS = {"TOV"}  # z-scores enter their component negated
+# Category -> CSV column it is z-scored from.
+CATEGORY_COLUMNS: Dict[str, str] = {
+    **{key: f"{key}_PG" for key in PRODUCTION_STATS + ("TOV",)}, "FG_PCT": "FG_PCT", "FG3_PCT": "FG3_PCT", "FT_PCT": "FT_PCT",
+}
+SHOOTING: Dict[str, Tuple[str, str]] = {"FG_PCT": ("FGM", "FGA"), "FG3_PCT": ("FG3M", "FG3A"), "FT_PCT": ("FTM", "FTA")}
+
+COMPONENTS: Tuple[str, ...] = ("durability", "production", "efficiency", "minutes", "value")
+COMPONENT_COLUMNS: Dict[str, str] = {
+    "durability": "DurabilityZ", "production": "ProductionZ", "efficiency": "EfficiencyZ",
+    "minutes": "MinutesZ", "value": "ValueZ",
+}
+GOOD_IRONMAN_WEIGHTS: Dict[str, float] = {"durability": 0.4, "production": 0.4, "efficiency": 0.2}
+# Scored for players with an ADP only (the draft pool); everyone else gets 0, as in the original CSV.
+IRONMAN_WEIGHTS: Dict[str, float] = {"durability": 0.4, "value": 0.3, "minutes": 0.2, "production": 0.1}
+
+# Column order of the original hand-built CSV (static/ironman/app.js reads these names); FG_PCT is new.
+CSV_COLUMNS: List[str] = [
+    "name_full", "IronMan_Rank", "Good_IronMan_Rank", "team", "pos", "ADP", "Good_IronMan_Score", "IronMan_Score",
+    "DurabilityZ", "ProductionZ", "EfficiencyZ", "MinutesZ", "ValueZ", "GP", "MIN", "Weighted_GP", "GP_Median",
+    "Durability_Composite", "Durability_Penalty", "Seasons_Used", "PTS_PG", "REB_PG", "AST_PG", "STL_PG", "BLK_PG",
+    "FG3M_PG", "FG3_PCT", "FT_PCT", "TOV_PG", "DD2_PG", "FG_PCT",
+]
+
+
+def load_player_meta(path: Optional[str]) -> Dict[str, Dict[str, Any]]:
+    """Normalized name -> ``{"pos", "ADP"}`` from a CSV with ``name_full``, ``pos`` and ``ADP`` columns."""
+    meta: Dict[str, Dict[str, Any]] = {}
+    if not path:
+        return meta
+    with open(path, "r", encoding="utf-8-sig", newline="") as fh:
+        for row in csv.DictReader(fh):
+            key = normalize_player_name(row.get("name_full") or "")
+            if not key:
+                continue
+            try:
+                adp: Optional[float] = float(row.get("ADP") or "")
+            except ValueError:
+                adp = None
+            meta[key] = {"pos": row.get("pos") or "", "ADP": adp}
+    return meta
+
+
+def _zscore(values: np.ndarray) -> np.ndarray:
+    std = values.std()
+    return (values - values.mean()) / std if std > 0 else np.zeros_like(values)
+
+
+def _rank_desc(scores: np.ndarray) -> np.ndarray:
+    # 1 = best; ties share the better rank ("min" method).
+    return np.searchsorted(np.sort(-scores), -scores, side="left") + 1
+
+
+def compute(totals: List[Dict[str, Any]], seasons: List[str],
+            meta: Optional[Dict[str, Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
+    """``ironman_store.season_totals`` rows -> one CSV-ready dict per player, ordered by Ironman rank."""
+    if not totals:
+        return []
+    meta = meta or {}
+    season_index = {season: i for i, season in enumerate(seasons)}
+    totals = [row for row in totals if row["season"] in season_index and row["GP"]]
+    player_ids, inverse = np.unique(np.array([row["player_id"] for row in totals]), return_inverse=True)
+    col = np.array([season_index[row["season"]] for row in totals])
+    n, s = len(player_ids), len(seasons)
+
+    gp = np.zeros((n, s))
+    gp[inverse, col] = [row["GP"] for row in totals]
+    team_gp = np.zeros((n, s))
+    team_gp[inverse, col] = [row.get("TEAM_GP") or row["GP"] for row in totals]
+    live = np.zeros(s, dtype=bool)
+    live[col[[not row.get("final", True) for row in totals]]] = True
+    sums = np.zeros((n, s, len(GAME_STATS)))
+    sums[inverse, col] = [[row[key] or 0.0 for key in GAME_STATS] for row in totals]
+
+    # Durability: season weights go to the seasons a player actually has, most recent first, renormalized.
+    # The live season is read at its full-season pace and sits out until teams are LIVE_MIN_GAMES in,
+    # unless it is all the player has.
+    present = gp > 0
+    pace = np.where(live, np.minimum(gp, team_gp) * FULL_SEASON_GAMES / np.maximum(team_gp, 1), gp)
+    counted = present & ~(live & (team_gp < LIVE_MIN_GAMES))
+    counted |= present & ~counted.any(axis=1, keepdims=True)
+    slot = np.clip(np.cumsum(counted, axis=1) - 1, 0, len(SEASON_WEIGHTS) - 1)
+    weights = np.where(counted, SEASON_WEIGHTS[slot], 0.0)
+    weights /= weights.sum(axis=1, keepdims=True)
+    weighted_gp = (weights * pace).sum(axis=1)
+    played = np.where(counted, pace, np.nan)
+    gp_median = np.nanmedian(played, axis=1)
+    penalty = np.nanvar(played, axis=1) / PENALTY_DIVISOR
+    composite = np.maximum(0.0, WEIGHTED_GP_SHARE * weighted_gp + (1 - WEIGHTED_GP_SHARE) * gp_median - penalty)
+
+    # Everything else describes the most recent season played.
+    latest = present.argmax(axis=1)
+    rows = np.arange(n)
+    latest_gp = gp[rows, latest]
+    latest_totals = sums[rows, latest]
+    stat = {key: latest_totals[:, i] for i, key in enumerate(GAME_STATS)}
+    per_game = {key: stat[key] / latest_gp for key in GAME_STATS}
+    pct = {name: np.round(np.divide(stat[made], stat[att], out=np.zeros(n), where=stat[att] > 0), 3)
+           for name, (made, att) in SHOOTING.items()}
+
+    names, teams = [""] * n, [""] * n
+    for row, i, j in zip(totals, inverse, col):
+        if j == latest[i]:
+            names[i], teams[i] = row["player_name"] or "", row["team"] or ""
+    player_meta = [meta.get(normalize_player_name(name), {}) for name in names]
+    adp = np.array([m.get("ADP") if m.get("ADP") is not None else np.nan for m in player_meta], dtype=float)
+    drafted = ~np.isnan(adp)
+
+    z = {
+        "durability": _zscore(composite),
+        "production": np.mean([_zscore(per_game[key]) for key in PRODUCTION_STATS], axis=0),
+        "efficiency": np.mean([(-1 if key in NEGATIVE_STATS else 1) * _zscore(pct[key] if key in pct else per_game[key])
+                               for key in EFFICIENCY_STATS], axis=0),
+        "minutes": _zscore(per_game["MIN"]),
+    }
+    good = sum(weight * z[name] for name, weight in GOOD_IRONMAN_WEIGHTS.items())
+    # Value: what the good score beats the ADP trend line by; undrafted players cost one pick past the last.
+    value = np.zeros(n)
+    if drafted.sum() >= 2:
+        cost = np.log(np.where(drafted, adp, np.nanmax(adp) + 1))
+        slope, intercept = np.polyfit(cost[drafted], good[drafted], 1)
+        value = good - (slope * cost + intercept)
+    z["value"] = _zscore(value)
+    ironman = sum(weight * z[name] for name, weight in IRONMAN_WEIGHTS.items())
+    if drafted.any():
+        ironman = np.where(drafted, ironman, 0.0)
+
+    ironman_rank, good_rank = _rank_desc(ironman), _rank_desc(good)
+    out: List[Dict[str, Any]] = []
+    for i in np.lexsort((good_rank, ironman_rank)):
+        out.append({
+            "name_full": names[i], "IronMan_Rank": int(ironman_rank[i]), "Good_IronMan_Rank": int(good_rank[i]),
+            "team": teams[i], "pos": player_meta[i].get("pos", ""), "ADP": float(adp[i]) if drafted[i] else "",
+            "Good_IronMan_Score": float(good[i]), "IronMan_Score": float(ironman[i]),
+            **{COMPONENT_COLUMNS[name]: float(z[name][i]) for name in COMPONENTS},
+            "GP": int(latest_gp[i]), "MIN": float(stat["MIN"][i]), "Weighted_GP": float(weighted_gp[i]),
+            "GP_Median": float(gp_median[i]), "Durability_Composite": float(composite[i]),
+            "Durability_Penalty": float(penalty[i]),
+            "Seasons_Used": ",".join(seasons[j] for j in range(s) if counted[i, j]),
+            **{f"{key}_PG": float(per_game[key][i]) for key in ("PTS", "REB", "AST", "STL", "BLK", "FG3M")},
+            "FG3_PCT": float(pct["FG3_PCT"][i]), "FT_PCT": float(pct["FT_PCT"][i]),
+            "TOV_PG": float(per_game["TOV"][i]), "DD2_PG": float(per_game["DD2"][i]), "FG_PCT": float(pct["FG_PCT"][i]),
+        })
+    return out
+
+
+def to_csv(rows: List[Dict[str, Any]]) -> str:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=CSV_COLUMNS, lineterminator="\n")
+    writer.writeheader()
+    writer.writerows(rows)
+    return buffer.getvalue()
+
+
+def build_dataset(totals: List[Dict[str, Any]], seasons: List[str],
+                  meta: Optional[Dict[str, Dict[str, Any]]] = None) -> Tuple[str, int]:
+    """``IronmanStore.refresh`` builder: ``(csv text, player count)``."""
+    rows = compute(totals, seasons, meta)
+    return to_csv(rows), len(rows)
+
+
+# ─────────────────────────── custom re-ranking ────────────────────────────
+class RankMatrix:
+    """``players x columns`` z-score matrix for one dataset, behind ``/api/ironman/rank``.
+
+    Columns are the durability, minutes and value z-scores plus one z-score per
+    production and efficiency category.  Component weights and category punts
+    become a single weight vector (a component's weight is spread over its
+    un-punted categories), so re-ranking every player is one matrix-vector
+    product; filters are boolean masks over per-player arrays built here once.
+    """
+
+    COLUMNS: Tuple[str, ...] = ("durability", "minutes", "value") + PRODUCTION_STATS + EFFICIENCY_STATS
+
+    def __init__(self, rows: List[Dict[str, Any]]):
+        self.rows = rows
+        n = len(rows)
+
+        def column(name: str) -> np.ndarray:
+            return np.array([row.get(name) if row.get(name) is not None else np.nan for row in rows], dtype=float)
+
+        z = {name: np.nan_to_num(column(COMPONENT_COLUMNS[name])) for name in ("durability", "minutes", "value")}
+        for key in PRODUCTION_STATS + EFFICIENCY_STATS:
+            raw = column(CATEGORY_COLUMNS[key])
+            z[key] = (-1 if key in NEGATIVE_STATS else 1) * _zscore(np.nan_to_num(raw))
+        if n and np.isnan(column("FG_PCT")).all():
+            # The original hand-built CSV has no FG% column; EfficiencyZ is the mean of the four, so recover it.
+            z["FG_PCT"] = len(EFFICIENCY_STATS) * np.nan_to_num(column("EfficiencyZ")) - sum(
+                z[key] for key in EFFICIENCY_STATS if key != "FG_PCT")
+        self.matrix = np.column_stack([z[name] for name in self.COLUMNS]) if n else np.zeros((0, len(self.COLUMNS)))
+
+        self.names = [row.get("name_full") or "" for row in rows]
+        self.search_names = [normalize_player_name(name) for name in self.names]
+        self.teams = np.array([row.get("team") or "" for row in rows], dtype=object)
+        positions = sorted({pos for row in rows for pos in (row.get("pos") or "").split(",") if pos})
+        self.position_index = {pos: i for i, pos in enumerate(positions)}
+        self.positions = np.zeros((n, len(positions)), dtype=bool)
+        for i, row in enumerate(rows):
+            for pos in (row.get("pos") or "").split(","):
+                if pos:
+                    self.positions[i, self.position_index[pos]] = True
+        self.gp = np.nan_to_num(column("GP"))
+        self.mpg = np.divide(np.nan_to_num(column("MIN")), self.gp, out=np.zeros(n), where=self.gp > 0)
+        self.adp = column("ADP")
+
+    @classmethod
+    def from_csv(cls, text: str) -> "RankMatrix":
+        rows: List[Dict[str, Any]] = []
+        for raw in csv.DictReader(io.StringIO(text.lstrip("\ufeff"))):
+            row: Dict[str, Any] = {}
+            for key, value in raw.items():
+                if key in ("name_full", "team", "pos", "Seasons_Used"):
+                    row[key] = value or ""
+                    continue
+                try:
+                    row[key] = float(value) if value not in (None, "") else None
+                except ValueError:
+                    row[key] = None
+            for key in ("IronMan_Rank", "Good_IronMan_Rank", "GP"):
+                if row.get(key) is not None:
+                    row[key] = int(row[key])
+            row["MPG"] = row["MIN"] / row["GP"] if row.get("MIN") is not None and row.get("GP") else 0.0
+            rows.append(row)
+        return cls(rows)
+
+    def weight_vector(self, weights: Dict[str, float], punts: Iterable[str] = ()) -> np.ndarray:
+        """Component weights (missing = 0) and punted categories -> one weight per matrix column."""
+        punted = set(punts)
+        vector = np.zeros(len(self.COLUMNS))
+        index = {name: i for i, name in enumerate(self.COLUMNS)}
+        for name in ("durability", "minutes", "value"):
+            vector[index[name]] = weights.get(name, 0.0)
+        for name, stats in (("production", PRODUCTION_STATS), ("efficiency", EFFICIENCY_STATS)):
+            kept = [key for key in stats if key not in punted]
+            for key in kept:
+                vector[index[key]] = weights.get(name, 0.0) / len(kept)
+        return vector
+
+    def scores(self, weights: Dict[str, float], punts: Iterable[str] = ()) -> np.ndarray:
+        return self.matrix @ self.weight_vector(weights, punts)
+
+    def mask(self, *, teams: Iterable[str] = (), positions: Iterable[str] = (), min_gp: Optional[float] = None,
+             min_mpg: Optional[float] = None, max_adp: Optional[float] = None, drafted_only: bool = False,
+             query: str = "", exclude: Iterable[str] = ()) -> np.ndarray:
+        """Players passing every given filter; ``positions`` matches any, ``exclude`` takes player names."""
+        keep = np.ones(len(self.rows), dtype=bool)
+        teams = {team.upper() for team in teams}
+        if teams:
+            keep &= np.isin(self.teams, list(teams))
+        columns = [self.position_index[pos] for pos in positions if pos in self.position_index]
+        if positions:
+            keep &= self.positions[:, columns].any(axis=1) if columns else False
+        if min_gp is not None:
+            keep &= self.gp >= min_gp
+        if min_mpg is not None:
+            keep &= self.mpg >= min_mpg
+        if max_adp is not None:
+            keep &= self.adp <= max_adp  # NaN (undrafted) compares False
+        if drafted_only:
+            keep &= ~np.isnan(self.adp)
+        query = normalize_player_name(query)
+        if query:
+            keep &= np.array([query in name for name in self.search_names], dtype=bool)
+        excluded = {normalize_player_name(name) for name in exclude} - {""}
+        if excluded:
+            keep &= np.array([name not in excluded for name in self.search_names], dtype=bool)
+        return keep
+
+    def order(self, indices: np.ndarray, scores: np.ndarray, sort: str = "score", descending: bool = True) -> np.ndarray:
+        """``indices`` sorted by ``sort`` (``score``, ``name_full`` or any numeric column); blanks always last."""
+        if sort == "name_full":
+            ranked = sorted(indices, key=lambda i: self.search_names[i], reverse=descending)
+            return np.array(ranked, dtype=int)
+        if sort == "score":
+            values = scores[indices]
+        elif sort == "MPG":
+            values = self.mpg[indices]
+        else:
+            values = np.array([self.rows[i].get(sort) if isinstance(self.rows[i].get(sort), (int, float)) else np.nan
+                               for i in indices], dtype=float)
+        keys = -values if descending else values
+        # lexsort: last key is primary; NaN goes last, ties keep dataset order.
+        return indices[np.lexsort((indices, np.nan_to_num(keys, nan=np.inf)))]
+
+    def sortable(self, sort: str) -> bool:
+        return sort in ("score", "name_full", "MPG") or any(isinstance(row.get(sort), (int, float)) for row in self.rows)
+
+    def rank(self, weights: Dict[str, float], punts: Iterable[str] = (), *, sort: str = "score",
+             descending: bool = True, **filters: Any) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """``(scores, overall ranks, filtered player indices in sort order)`` for one weight experiment."""
+        scores = self.scores(weights, punts)
+        return scores, _rank_desc(scores), self.order(np.flatnonzero(self.mask(**filters)), scores, sort, descending)
@@ -0,0 +1,331 @@
+# ironman_store.py
+"""Local store of NBA regular-season game logs and the Ironman datasets built from them.
+
+Every player-game of the seasons in the ranking window is kept, one row per
+game.  A finished season is pulled once (one league-wide ``PlayerGameLogs``
+call, or a saved copy of its JSON response) and marked final; the live season
+is re-pulled from its last stored game date, so a refresh only downloads the
+games played since.  Each rebuild whose output differs from the latest dataset
+is published as a new numbered version; the last ``KEEP_VERSIONS`` are kept.
+"""
+import hashlib, logging, os, sqlite3, threading, time
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from metrics import nba_response_size, track_upstream
+from nba_stats_store import load_fixture, rows_from_result_sets
+
+log = logging.getLogger("fantasy-app.ironman-store")
+
+# Per-game counting stats summed into season totals (MIN is fractional minutes).
+GAME_STATS: Tuple[str, ...] = (
+    "MIN", "PTS", "REB", "AST", "STL", "BLK", "TOV", "FG3M", "FG3A", "FGM", "FGA", "FTM", "FTA", "DD2",
+)
+KEEP_VERSIONS = 10
+RETRY_BACKOFF_SECONDS = 5 * 60  # first wait after a failed background refresh; doubles per failure
+FIXTURE_NAME = "player_game_logs_{season}.json"
+
+# build(season_totals, seasons) -> (csv text, row count); see ironman.build_dataset
+DatasetBuilder = Callable[[List[Dict[str, Any]], List[str]], Tuple[str, int]]
+
+
+def ranking_seasons(season: str, count: int) -> List[str]:
+    """``"2024-25", 3`` -> ``["2024-25", "2023-24", "2022-23"]`` (most recent first)."""
+    start = int(season[:4])
+    return [f"{year}-{(year + 1) % 100:02d}" for year in range(start, start - count, -1)]
+
+
+def _game_date(raw: Any) -> str:
+    # PlayerGameLogs sends "2024-10-22T00:00:00"; keep the date part, which sorts as text.
+    return str(raw or "")[:10]
+
+
+def fetch_game_logs(season: str, date_from: Optional[str] = None) -> Dict[str, Any]:
+    from nba_api.stats.endpoints import playergamelogs
+    params: Dict[str, Any] = {"season_nullable": season, "season_type_nullable": "Regular Season"}
+    if date_from:
+        params["date_from_nullable"] = datetime.strptime(date_from, "%Y-%m-%d").strftime("%m/%d/%Y")
+    with track_upstream("nba_api", "PlayerGameLogs") as call:
+        endpoint = playergamelogs.PlayerGameLogs(**params)
+        call.size = nba_response_size(endpoint)
+    return endpoint.get_dict()
+
+
+class IronmanStore:
+    def __init__(self, path: str):
+        self.path = path
+        self._connect()
+        # Forked workers (gunicorn preload_app) inherit the store; give each its own handle and locks.
+        os.register_at_fork(after_in_child=self._connect)
+        stat_columns = ", ".join(f"{key} REAL NOT NULL DEFAULT 0" for key in GAME_STATS)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS player_games ("
+                " season TEXT NOT NULL, player_id INTEGER NOT NULL, game_id TEXT NOT NULL, game_date TEXT NOT NULL,"
+                f" player_name TEXT, team TEXT, {stat_columns},"
+                " PRIMARY KEY (season, player_id, game_id))"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS season_sync ("
+                " season TEXT PRIMARY KEY, final INTEGER NOT NULL, synced_at REAL NOT NULL,"
+                " last_game_date TEXT, source TEXT)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS refresh_failures ("
+                " season TEXT PRIMARY KEY, failures INTEGER NOT NULL, failed_at REAL NOT NULL, error TEXT)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS datasets ("
+                " version INTEGER PRIMARY KEY, built_at REAL NOT NULL, seasons TEXT NOT NULL,"
+                " games INTEGER NOT NULL, row_count INTEGER NOT NULL, digest TEXT NOT NULL, body TEXT NOT NULL)"
+            )
+
+    def _connect(self) -> None:
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=10)
+
+    # ─────────────── game logs ───────────────
+    def season_state(self, season: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT final, synced_at, last_game_date, source FROM season_sync WHERE season=?", (season,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {"season": season, "final": bool(row[0]), "synced_at": row[1], "last_game_date": row[2], "source": row[3]}
+
+    def ingest(self, season: str, rows: Iterable[Dict[str, Any]], source: str, *, final: bool) -> Dict[str, Any]:
+        """Upsert one season's game rows; returns how many were new or changed."""
+        writes = []
+        for row in rows:
+            try:
+                player_id = int(row["PLAYER_ID"])
+            except (KeyError, TypeError, ValueError):
+                continue
+            game_id, game_date = row.get("GAME_ID"), _game_date(row.get("GAME_DATE"))
+            if not game_id or not game_date:
+                continue
+            writes.append((season, player_id, str(game_id), game_date, row.get("PLAYER_NAME"), row.get("TEAM_ABBREVIATION"),
+                           *(float(row.get(key) or 0.0) for key in GAME_STATS)))
+        columns = ", ".join(GAME_STATS)
+        placeholders = ", ".join("?" * (6 + len(GAME_STATS)))
+        with self._lock, self._conn:
+            before = self._conn.total_changes
+            # Re-pulled games (box score corrections) only count as changes when a value differs.
+            self._conn.executemany(
+                f"INSERT INTO player_games (season, player_id, game_id, game_date, player_name, team, {columns})"
+                f" VALUES ({placeholders}) ON CONFLICT (season, player_id, game_id) DO UPDATE SET"
+                f" game_date=excluded.game_date, player_name=excluded.player_name, team=excluded.team, "
+                + ", ".join(f"{key}=excluded.{key}" for key in GAME_STATS)
+                + " WHERE (" + ", ".join(("game_date", "player_name", "team") + GAME_STATS) + ") IS NOT ("
+                + ", ".join(f"excluded.{key}" for key in ("game_date", "player_name", "team") + GAME_STATS) + ")",
+                writes,
+            )
+            changed = self._conn.total_changes - before
+            last_game_date = self._conn.execute(
+                "SELECT MAX(game_date) FROM player_games WHERE season=?", (season,)
+            ).fetchone()[0]
+            self._conn.execute(
+                "INSERT OR REPLACE INTO season_sync (season, final, synced_at, last_game_date, source) VALUES (?, ?, ?, ?, ?)",
+                (season, int(final), time.time(), last_game_date, source),
+            )
+        result = {"season": season, "source": source, "rows": len(writes), "changed": changed, "final": final}
+        log.info("Ironman game logs synced: %s", result)
+        return result
+
+    def sync(self, seasons: List[str], *, fixture_dir: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Bring every season up to date: finished seasons once, the first (live) one from its last game date."""
+        results = []
+        for i, season in enumerate(seasons):
+            state = self.season_state(season)
+            if state and state["final"]:
+                continue
+            fixture = os.path.join(fixture_dir, FIXTURE_NAME.format(season=season)) if fixture_dir else None
+            if fixture:
+                if not os.path.exists(fixture):
+                    continue
+                source, payload = fixture, load_fixture(fixture)
+            else:
+                date_from = state["last_game_date"] if state else None
+                source, payload = "nba_api:PlayerGameLogs", fetch_game_logs(season, date_from)
+            results.append(self.ingest(season, rows_from_result_sets(payload, "PlayerGameLogs"), source, final=i > 0))
+        return results
+
+    def season_totals(self, seasons: List[str]) -> List[Dict[str, Any]]:
+        """One row per (season, player): games played, summed stats, and name/team as of the latest game.
+
+        ``TEAM_GP`` is how many games that team has played in the season and
+        ``final`` whether the season is finished, so the live season's partial
+        games can be read against its schedule so far.
+        """
+        marks = ", ".join("?" * len(seasons))
+        sums = ", ".join(f"SUM({key})" for key in GAME_STATS)
+        # SQLite fills the bare player_name/team columns from the row holding MAX(game_date).
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT season, player_id, player_name, team, MAX(game_date), COUNT(*), {sums}"
+                f" FROM player_games WHERE season IN ({marks}) GROUP BY season, player_id",
+                seasons,
+            ).fetchall()
+            team_games = {(season, team): count for season, team, count in self._conn.execute(
+                f"SELECT season, team, COUNT(DISTINCT game_id) FROM player_games WHERE season IN ({marks})"
+                " GROUP BY season, team",
+                seasons,
+            )}
+            final = dict(self._conn.execute(
+                f"SELECT season, final FROM season_sync WHERE season IN ({marks})", seasons
+            ).fetchall())
+        keys = ("season", "player_id", "player_name", "team", "last_game_date", "GP") + GAME_STATS
+        out = []
+        for row in rows:
+            total = dict(zip(keys, row))
+            total["TEAM_GP"] = team_games.get((total["season"], total["team"]), total["GP"])
+            total["final"] = bool(final.get(total["season"], True))
+            out.append(total)
+        return out
+
+    def game_count(self, seasons: List[str]) -> int:
+        with self._lock:
+            return self._conn.execute(
+                f"SELECT COUNT(*) FROM player_games WHERE season IN ({', '.join('?' * len(seasons))})", seasons
+            ).fetchone()[0]
+
+    # ─────────────── datasets ───────────────
+    def publish(self, body: str, seasons: List[str], row_count: int) -> Tuple[int, bool]:
+        """Store ``body`` as the next version unless it matches the latest; ``(version, published)``."""
+        digest = hashlib.sha1(body.encode("utf-8")).hexdigest()
+        games = self.game_count(seasons)
+        with self._lock, self._conn:
+            latest = self._conn.execute("SELECT version, digest FROM datasets ORDER BY version DESC LIMIT 1").fetchone()
+            if latest and latest[1] == digest:
+                return latest[0], False
+            version = (latest[0] if latest else 0) + 1
+            self._conn.execute(
+                "INSERT INTO datasets (version, built_at, seasons, games, row_count, digest, body) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (version, time.time(), ",".join(seasons), games, row_count, digest, body),
+            )
+            self._conn.execute("DELETE FROM datasets WHERE version <= ?", (version - KEEP_VERSIONS,))
+        log.info("Ironman dataset v%s published (%s players, %s games)", version, row_count, games)
+        return version, True
+
+    def latest_version(self) -> Optional[int]:
+        with self._lock:
+            row = self._conn.execute("SELECT MAX(version) FROM datasets").fetchone()
+        return row[0]
+
+    def dataset(self, version: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """The given version (the latest when ``None``) with its body, or ``None`` if it is not stored."""
+        query = "SELECT version, built_at, seasons, games, row_count, digest, body FROM datasets"
+        with self._lock:
+            if version is None:
+                row = self._conn.execute(query + " ORDER BY version DESC LIMIT 1").fetchone()
+            else:
+                row = self._conn.execute(query + " WHERE version=?", (version,)).fetchone()
+        if row is None:
+            return None
+        keys = ("version", "built_at", "seasons", "games", "row_count", "digest", "body")
+        return dict(zip(keys, row))
+
+    def versions(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT version, built_at, seasons, games, row_count, digest FROM datasets ORDER BY version DESC"
+            ).fetchall()
+        return [{"version": v, "built_at": b, "seasons": s.split(","), "games": g, "rows": n, "digest": d}
+                for v, b, s, g, n, d in rows]
+
+    # ─────────────── refresh ───────────────
+    def refresh(self, season: str, build: DatasetBuilder, *, window: int = 3,
+                fixture_dir: Optional[str] = None, max_age_seconds: Optional[float] = None) -> Dict[str, Any]:
+        """Sync the ``window`` seasons ending at ``season`` and publish a new dataset if anything changed.
+
+        With ``max_age_seconds``, a live season that another refresh brought up
+        to date while this one waited on the lock is left alone.
+        """
+        with self._refresh_lock:
+            seasons = ranking_seasons(season, window)
+            if max_age_seconds is not None and self.is_fresh(season, max_age_seconds):
+                latest = self.latest_version()
+                return {"seasons": seasons, "synced": [], "version": latest, "published": False, "skipped": True}
+            synced = self.sync(seasons, fixture_dir=fixture_dir)
+            latest = self.dataset()
+            version, published = (latest["version"] if latest else None), False
+            # A build that failed after its sync leaves the stored games ahead of the latest dataset.
+            if (latest is None or latest["seasons"] != ",".join(seasons) or any(s["changed"] for s in synced)
+                    or latest["games"] != self.game_count(seasons)):
+                body, row_count = build(self.season_totals(seasons), seasons)
+                version, published = self.publish(body, seasons, row_count)
+            return {"seasons": seasons, "synced": synced, "version": version, "published": published}
+
+    def is_fresh(self, season: str, max_age_seconds: float) -> bool:
+        state = self.season_state(season)
+        return state is not None and time.time() - state["synced_at"] < max_age_seconds
+
+    def retry_at(self, season: str, max_age_seconds: float) -> Optional[float]:
+        """When a refresh may be tried again after failing: the backoff doubles per failure, up to ``max_age_seconds``."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT failures, failed_at FROM refresh_failures WHERE season=?", (season,)
+            ).fetchone()
+        if row is None:
+            return None
+        return row[1] + min(max_age_seconds, RETRY_BACKOFF_SECONDS * 2 ** (row[0] - 1))
+
+    def _record_failure(self, season: str, error: BaseException) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO refresh_failures (season, failures, failed_at, error) VALUES (?, 1, ?, ?)"
+                " ON CONFLICT (season) DO UPDATE SET failures=failures + 1, failed_at=excluded.failed_at,"
+                " error=excluded.error",
+                (season, time.time(), repr(error)),
+            )
+
+    def _clear_failures(self, season: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM refresh_failures WHERE season=?", (season,))
+
+    def refresh_in_background(self, season: str, max_age_seconds: float, build: DatasetBuilder, *,
+                              window: int = 3, fixture_dir: Optional[str] = None) -> bool:
+        """Kick off a refresh thread when the live season was never synced or is older than ``max_age_seconds``.
+
+        A failed refresh is recorded, and no new attempt starts until its backoff runs out.
+        """
+        if self.is_fresh(season, max_age_seconds) or self._refresh_lock.locked():
+            return False
+        retry_at = self.retry_at(season, max_age_seconds)
+        if retry_at is not None and time.time() < retry_at:
+            return False
+
+        def _run() -> None:
+            try:
+                self.refresh(season, build, window=window, fixture_dir=fixture_dir, max_age_seconds=max_age_seconds)
+            except Exception as e:
+                log.exception("Background Ironman refresh failed for %s", season)
+                self._record_failure(season, e)
+            else:
+                self._clear_failures(season)
+
+        threading.Thread(target=_run, name=f"ironman-refresh-{season}", daemon=True).start()
+        return True
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            seasons = self._conn.execute(
+                "SELECT s.season, s.final, s.synced_at, s.last_game_date, COUNT(g.game_id) FROM season_sync s"
+                " LEFT JOIN player_games g ON g.season = s.season GROUP BY s.season ORDER BY s.season DESC"
+            ).fetchall()
+            failures = self._conn.execute(
+                "SELECT season, failures, failed_at, error FROM refresh_failures ORDER BY season DESC"
+            ).fetchall()
+        return {
+            "seasons": [{"season": s, "final": bool(f), "synced_at": t, "last_game_date": d, "player_games": n}
+                        for s, f, t, d, n in seasons],
+            "refresh_failures": [{"season": s, "failures": n, "failed_at": t, "error": e} for s, n, t, e in failures],
+            "versions": self.versions(),
+        }
+
+
+def build_store_from_env() -> IronmanStore:
+    return IronmanStore(os.getenv("IRONMAN_DB_PATH", "ironman.sqlite3"))
@@ -0,0 +1,100 @@
+# lazy_imports.py
+"""Deferred imports for the heavy dependencies, and an import-time profiler.
+
+``nba_api`` (with pandas), NumPy and Authlib cost most of ``import main``, yet
+most requests never touch them.  ``lazy_import`` returns a stand-in that
+imports the module on first attribute access; ``lazy_object`` does the same
+for an object built by a factory.  ``resolve_all`` loads everything up front
+(gunicorn's pre-fork warm-up, or a background thread).
+"""
+import importlib, re, subprocess, sys, threading, time
+from typing import Any, Callable, Dict, List, Optional
+
+
+class Lazy:
+    """Proxy that builds its target on first attribute access; thread-safe, built once."""
+
+    __slots__ = ("name", "_factory", "_target", "_lock", "load_ms")
+
+    def __init__(self, name: str, factory: Callable[[], Any]):
+        self.name = name
+        self._factory = factory
+        self._target: Any = None
+        self._lock = threading.Lock()
+        self.load_ms: Optional[float] = None
+
+    @property
+    def loaded(self) -> bool:
+        return self.load_ms is not None
+
+    def resolve(self) -> Any:
+        if self.load_ms is None:
+            with self._lock:
+                if self.load_ms is None:
+                    started = time.perf_counter()
+                    self._target = self._factory()
+                    self.load_ms = round((time.perf_counter() - started) * 1000, 1)
+        return self._target
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self.resolve(), attr)
+
+    def __repr__(self) -> str:
+        return f"<Lazy {self.name} ({'loaded' if self.loaded else 'not loaded'})>"
+
+
+_REGISTRY: Dict[str, Lazy] = {}
+
+
+def lazy_object(name: str, factory: Callable[[], Any]) -> Any:
+    proxy = _REGISTRY.get(name)
+    if proxy is None:
+        proxy = _REGISTRY[name] = Lazy(name, factory)
+    return proxy
+
+
+def lazy_import(module_name: str) -> Any:
+    return lazy_object(module_name, lambda: importlib.import_module(module_name))
+
+
+def resolve_all() -> Dict[str, float]:
+    """Load every registered target now; returns name -> load ms (0 for ones already loaded elsewhere)."""
+    for proxy in list(_REGISTRY.values()):
+        proxy.resolve()
+    return status()
+
+
+def status() -> Dict[str, Optional[float]]:
+    """name -> ms its first load took, ``None`` while still deferred."""
+    return {name: proxy.load_ms for name, proxy in _REGISTRY.items()}
+
+
+# ─────────────────────────── import-time profile ────────────────────────────
+_IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def import_time_profile(module: str) -> List[Dict[str, Any]]:
+    """Import ``module`` in a fresh interpreter under ``-X importtime``; one row per module imported.
+
+    Rows carry ``self_ms``, ``cumulative_ms`` (including everything it imported) and ``depth``
+    (0 for ``module`` itself and interpreter start-up modules, 1 for what ``module`` imports directly,
+    and so on), in import-completion order.
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, check=False,
+    )
+    rows = []
+    for line in proc.stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            rows.append({
+                "module": name,
+                "self_ms": int(self_us) / 1000,
+                "cumulative_ms": int(cumulative_us) / 1000,
+                "depth": (len(indent) - 1) // 2,
+            })
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed: {proc.stderr.strip().splitlines()[-1:]}")
+    return rows
@@ -0,0 +1,203 @@
+# league_history.py
+"""Local store of per-week team and player category stats, keyed by league and week.
+
+Completed weeks never change once Yahoo marks them ``postevent``, so they are
+stored once and marked final; the live week is stored too but re-synced on
+every read.  Team rows come from one ``league/{key}/teams;out=matchups``
+call covering every week that still needs syncing; player rows come from
+``team/{key}/players/stats;type=week`` per team and week.
+"""
+import json, logging, os, sqlite3, threading, time
+from typing import Any, Dict, Iterable, List, Set
+
+log = logging.getLogger("fantasy-app.history")
+
+
+class LeagueHistoryStore:
+    def __init__(self, path: str):
+        self.path = path
+        self._connect()
+        # Forked workers (gunicorn preload_app) inherit the store; give each its own handle and lock.
+        os.register_at_fork(after_in_child=self._connect)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS league_weeks ("
+                " league_key TEXT NOT NULL, week INTEGER NOT NULL, final INTEGER NOT NULL, synced_at REAL NOT NULL,"
+                " PRIMARY KEY (league_key, week))"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS team_week_stats ("
+                " league_key TEXT NOT NULL, week INTEGER NOT NULL, team_key TEXT NOT NULL, name TEXT,"
+                " opponent_key TEXT, status TEXT, stats TEXT NOT NULL,"
+                " PRIMARY KEY (league_key, week, team_key))"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS player_weeks ("
+                " league_key TEXT NOT NULL, team_key TEXT NOT NULL, week INTEGER NOT NULL,"
+                " final INTEGER NOT NULL, synced_at REAL NOT NULL,"
+                " PRIMARY KEY (league_key, team_key, week))"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS player_week_stats ("
+                " league_key TEXT NOT NULL, team_key TEXT NOT NULL, week INTEGER NOT NULL,"
+                " player_key TEXT NOT NULL, name TEXT, stats TEXT NOT NULL,"
+                " PRIMARY KEY (league_key, team_key, week, player_key))"
+            )
+
+    def _connect(self) -> None:
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=10)
+
+    # ─────────────── team weeks ───────────────
+    def final_weeks(self, league_key: str) -> Set[int]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT week FROM league_weeks WHERE league_key=? AND final=1", (league_key,)
+            ).fetchall()
+        return {week for (week,) in rows}
+
+    def save_matchups(self, league_key: str, matchups: Iterable[Dict[str, Any]], weeks: Iterable[int]) -> Dict[str, Any]:
+        """Replace ``weeks`` with ``matchups`` (``{week, status, teams: [row, row]}``); a week is final when all its matchups are postevent."""
+        weeks = sorted(set(weeks))
+        by_week: Dict[int, List[Dict[str, Any]]] = {week: [] for week in weeks}
+        for matchup in matchups:
+            if matchup["week"] in by_week:
+                by_week[matchup["week"]].append(matchup)
+        now = time.time()
+        team_rows = []
+        week_rows = []
+        for week, week_matchups in by_week.items():
+            if not week_matchups:
+                continue  # nothing reported for the week yet; try again next sync
+            final = all(m.get("status") == "postevent" for m in week_matchups)
+            week_rows.append((league_key, week, int(final), now))
+            for m in week_matchups:
+                a, b = m["teams"]
+                for row, opponent in ((a, b), (b, a)):
+                    team_rows.append((league_key, week, row["team_key"], row.get("name"), opponent["team_key"],
+                                      m.get("status"), json.dumps(row["stats"], separators=(",", ":"))))
+        synced = [row[1] for row in week_rows]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "DELETE FROM team_week_stats WHERE league_key=? AND week=?", [(league_key, week) for week in synced]
+            )
+            self._conn.executemany(
+                "INSERT INTO team_week_stats (league_key, week, team_key, name, opponent_key, status, stats)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                team_rows,
+            )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO league_weeks (league_key, week, final, synced_at) VALUES (?, ?, ?, ?)", week_rows
+            )
+        result = {
+            "league_key": league_key,
+            "synced": synced,
+            "final": [row[1] for row in week_rows if row[2]],
+            "empty": [week for week in weeks if week not in synced],
+        }
+        log.debug("League history synced: %s", result)
+        return result
+
+    def team_weeks(self, league_key: str, weeks: Iterable[int]) -> Dict[int, List[Dict[str, Any]]]:
+        """week -> ``[{team_key, name, opponent_key, status, stats}]`` for the stored weeks among ``weeks``."""
+        wanted = sorted(set(weeks))
+        if not wanted:
+            return {}
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT week, team_key, name, opponent_key, status, stats FROM team_week_stats"
+                f" WHERE league_key=? AND week IN ({','.join('?' * len(wanted))}) ORDER BY week, rowid",
+                (league_key, *wanted),
+            ).fetchall()
+        result: Dict[int, List[Dict[str, Any]]] = {}
+        for week, team_key, name, opponent_key, status, stats in rows:
+            result.setdefault(week, []).append({
+                "team_key": team_key, "name": name, "opponent_key": opponent_key,
+                "status": status, "stats": json.loads(stats),
+            })
+        return result
+
+    def matchups(self, league_key: str, weeks: Iterable[int]) -> List[Dict[str, Any]]:
+        """Stored weeks as ``{week, status, teams: [row, row]}``, one entry per matchup."""
+        matchups: List[Dict[str, Any]] = []
+        for week, rows in sorted(self.team_weeks(league_key, weeks).items()):
+            by_key = {row["team_key"]: row for row in rows}
+            seen: Set[str] = set()
+            for row in rows:
+                opponent = by_key.get(row["opponent_key"])
+                if opponent is None or row["team_key"] in seen:
+                    continue
+                seen.update((row["team_key"], opponent["team_key"]))
+                matchups.append({"week": week, "status": row["status"], "teams": [row, opponent]})
+        return matchups
+
+    # ─────────────── player weeks ───────────────
+    def final_player_weeks(self, league_key: str, team_key: str) -> Set[int]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT week FROM player_weeks WHERE league_key=? AND team_key=? AND final=1", (league_key, team_key)
+            ).fetchall()
+        return {week for (week,) in rows}
+
+    def save_player_week(self, league_key: str, team_key: str, week: int,
+                         players: Iterable[Dict[str, Any]], final: bool) -> None:
+        """Replace one team-week of ``contributions.extract_players`` rows."""
+        rows = [
+            (league_key, team_key, week, str(p["player_key"]), p.get("name"), json.dumps(p["stats"], separators=(",", ":")))
+            for p in players
+        ]
+        with self._lock, self._conn:
+            self._conn.execute(
+                "DELETE FROM player_week_stats WHERE league_key=? AND team_key=? AND week=?", (league_key, team_key, week)
+            )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO player_week_stats (league_key, team_key, week, player_key, name, stats)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO player_weeks (league_key, team_key, week, final, synced_at) VALUES (?, ?, ?, ?, ?)",
+                (league_key, team_key, week, int(final), time.time()),
+            )
+
+    def player_weeks(self, league_key: str, team_key: str, weeks: Iterable[int]) -> Dict[int, List[Dict[str, Any]]]:
+        """week -> ``[{player_key, name, stats}]`` for the stored team-weeks among ``weeks``."""
+        wanted = sorted(set(weeks))
+        if not wanted:
+            return {}
+        placeholders = ",".join("?" * len(wanted))
+        with self._lock:
+            stored = self._conn.execute(
+                f"SELECT week FROM player_weeks WHERE league_key=? AND team_key=? AND week IN ({placeholders})",
+                (league_key, team_key, *wanted),
+            ).fetchall()
+            rows = self._conn.execute(
+                "SELECT week, player_key, name, stats FROM player_week_stats"
+                f" WHERE league_key=? AND team_key=? AND week IN ({placeholders}) ORDER BY week, rowid",
+                (league_key, team_key, *wanted),
+            ).fetchall()
+        result: Dict[int, List[Dict[str, Any]]] = {week: [] for (week,) in stored}  # a stored week may be empty
+        for week, player_key, name, stats in rows:
+            result[week].append({"player_key": player_key, "name": name, "stats": json.loads(stats)})
+        return result
+
+    def status(self, league_key: str) -> Dict[str, Any]:
+        with self._lock:
+            weeks = self._conn.execute(
+                "SELECT week, final FROM league_weeks WHERE league_key=? ORDER BY week", (league_key,)
+            ).fetchall()
+            player_weeks = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(final), 0) FROM player_weeks WHERE league_key=?", (league_key,)
+            ).fetchone()
+        return {
+            "league_key": league_key,
+            "final_weeks": [week for week, final in weeks if final],
+            "live_weeks": [week for week, final in weeks if not final],
+            "player_team_weeks": player_weeks[0],
+            "final_player_team_weeks": player_weeks[1],
+        }
+
+
+def build_store_from_env() -> LeagueHistoryStore:
+    return LeagueHistoryStore(os.getenv("LEAGUE_HISTORY_DB_PATH", "league_history.sqlite3"))
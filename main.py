@@ -1,19 +1,44 @@
 # main.py
-import os, json, logging, time, re
-from nba_api.stats.static import players as nba_static_players
-from nba_api.stats.endpoints import playerindex, PlayerDashboardByGeneralSplits
+import os, hashlib, json, logging, math, multiprocessing, time, threading
+_IMPORT_STARTED = time.perf_counter()
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timezone
 import traceback # For detailed error logging
 
-from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
 
 import requests
-from authlib.integrations.flask_client import OAuth
 from flask import (
     Flask, redirect, render_template, request,
-    session, url_for, jsonify
+    session, url_for, jsonify, g, Response
 )
 
+import click
+import lazy_imports
+import metrics
+from lazy_imports import lazy_import, lazy_object
+from metrics import nba_response_size, span, track_upstream, yahoo_endpoint
+from league_history import build_store_from_env as build_league_history_store
+from ironman_store import build_store_from_env as build_ironman_store
+from nba_stats_store import build_store_from_env as build_nba_stats_store, normalize_stat_row
+from player_names import PlayerNameResolver, PlayerSearchIndex
+from prefork import Warmup, process_memory
+from responses import CachedPayload, cached_payload_response, json_response, pretty_json_page
+from yahoo_cache import MemoryBackend, SingleFlight, build_cache_from_env, shared_backend_from_env
+from yahoo_client import (
+    FanOut, Prefetcher, SharedRateBucket, YahooLoginRequired, YahooScheduler, YahooThrottled, build_http_session,
+)
+from yahoo_decode import Team, decode_league, decode_user_leagues, query_one
+
+# Heavy modules load on first use (nba_api pulls in pandas; the analytics modules pull in NumPy).
+nba_static_players = lazy_import("nba_api.stats.static.players")
+nba_playerindex = lazy_import("nba_api.stats.endpoints.playerindex")
+nba_player_dashboard = lazy_import("nba_api.stats.endpoints.playerdashboardbygeneralsplits")
+contributions = lazy_import("contributions")
+ironman = lazy_import("ironman")
+playoff_odds = lazy_import("playoff_odds")
+trade_engine = lazy_import("trade_engine")
+
 # ─────────────────────────── ENV & logging ────────────────────────────
 if os.getenv("FLASK_ENV", "development") == "development":
     try:
@@ -27,90 +52,41 @@ logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(level
 log = logging.getLogger("fantasy-app")
 
 # ─────────────────────────── NBA player cache ─────────────────────────────
-_NBA_PLAYER_NAME_INDEX: Dict[str, List[Dict[str, Any]]] = {}
-_NBA_PLAYER_NAME_CACHE: Dict[str, Optional[int]] = {}
-_NBA_NAME_NORMALIZER = re.compile(r"[^a-z0-9]+")
-_NBA_SUFFIXES: Tuple[str, ...] = (" jr", " sr", " ii", " iii", " iv", " v")
-
-
-def _normalize_player_name(value: str) -> str:
-    if not value:
-        return ""
-    normalized = _NBA_NAME_NORMALIZER.sub(" ", value.lower()).strip()
-    if not normalized:
-        return ""
-    for suffix in _NBA_SUFFIXES:
-        if normalized.endswith(suffix):
-            normalized = normalized[: -len(suffix)].strip()
-    return normalized
-
+# Name -> NBA id resolution; the resolver is built once, and cache misses are resolved as one batch.
+NBA_NAME_CACHE_SIZE = 4096
+_NBA_NAME_RESOLVER: Optional[PlayerNameResolver] = None
+_NBA_NAME_RESOLVER_LOCK = threading.Lock()
 
-def _candidate_normalized_keys(normalized: str) -> List[str]:
-    if not normalized:
-        return []
-    parts = normalized.split()
-    candidates = [normalized]
-    if len(parts) > 2:
-        candidates.append(f"{parts[0]} {parts[-1]}")
-    squashed = normalized.replace(" ", "")
-    if squashed and squashed != normalized:
-        candidates.append(squashed)
-    return candidates
-
-
-def _ensure_nba_player_index() -> None:
-    if _NBA_PLAYER_NAME_INDEX:
-        return
-    for player in nba_static_players.get_players():
-        key = _normalize_player_name(player.get('full_name', ''))
-        if not key:
-            continue
-        _NBA_PLAYER_NAME_INDEX.setdefault(key, []).append(player)
 
+def _nba_name_resolver() -> PlayerNameResolver:
+    global _NBA_NAME_RESOLVER
+    if _NBA_NAME_RESOLVER is None:
+        with _NBA_NAME_RESOLVER_LOCK:
+            if _NBA_NAME_RESOLVER is None:
+                _NBA_NAME_RESOLVER = PlayerNameResolver(nba_static_players.get_players())
+    return _NBA_NAME_RESOLVER
 
-def _lookup_nba_player_id(full_name: str) -> Optional[int]:
-    normalized = _normalize_player_name(full_name)
-    if not normalized:
-        return None
-    if normalized in _NBA_PLAYER_NAME_CACHE:
-        return _NBA_PLAYER_NAME_CACHE[normalized]
 
-    _ensure_nba_player_index()
+_NBA_PLAYER_IDS = MemoryBackend(max_entries=NBA_NAME_CACHE_SIZE)  # Yahoo name -> NBA id (None: no match)
 
-    def _match_from_index(key: str) -> Optional[int]:
-        players = _NBA_PLAYER_NAME_INDEX.get(key)
-        if not players:
-            return None
-        for player in players:
-            try:
-                return int(player['id'])
-            except (KeyError, TypeError, ValueError):
-                continue
-        return None
 
-    nba_id = _match_from_index(normalized)
-
-    if nba_id is None:
-        for key in _candidate_normalized_keys(normalized):
-            nba_id = _match_from_index(key)
-            if nba_id is not None:
-                break
-
-    if nba_id is None:
-        matches = nba_static_players.find_players_by_full_name(full_name)
-        for match in matches:
-            key = _normalize_player_name(match.get('full_name', ''))
-            if not key:
-                continue
-            _NBA_PLAYER_NAME_INDEX.setdefault(key, []).append(match)
-            if nba_id is None:
-                try:
-                    nba_id = int(match['id'])
-                except (KeyError, TypeError, ValueError):
-                    nba_id = None
-
-    _NBA_PLAYER_NAME_CACHE[normalized] = nba_id
-    return nba_id
+def _resolve_nba_player_ids(names: Iterable[str]) -> Dict[str, Optional[int]]:
+    """NBA ids for Yahoo player names; names not cached yet go to the resolver in one ``resolve_many`` batch."""
+    ids: Dict[str, Optional[int]] = {}
+    misses: List[str] = []
+    for name in dict.fromkeys(names):
+        entry = _NBA_PLAYER_IDS.get(("", "", name))
+        if entry is None:
+            misses.append(name)
+        else:
+            ids[name] = entry[1]
+    if misses:
+        for name, (nba_id, score) in _nba_name_resolver().resolve_many(misses).items():
+            if nba_id is not None and score < 1.0:
+                log.info("Matched %r to NBA id %s by name similarity %.2f", name, nba_id, score)
+            _NBA_PLAYER_IDS.set(("", "", name), nba_id, None)
+            ids[name] = nba_id
+    return ids
 
 # ─────────────────────────── Flask app ────────────────────────────────
 app = Flask(__name__)
@@ -122,51 +98,36 @@ app.config.update( # Matches original
 )
 
 # ─────────────────────────── Yahoo OAuth2 ─────────────────────────────
-oauth = OAuth(app) # Matches original
-yahoo = oauth.register( # Matches original
-    name="yahoo",
-    client_id=os.environ["YAHOO_CLIENT_ID"],
-    client_secret=os.environ["YAHOO_CLIENT_SECRET"],
-    authorize_url="https://api.login.yahoo.com/oauth2/request_auth",
-    access_token_url="https://api.login.yahoo.com/oauth2/get_token",
-    refresh_token_url="https://api.login.yahoo.com/oauth2/get_token",
-    api_base_url="https://fantasysports.yahooapis.com/",
-    client_kwargs={
-        "scope": "fspt-r",
-        "token_endpoint_auth_method": "client_secret_basic",
-    },
-)
-
-# ─────────────────────────── helper utils (original from prompt) ─────────────────────────────
-def _safe_iter(container: Any, key: str) -> Iterator[Any]:
-    if not container: return
-    iterable: Iterable[Any] = container.values() if isinstance(container, dict) else container
-    for itm in iterable:
-        if isinstance(itm, dict) and key in itm:
-            yield itm[key]
-
-def _first(container: Any, key: str) -> Any:
-    for blk in _safe_iter(container, key): return blk
-    return None
-
-def _is_owner(managers_blob: Any, guid: str) -> bool:
-    for m in _safe_iter(managers_blob, "manager"):
-        if _first(m, "guid") == guid or str(_first(m, "is_current_login")) == "1":
-            return True
-    return False
+# Credentials are still required at startup; Authlib itself is only imported by the OAuth routes.
+YAHOO_CLIENT_ID = os.environ["YAHOO_CLIENT_ID"]
+YAHOO_CLIENT_SECRET = os.environ["YAHOO_CLIENT_SECRET"]
+
+
+def _register_yahoo():
+    from authlib.integrations.flask_client import OAuth
+    oauth = OAuth(app) # Matches original
+    return oauth.register( # Matches original
+        name="yahoo",
+        client_id=YAHOO_CLIENT_ID,
+        client_secret=YAHOO_CLIENT_SECRET,
+        authorize_url="https://api.login.yahoo.com/oauth2/request_auth",
+        access_token_url="https://api.login.yahoo.com/oauth2/get_token",
+        refresh_token_url="https://api.login.yahoo.com/oauth2/get_token",
+        api_base_url="https://fantasysports.yahooapis.com/",
+        client_kwargs={
+            "scope": "fspt-r",
+            "token_endpoint_auth_method": "client_secret_basic",
+        },
+    )
 
 
+yahoo = lazy_object("authlib:yahoo", _register_yahoo)
 
+# ─────────────────────────── helper utils (original from prompt) ─────────────────────────────
+# Yahoo payloads are decoded by yahoo_decode (typed records in one pass); these cover the odd metadata lookup.
 def _league_section(payload: Dict[str, Any], section: str):
     # Extract a named subsection from the Yahoo league payload
-    league = payload.get("fantasy_content", {}).get("league")
-    if isinstance(league, list):
-        for piece in league:
-            if isinstance(piece, dict) and section in piece:
-                return piece[section]
-    elif isinstance(league, dict):
-        return league.get(section)
-    return None
+    return query_one(payload, f"fantasy_content/league/{section}")
 
 
 def _league_meta_value(payload: Dict[str, Any], field: str):
@@ -257,135 +218,463 @@ def _extract_scoring_type(settings_payload: Optional[Dict[str, Any]]) -> Optiona
 
 
 def _parse_teams_meta(teams_payload: Dict[str, Any]) -> List[Dict[str, Any]]:
-    teams_section = _league_section(teams_payload, "teams")
     results: List[Dict[str, Any]] = []
-    if not isinstance(teams_section, dict):
-        return results
-    for key, entry in teams_section.items():
-        if key == "count":
-            continue
-        team_wrapper = entry.get("team") if isinstance(entry, dict) else None
-        if not team_wrapper:
-            continue
-        team_core = None
-        if isinstance(team_wrapper, list):
-            for block in team_wrapper:
-                if isinstance(block, list):
-                    team_core = block
-                    break
-            if team_core is None and team_wrapper and isinstance(team_wrapper[0], list):
-                team_core = team_wrapper[0]
-        if not isinstance(team_core, list):
+    for team in decode_league(teams_payload).teams:
+        if not team.team_key:
             continue
-        team_key = _first(team_core, "team_key")
-        team_name = _first(team_core, "name")
-        manager_name = None
-        manager_guid = None
-        is_current_login = False
-        for attr in team_core:
-            if not isinstance(attr, dict) or "managers" not in attr:
-                continue
-            for manager in _safe_iter(attr["managers"], "manager"):
-                if not isinstance(manager, dict):
-                    continue
-                manager_name = manager_name or _first(manager, "nickname") or _first(manager, "guid") or manager.get("manager_id")
-                manager_guid = manager_guid or _first(manager, "guid") or manager.get("manager_id")
-                if str(_first(manager, "is_current_login")) == "1":
-                    is_current_login = True
-                if manager_name and manager_guid and is_current_login:
-                    # All desired attributes captured for this manager
-                    break
-            if manager_name and manager_guid and is_current_login:
-                break
-        if team_key:
-            team_id = ""
-            if isinstance(team_key, str) and ".t." in team_key:
-                _, _, team_id = team_key.partition(".t.")
-            results.append({
-                "team_key": team_key,
-                "team_name": team_name or "(Team)",
-                "team_id": team_id,
-                "manager_name": manager_name or "",
-                "manager_guid": manager_guid or "",
-                "is_current_login": is_current_login,
-            })
+        manager_name, manager_guid = "", ""
+        for manager in team.managers:
+            manager_name = manager_name or manager.nickname or manager.guid or manager.manager_id or ""
+            manager_guid = manager_guid or manager.guid or manager.manager_id or ""
+        results.append({
+            "team_key": team.team_key,
+            "team_name": team.name or "(Team)",
+            "team_id": team.team_key.partition(".t.")[2] if isinstance(team.team_key, str) else "",
+            "manager_name": manager_name,
+            "manager_guid": manager_guid,
+            "is_current_login": team.manager_logged_in,
+            "logo_url": team.logo_url,
+        })
     results.sort(key=lambda item: (item["team_name"] or "").lower())
     return results
 
 
 def _parse_keeper_players(keepers_payload: Dict[str, Any]) -> List[Dict[str, Any]]:
-    players_section = _league_section(keepers_payload, "players")
-    keepers: List[Dict[str, Any]] = []
-    if not isinstance(players_section, dict):
-        return keepers
-    for key, entry in players_section.items():
-        if key == "count":
-            continue
-        player_sections = entry.get("player") if isinstance(entry, dict) else None
-        if not player_sections:
-            continue
-        player_core = None
-        ownership_blob = None
-        if isinstance(player_sections, list):
-            for section in player_sections:
-                if isinstance(section, list) and player_core is None:
-                    player_core = section
-                elif isinstance(section, dict) and "ownership" in section and ownership_blob is None:
-                    ownership_blob = section["ownership"]
-            if player_core is None and player_sections:
-                first_section = player_sections[0]
-                if isinstance(first_section, list):
-                    player_core = first_section
-        if not isinstance(player_core, list):
+    keepers: List[Dict[str, Any]] = [{
+        "player_key": player.player_key,
+        "player_id": player.player_id,
+        "name_full": player.name_full,
+        "display_position": player.display_position,
+        "owner_team_key": player.owner_team_key,
+        "badge": "Keeper",
+        "nba_id": None,
+        "is_keeper": True,
+    } for player in decode_league(keepers_payload).players]
+    nba_ids = _resolve_nba_player_ids(keeper["name_full"] for keeper in keepers)
+    for keeper in keepers:
+        keeper["nba_id"] = nba_ids.get(keeper["name_full"])
+    return keepers
+
+def _parse_week_range(raw: Optional[str], last_week: int) -> List[int]:
+    # Accepts "3", "1-5" or "1,2,7"; defaults to 1..last_week when empty. Weeks are clamped to 1..last_week,
+    # so "1-1000000" is the season so far rather than a million-week Yahoo path.
+    if not raw:
+        return list(range(1, last_week + 1))
+    weeks: Set[int] = set()
+    for part in raw.split(","):
+        part = part.strip()
+        if not part:
             continue
-        if ownership_blob is None:
-            for attr in player_core:
-                if isinstance(attr, dict) and "ownership" in attr:
-                    ownership_blob = attr["ownership"]
-                    break
-        owner_team_key = ownership_blob.get("owner_team_key") if isinstance(ownership_blob, dict) else None
-        name_block = _first(player_core, "name")
-        name_full = ""
-        if isinstance(name_block, dict):
-            name_full = name_block.get("full") or " ".join(filter(None, [name_block.get("first"), name_block.get("last")]))
-        display_position = _first(player_core, "display_position")
-        nba_player_id = _lookup_nba_player_id(name_full)
-        keepers.append({
-            "player_key": _first(player_core, "player_key"),
-            "player_id": _first(player_core, "player_id"),
-            "name_full": name_full or "",
-            "display_position": display_position or "",
-            "owner_team_key": owner_team_key,
-            "badge": "Keeper",
-            "nba_id": nba_player_id,
-            "is_keeper": True,
+        start, sep, end = part.partition("-")
+        if sep:
+            lo, hi = int(start), int(end)
+            if lo > hi:
+                lo, hi = hi, lo
+            weeks.update(range(max(lo, 1), min(hi, last_week) + 1))
+        elif 1 <= int(part) <= last_week:
+            weeks.add(int(part))
+    return sorted(weeks)
+
+
+def _stat_value_or_none(raw: Any) -> Optional[float]:
+    if raw is None or raw == "" or raw == "-":
+        return None
+    try:
+        return float(raw)
+    except (TypeError, ValueError):
+        return None
+
+
+def _settings_section(settings_payload: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    settings_section = _league_section(settings_payload or {}, "settings")
+    if isinstance(settings_section, list):
+        settings_section = settings_section[0] if settings_section else None
+    return settings_section if isinstance(settings_section, dict) else None
+
+
+def _enabled_stat_ids(settings_payload: Optional[Dict[str, Any]]) -> List[str]:
+    # Enabled scoring categories from league settings, in Yahoo's display order.
+    return [stat.stat_id for stat in decode_league(settings_payload or {}).stat_categories
+            if stat.enabled and not stat.display_only]
+
+
+def _team_stat_row(team: Team) -> Dict[str, Any]:
+    # A decoded team with stats -> {team_key, name, is_mine, stats: {stat_id: raw value}}.
+    return {"team_key": team.team_key, "name": team.name or "(Team)", "is_mine": team.is_mine, "stats": team.stats}
+
+
+def _season_team_rows(season_payload: Dict[str, Any]) -> List[Dict[str, Any]]:
+    # `league/{key}/teams;out=stats;type=season` -> one _team_stat_row per team.
+    return [_team_stat_row(team) for team in decode_league(season_payload).teams]
+
+
+def _category_directions(settings_payload: Optional[Dict[str, Any]]) -> List[Tuple[str, bool]]:
+    # Enabled scoring categories as (stat_id, higher_is_better); Yahoo's sort_order "0" means lower wins (TO).
+    return [(stat.stat_id, stat.higher_is_better) for stat in decode_league(settings_payload or {}).stat_categories
+            if stat.enabled and not stat.display_only]
+
+
+def _parse_league_matchups(matchups_payload: Dict[str, Any]) -> List[Dict[str, Any]]:
+    # `league/{key}/teams;out=matchups;weeks=...` lists every matchup once per side; keep one copy each.
+    seen: Set[Tuple[int, Tuple[str, ...]]] = set()
+    matchups: List[Dict[str, Any]] = []
+    for team in decode_league(matchups_payload).teams:
+        for matchup in team.matchups:
+            team_keys = matchup.team_keys
+            if matchup.week is None or len(team_keys) != 2 or not all(team_keys):
+                continue
+            key = (matchup.week, tuple(sorted(team_keys)))
+            if key in seen:
+                continue  # the other side's copy; its teams are never decoded
+            seen.add(key)
+            matchups.append({"week": matchup.week, "status": matchup.status,
+                             "teams": [_team_stat_row(t) for t in matchup.teams]})
+    return matchups
+
+
+def _parse_user_leagues(raw: Dict[str, Any]) -> List[Dict[str, str]]:
+    # `users;use_login=1/games;game_codes=nba/leagues;out=teams` -> head-to-head leagues with the user's team name, newest first.
+    leagues: List[Dict[str, str]] = []
+    for guid, league in decode_user_leagues(raw):
+        if league.scoring_type != "head": continue
+        owner, fallback = None, None
+        for team in league.iter_teams():
+            fallback = fallback or team.name
+            if any(m.guid == guid or m.is_current_login for m in team.managers):
+                owner = team
+                break
+        leagues.append({
+            "season": str(league.season) if league.season else "N/A",
+            "league_key": str(league.league_key) if league.league_key else "N/A",
+            "team_name": (owner.name if owner else None) or fallback or "(team?)",
         })
-    return keepers
+    leagues.sort(key=lambda x: (-int(x["season"]) if x["season"].isdigit() else 0, x["team_name"]))
+    return leagues
+
+
+def _parse_league_rosters(rosters_payload: Dict[str, Any]) -> Dict[str, List[Dict[str, Any]]]:
+    # `league/{key}/teams/roster` -> {team_key: [{player_key, name_full, display_position, nba_id}]}
+    rosters: Dict[str, List[Dict[str, Any]]] = {
+        team.team_key: [{
+            "player_key": player.player_key,
+            "name_full": player.name_full,
+            "display_position": player.display_position,
+            "nba_id": None,
+        } for player in team.players]
+        for team in decode_league(rosters_payload).teams if team.team_key
+    }
+    nba_ids = _resolve_nba_player_ids(p["name_full"] for players in rosters.values() for p in players)
+    for players in rosters.values():
+        for player in players:
+            player["nba_id"] = nba_ids.get(player["name_full"])
+    return rosters
+
+
+# Concurrent 401s for one user refresh once: refreshes are serialized per user (striped locks) and the newest
+# token is shared so requests still holding the old one adopt it instead of refreshing again.
+_TOKEN_REFRESH_LOCKS = tuple(threading.Lock() for _ in range(64))
+_LATEST_TOKENS = MemoryBackend(max_entries=4096)
+
+
+def _latest_token(viewer: str) -> Optional[Dict[str, Any]]:
+    entry = _LATEST_TOKENS.get(("", viewer, "token")) if viewer else None
+    if entry is None or (entry[0] is not None and entry[0] <= time.time()):
+        return None
+    return entry[1]
+
+
+def _current_token() -> Dict[str, Any]:
+    # The session's token, or a newer one another request for the same user already refreshed.
+    token = session["token"]
+    latest = _latest_token(_viewer_id(token))
+    if latest is not None and latest.get("access_token") != token.get("access_token") \
+            and float(latest.get("expires_at") or 0) >= float(token.get("expires_at") or 0):
+        session["token"] = latest
+        return latest
+    return token
 
-def _refresh_token() -> Dict[str, Any]: # Matches original
+
+def _refresh_token(failed_access_token: Optional[str] = None) -> Dict[str, Any]: # Matches original, plus the per-user lock
     old = session.get("token", {})
-    r = yahoo.refresh_token(yahoo.refresh_token_url, refresh_token=old.get("refresh_token"))
-    session["token"] = r
+    viewer = _viewer_id(old)
+    with _TOKEN_REFRESH_LOCKS[hash(viewer) % len(_TOKEN_REFRESH_LOCKS)]:
+        latest = _latest_token(viewer)
+        if latest is not None and failed_access_token and latest.get("access_token") != failed_access_token:
+            session["token"] = latest  # refreshed by another request while we waited for the lock
+            return latest
+        with track_upstream("yahoo_oauth", "refresh_token"):
+            r = yahoo.refresh_token(yahoo.refresh_token_url, refresh_token=old.get("refresh_token"))
+        if old.get("xoauth_yahoo_guid") and not r.get("xoauth_yahoo_guid"):
+            r["xoauth_yahoo_guid"] = old["xoauth_yahoo_guid"]  # keeps viewer-scoped cache keys stable
+        # Other requests for this user may adopt it until it expires.
+        expires_at = float(r.get("expires_at") or time.time() + 3600)
+        _LATEST_TOKENS.set(("", viewer, "token"), r, expires_at)
+        session["token"] = r
     log.info("🔑  Yahoo token refreshed at %s", time.strftime("%H:%M:%S"))
     return r
 
-def yahoo_api(rel_path: str, *, _retry: bool = True) -> Dict[str, Any]: # Matches original
-    token = session["token"]
-    resp = requests.get(
-        f"https://fantasysports.yahooapis.com/{rel_path}",
-        headers={"Authorization": f"Bearer {token['access_token']}", "Accept": "application/json"},
-        params={"format": "json"},
-        timeout=20,
+# Shared Yahoo response cache (see yahoo_cache.py); backend picked via YAHOO_CACHE_BACKEND.
+yahoo_cache = build_cache_from_env()
+# Upper bound on concurrent Yahoo calls a single request may fan out to, and the overall deadline for them.
+YAHOO_FANOUT_WORKERS = max(1, int(os.getenv("YAHOO_FANOUT_WORKERS", "6") or 6))
+YAHOO_FANOUT_TIMEOUT = float(os.getenv("YAHOO_FANOUT_TIMEOUT", "30") or 30)
+# Per-call (connect, read) timeouts; every call shares one keep-alive connection pool.
+YAHOO_CONNECT_TIMEOUT = float(os.getenv("YAHOO_CONNECT_TIMEOUT", "5") or 5)
+YAHOO_READ_TIMEOUT = float(os.getenv("YAHOO_READ_TIMEOUT", "20") or 20)
+_yahoo_http = build_http_session(pool_size=int(os.getenv("YAHOO_HTTP_POOL_SIZE", "20") or 20))
+# Offline development: UPSTREAM_REPLAY=record saves every Yahoo / NBA Stats response under UPSTREAM_FIXTURES_DIR,
+# UPSTREAM_REPLAY=replay serves them from there instead of the network (see upstream_replay.py).
+UPSTREAM_REPLAY = os.getenv("UPSTREAM_REPLAY", "").strip().lower()
+if UPSTREAM_REPLAY:
+    import upstream_replay
+    upstream_replay.install(
+        _yahoo_http, upstream_replay.FixtureStore(os.getenv("UPSTREAM_FIXTURES_DIR", "fixtures/upstream")),
+        mode=UPSTREAM_REPLAY, latency_ms=float(os.getenv("UPSTREAM_REPLAY_LATENCY_MS", "0") or 0),
     )
+# Every Yahoo call goes through one token bucket; interactive calls are served before prefetch/batch. With the sqlite
+# cache backend (gunicorn's default) the bucket and 429/999 pauses live in the cache file, so YAHOO_RATE_PER_SECOND is
+# the whole app's rate across workers; with the memory backend each process has its own bucket.
+yahoo_scheduler = YahooScheduler(
+    rate_per_second=float(os.getenv("YAHOO_RATE_PER_SECOND", "8") or 8),
+    burst=int(os.getenv("YAHOO_RATE_BURST", "16") or 16),
+    max_retries=int(os.getenv("YAHOO_MAX_RETRIES", "4") or 4),
+    shared=SharedRateBucket(os.getenv("YAHOO_CACHE_PATH", "yahoo_cache.sqlite3"))
+    if os.getenv("YAHOO_CACHE_BACKEND", "memory").strip().lower() == "sqlite" else None,
+)
+
+
+def _viewer_id(token: Optional[Dict[str, Any]]) -> str:
+    # Yahoo returns the user's GUID alongside the OAuth token; used to scope login-flagged payloads.
+    # Without one, a one-way hash of the refresh token stands in: the secret itself never becomes a cache key.
+    if not token:
+        return ""
+    if token.get("xoauth_yahoo_guid"):
+        return str(token["xoauth_yahoo_guid"])
+    if token.get("refresh_token"):
+        return "rt:" + hashlib.sha256(str(token["refresh_token"]).encode("utf-8")).hexdigest()
+    return ""
+
+
+def _yahoo_fetch(rel_path: str, *, _retry: bool = True) -> Dict[str, Any]: # Matches original yahoo_api
+    token = _current_token()
+    endpoint = yahoo_endpoint(rel_path)
+
+    def _send() -> requests.Response:  # one attempt; the scheduler may call it again on 429/999/5xx
+        with track_upstream("yahoo", endpoint) as call:
+            resp = _yahoo_http.get(
+                f"https://fantasysports.yahooapis.com/{rel_path}",
+                headers={"Authorization": f"Bearer {token['access_token']}", "Accept": "application/json"},
+                params={"format": "json"},
+                timeout=(YAHOO_CONNECT_TIMEOUT, YAHOO_READ_TIMEOUT),
+            )
+            call.status, call.size = resp.status_code, len(resp.content)
+        return resp
+
+    resp = yahoo_scheduler.execute(_send)
     if resp.status_code == 401 and _retry:
-        _refresh_token()
-        return yahoo_api(rel_path, _retry=False)
+        _refresh_token(failed_access_token=token.get("access_token"))
+        return _yahoo_fetch(rel_path, _retry=False)
+    if resp.status_code == 999:  # outside 4xx/5xx, so raise_for_status would let it through
+        raise requests.exceptions.HTTPError("999 Request denied (Yahoo rate limit)", response=resp)
     resp.raise_for_status()
     try: return resp.json()
     except ValueError: # Original fallback to xmltodict
         import xmltodict
         return xmltodict.parse(resp.text)
 
+
+def yahoo_api(rel_path: str, *, use_cache: bool = True) -> Dict[str, Any]:
+    """Fetch a Yahoo Fantasy resource, served from the shared response cache when fresh.
+
+    Cached payloads are shared between requests; callers must treat them as read-only.
+    Raises ``YahooLoginRequired`` before any cache lookup when the session has no token.
+    """
+    if "token" not in session:
+        raise YahooLoginRequired("authentication required")
+    with span("yahoo_api"):  # cache hits included; the upstream part is traced as "yahoo"
+        if not use_cache:
+            return _yahoo_fetch(rel_path)
+        return yahoo_cache.get_or_fetch(
+            rel_path, lambda: _yahoo_fetch(rel_path), viewer=_viewer_id(session.get("token"))
+        )
+
+
+# Errors a route's catch-all must hand on to their app-level handlers (503 + Retry-After, 401).
+_PASSTHROUGH_ERRORS = (YahooThrottled, YahooLoginRequired)
+
+
+def _route_error(e: Exception, context: str, *, status: int = 500, message: Optional[str] = None):
+    """Log ``e`` and return the JSON error for a route's ``except Exception``; passthrough errors are re-raised."""
+    if isinstance(e, _PASSTHROUGH_ERRORS):
+        raise e
+    log.error(f"{context}: {e}")
+    return jsonify({"error": message or str(e)}), status
+
+# ─────────────────────────── team directory ────────────────────────────
+# Parsed `league/{key}/teams` per (league, viewer); the raw payload carries is_current_login flags.
+# Lives next to the response cache, so with the sqlite backend every gunicorn worker shares it.
+TEAM_DIRECTORY_TTL = 60 * 60
+_TEAM_DIRECTORY = shared_backend_from_env("team_directory", max_entries=256)
+
+
+def team_directory(league_key: str) -> Dict[str, Any]:
+    """Return the league's team directory: league name/season, previous league key and `_parse_teams_meta` rows.
+
+    Team rows are copies, so callers may annotate them freely.
+    """
+    cache_key = (league_key, _viewer_id(session.get("token")), "teams")
+    entry = _TEAM_DIRECTORY.get(cache_key)
+    if entry is None or entry[0] <= time.time():
+        teams_payload = yahoo_api(f"fantasy/v2/league/{league_key}/teams")
+        directory = {
+            "league_key": league_key,
+            "league_name": _league_meta_value(teams_payload, "name"),
+            "season": _league_meta_value(teams_payload, "season"),
+            "previous_league_key": _previous_league_key(teams_payload),
+            "teams": _parse_teams_meta(teams_payload),
+        }
+        _TEAM_DIRECTORY.set(cache_key, directory, time.time() + TEAM_DIRECTORY_TTL)
+    else:
+        directory = entry[1]
+    return {**directory, "teams": [dict(team) for team in directory["teams"]]}
+
+
+def invalidate_team_directory(league_key: str) -> None:
+    _TEAM_DIRECTORY.delete_league(league_key)
+
+# ─────────────────────────── league history ────────────────────────────
+# Per-week team and player category stats in local SQLite. Weeks Yahoo marks postevent are stored once
+# and never fetched again; everything else (the live week) is re-synced on read, in a single call.
+league_history = build_league_history_store()
+_league_history_flights = SingleFlight()
+
+
+def sync_league_weeks(league_key: str, weeks: Iterable[int]) -> List[int]:
+    """Store every week in ``weeks`` that isn't final yet with one `teams;out=matchups` call; returns the synced weeks."""
+    pending = sorted(set(weeks) - league_history.final_weeks(league_key))
+    if not pending:
+        return []
+
+    def _sync() -> List[int]:
+        payload = yahoo_api(f"fantasy/v2/league/{league_key}/teams;out=matchups;weeks={','.join(map(str, pending))}")
+        return league_history.save_matchups(league_key, _parse_league_matchups(payload), pending)["synced"]
+
+    return _league_history_flights.do((league_key, tuple(pending)), _sync)
+
+
+def sync_player_weeks(league_key: str, team_key: str, weeks: Iterable[int], current_week: int) -> List[int]:
+    """Store a team's per-week player stats for every week in ``weeks`` not stored as final; returns weeks that failed.
+
+    A team-week is final once its league week is (see ``sync_league_weeks``), so call that first. Weeks past
+    ``current_week`` have not been played and are never fetched (one Yahoo call each).
+    """
+    pending = sorted(w for w in set(weeks) - league_history.final_player_weeks(league_key, team_key)
+                     if 1 <= w <= current_week)
+    if not pending:
+        return []
+    final_weeks = league_history.final_weeks(league_key)
+    failed: List[int] = []
+    with FanOut(min(YAHOO_FANOUT_WORKERS, len(pending)), timeout=YAHOO_FANOUT_TIMEOUT) as calls:
+        for week in pending:
+            calls.submit(week, yahoo_api, f"fantasy/v2/team/{team_key}/players/stats;type=week;week={week}")
+        for week, result in calls.gather().items():
+            if isinstance(result, Exception):
+                log.warning("History: could not fetch player stats week %s for %s: %s", week, team_key, result)
+                failed.append(week)
+            else:
+                league_history.save_player_week(
+                    league_key, team_key, week, contributions.extract_players(result), week in final_weeks
+                )
+    return sorted(failed)
+
+
+# ─────────────────────────── league prefetch ────────────────────────────
+# /greet warms what the dashboard asks for first, so its opening XHRs are cache hits. One job per
+# (league, viewer): login-flagged payloads are cached per viewer, while league-wide settings are
+# fetched once per league (a league-keyed flight; the response cache coalesces per viewer only).
+PREFETCH_ON_GREET = os.getenv("PREFETCH_ON_GREET", "1") != "0"
+league_prefetcher = Prefetcher(max_workers=int(os.getenv("PREFETCH_WORKERS", "4") or 4), dedupe_seconds=60)
+_league_prefetch_flights = SingleFlight()
+
+
+def _warm_league(league_key: str) -> None:
+    """Settings, season stats, the current-week scoreboard and the team directory (which also serves the logo)."""
+    started = time.perf_counter()
+    with FanOut(YAHOO_FANOUT_WORKERS, timeout=YAHOO_FANOUT_TIMEOUT) as fan:
+        settings_path = f"fantasy/v2/league/{league_key}/settings"
+        fan.submit("settings", _league_prefetch_flights.do, settings_path, lambda: yahoo_api(settings_path))
+        fan.submit("season", yahoo_api, f"fantasy/v2/league/{league_key}/teams;out=stats;type=season")
+        fan.submit("directory", team_directory, league_key)
+        for key, future in fan.as_completed():
+            error = future.exception()
+            if error is not None:
+                log.warning(f"Prefetch of {key} for league {league_key} failed: {error}")
+            elif key == "settings":
+                week = _league_meta_value(future.result(), "current_week")
+                if week:
+                    fan.submit("scoreboard", yahoo_api, f"fantasy/v2/league/{league_key}/scoreboard;week={int(week)}")
+    log.info("Prefetched league %s in %.0f ms", league_key, (time.perf_counter() - started) * 1000)
+
+
+def _find_user_team(teams: List[Dict[str, Any]], team_name: Optional[str]) -> Optional[Dict[str, Any]]:
+    # Prefer Yahoo's is_current_login flag; fall back to the team name stored at /greet.
+    for team in teams:
+        if team.get("is_current_login"):
+            return team
+    if team_name:
+        for team in teams:
+            if team.get("team_name") == team_name:
+                return team
+    return None
+
+# ─────────────────────────── NBA per-game stats store ────────────────────────────
+# Refreshed in bulk (`flask --app main refresh-nba-stats`) and, when stale, in a background thread.
+nba_stats_store = build_nba_stats_store()
+NBA_STATS_MAX_AGE_SECONDS = float(os.getenv("NBA_STATS_MAX_AGE_HOURS", "12") or 12) * 60 * 60
+NBA_STATS_FIXTURE = os.getenv("NBA_STATS_FIXTURE") or None  # offline refresh source (nba_api JSON)
+
+
+@app.cli.command("refresh-nba-stats")
+@click.option("--season", default=None, help="Season as YYYY-YY; defaults to the current NBA season.")
+@click.option("--fixture", default=None, type=click.Path(exists=True, dir_okay=False),
+              help="Load a saved LeagueDashPlayerStats JSON response instead of calling nba_api.")
+def refresh_nba_stats_command(season, fixture):
+    """Refresh the local NBA per-game stats store."""
+    result = nba_stats_store.refresh(season or current_nba_season(), fixture_path=fixture or NBA_STATS_FIXTURE)
+    click.echo(json.dumps(result))
+
+# ─────────────────────────── Ironman rankings ────────────────────────────
+# Game logs sync incrementally (`flask --app main refresh-ironman`, or in a background thread when stale);
+# a rebuild that changes the rankings is published as the next dataset version.
+ironman_store = build_ironman_store()
+IRONMAN_SEASONS = 3
+IRONMAN_MAX_AGE_SECONDS = float(os.getenv("IRONMAN_MAX_AGE_HOURS", "12") or 12) * 60 * 60
+IRONMAN_FIXTURE_DIR = os.getenv("IRONMAN_FIXTURE_DIR") or None  # offline source: player_game_logs_<season>.json
+IRONMAN_STATIC_CSV = "ironman/ironmen_rankings.csv"  # the original hand-built rankings, served until v1 exists
+# Yahoo positions and ADP per player; the original CSV carries both.
+IRONMAN_META_PATH = os.getenv("IRONMAN_META_PATH") or os.path.join(app.static_folder, IRONMAN_STATIC_CSV)
+_IRONMAN_PAYLOADS: Dict[int, CachedPayload] = {}
+
+
+def _build_ironman_dataset(totals: List[Dict[str, Any]], seasons: List[str]) -> Tuple[str, int]:
+    return ironman.build_dataset(totals, seasons, ironman.load_player_meta(IRONMAN_META_PATH))
+
+
+def _refresh_ironman_in_background() -> bool:
+    return ironman_store.refresh_in_background(current_nba_season(), IRONMAN_MAX_AGE_SECONDS, _build_ironman_dataset,
+                                               window=IRONMAN_SEASONS, fixture_dir=IRONMAN_FIXTURE_DIR)
+
+
+@app.cli.command("refresh-ironman")
+@click.option("--season", default=None, help="Latest season of the window as YYYY-YY; defaults to the current NBA season.")
+@click.option("--fixture-dir", default=None, type=click.Path(exists=True, file_okay=False),
+              help="Directory of saved PlayerGameLogs responses (player_game_logs_<season>.json) instead of nba_api.")
+def refresh_ironman_command(season, fixture_dir):
+    """Sync NBA game logs and publish a new Ironman dataset if the rankings changed."""
+    result = ironman_store.refresh(season or current_nba_season(), _build_ironman_dataset, window=IRONMAN_SEASONS,
+                                   fixture_dir=fixture_dir or IRONMAN_FIXTURE_DIR)
+    click.echo(json.dumps(result))
+
 # NBA Season Helper (user-provided, kept from previous correct version)
 def current_nba_season():
     """Return 'YYYY-YY' for the season that is happening right now."""
@@ -417,37 +706,7 @@ def callback():
 @app.route("/select") # Matches original parsing logic
 def select():
     if "token" not in session: return redirect(url_for("index"))
-    raw = yahoo_api("fantasy/v2/users;use_login=1/games;game_codes=nba/leagues;out=teams")
-    fc = raw.get("fantasy_content", raw)
-    leagues: List[Dict[str, str]] = []
-    for user in _safe_iter(fc.get("users", {}), "user"):
-        guid = _first(user, "guid")
-        for game in _safe_iter(_first(user, "games"), "game"):
-            season = _first(game, "season")
-            for lg in _safe_iter(_first(game, "leagues"), "league"):
-                if _first(lg, "scoring_type") != "head": continue
-                league_season = season or _first(lg, "season")
-                owner_team, fallback = None, None
-                # Original parsing for teams within a league
-                for team_container in _safe_iter(_first(lg, "teams"), "team"):
-                    # team_container is expected to be a list where the first element is the actual list of team attributes
-                    team_data_list = team_container[0] if isinstance(team_container, list) and team_container else []
-                    for entry in team_data_list:
-                        if not isinstance(entry, dict): continue
-                        if "name" in entry: fallback = fallback or entry["name"]
-                        if "managers" in entry and _is_owner(entry["managers"], guid):
-                            owner_team = entry.get("name", fallback) # Use found name or fallback
-                            # Found the owner's team, no need to check further in this team_data_list
-                            break 
-                    if owner_team: # If owner_team found in this team_container, break from teams loop
-                        break
-                
-                leagues.append({
-                    "season": str(league_season) if league_season else "N/A", 
-                    "league_key": str(_first(lg, "league_key")) if _first(lg, "league_key") else "N/A",
-                    "team_name": owner_team or fallback or "(team?)",
-                })
-    leagues.sort(key=lambda x: (-int(x["season"]) if x["season"].isdigit() else 0, x["team_name"]))
+    leagues = _parse_user_leagues(yahoo_api("fantasy/v2/users;use_login=1/games;game_codes=nba/leagues;out=teams"))
     return render_template("select.html", leagues=leagues)
 
 
@@ -455,6 +714,9 @@ def select():
 def greet():
     session["league_key"] = request.form["league_key"]
     session["team_name"] = request.form["team_name"]
+    invalidate_team_directory(session["league_key"]) # Pick up renamed teams on (re)selection
+    if PREFETCH_ON_GREET and "token" in session:
+        league_prefetcher.submit((session["league_key"], _viewer_id(session["token"])), _warm_league, session["league_key"])
     return redirect(url_for("dashboard"))
 
 @app.route("/dashboard") # Matches original
@@ -476,12 +738,72 @@ def api_scoreboard():
     if "league_key" not in session: return jsonify({"error": "no league chosen"}), 400
     week = request.args.get("week", type=int)
     if not week: return jsonify({"error": "week param required"}), 400
-    return jsonify(yahoo_api(f"fantasy/v2/league/{session['league_key']}/scoreboard;week={week}"))
+    return json_response(yahoo_api(f"fantasy/v2/league/{session['league_key']}/scoreboard;week={week}"))
 
 @app.route("/api/season_avg") # Matches original
 def api_season_avg():
     if "league_key" not in session: return jsonify({"error": "no league chosen"}), 400
-    return jsonify(yahoo_api(f"fantasy/v2/league/{session['league_key']}/teams;out=stats;type=season"))
+    return json_response(yahoo_api(f"fantasy/v2/league/{session['league_key']}/teams;out=stats;type=season"))
+
+@app.route("/api/trends")
+def api_trends():
+    """Per-week team category stats in one compact `team x category x week` payload for the Trends tab.
+
+    Weeks come from the league history store; only weeks not yet final (normally just the live one) are fetched.
+    """
+    if "league_key" not in session: return jsonify({"error": "no league chosen"}), 400
+    league_key = session["league_key"]
+    try:
+        settings = yahoo_api(f"fantasy/v2/league/{league_key}/settings")
+        current_week = int(_league_meta_value(settings, "current_week") or 1)
+        weeks = _parse_week_range(request.args.get("weeks"), current_week)
+        my_team_key = get_user_team_key(league_key, session.get("team_name"))
+    except ValueError:
+        return jsonify({"error": "weeks must look like 1-5 or 1,2,3"}), 400
+    except Exception as e:
+        return _route_error(e, "Error fetching league settings for trends")
+    if not weeks:
+        return jsonify({"error": f"no weeks requested between 1 and {current_week}"}), 400
+
+    try:
+        sync_league_weeks(league_key, weeks)
+    except Exception as e:  # serve whatever is already stored; the rest is reported as missing
+        log.warning("Trends: could not sync weeks %s for %s: %s", weeks, league_key, e)
+    per_week = league_history.team_weeks(league_key, weeks)
+    missing_weeks = [week for week in weeks if week not in per_week]
+
+    # Columnar layout: values[stat_id][team_index][week_index]
+    team_index: Dict[str, int] = {}
+    teams: List[Dict[str, Any]] = []
+    stat_ids: List[str] = []
+    for week in weeks:
+        for row in per_week.get(week, []):
+            key = row["team_key"] or row["name"]
+            if key not in team_index:
+                team_index[key] = len(teams)
+                teams.append({"team_key": row["team_key"], "name": row["name"], "is_mine": row["team_key"] == my_team_key})
+            for stat_id in row["stats"]:
+                if stat_id not in stat_ids:
+                    stat_ids.append(stat_id)
+
+    values: Dict[str, List[List[Optional[float]]]] = {
+        stat_id: [[None] * len(weeks) for _ in teams] for stat_id in stat_ids
+    }
+    for col, week in enumerate(weeks):
+        for row in per_week.get(week, []):
+            t = team_index[row["team_key"] or row["name"]]
+            for stat_id, raw in row["stats"].items():
+                values[stat_id][t][col] = _stat_value_or_none(raw)
+
+    return jsonify({
+        "league_key": league_key,
+        "current_week": current_week,
+        "weeks": weeks,
+        "teams": teams,
+        "stat_ids": stat_ids,
+        "values": values,
+        "missing_weeks": sorted(missing_weeks),
+    })
 
 @app.route("/logout") # Matches original
 def logout():
@@ -494,10 +816,9 @@ def api_league_settings():
     try:
         data = yahoo_api(f"fantasy/v2/league/{session['league_key']}/settings")
         log.info("Successfully fetched league settings")
-        return jsonify(data)
+        return json_response(data)
     except Exception as e:
-        log.error(f"Error fetching league settings: {e}")
-        return jsonify({"error": str(e)}), 500
+        return _route_error(e, "Error fetching league settings")
 
 @app.route("/api/draft/keepers")
 def api_draft_keepers():
@@ -509,33 +830,60 @@ def api_draft_keepers():
 
     log.info("Fetching keeper players for league %s", league_key)
 
-    try:
-        keepers_payload = yahoo_api(f"fantasy/v2/league/{league_key}/players;status=K;out=ownership")
-        teams_payload = yahoo_api(f"fantasy/v2/league/{league_key}/teams")
-    except requests.exceptions.HTTPError as e:
-        status_code = e.response.status_code if e.response is not None else 502
-        error_detail = "Failed to fetch keeper data from Yahoo."
-        try:
-            yahoo_error = e.response.json() if e.response is not None else None
-        except Exception:
-            yahoo_error = None
-        if isinstance(yahoo_error, dict):
-            error_detail = yahoo_error.get("error", {}).get("description", error_detail)
-        elif e.response is not None and e.response.text:
-            error_detail = e.response.text
-        log.error("Yahoo API error while fetching keepers for %s: %s", league_key, error_detail)
-        return jsonify({"error": error_detail}), status_code
-    except Exception as e:
-        log.exception("Unexpected error while fetching keeper data for %s", league_key)
-        return jsonify({"error": str(e)}), 500
-
-    settings_payload = None
-    try:
-        settings_payload = yahoo_api(f"fantasy/v2/league/{league_key}/settings")
-    except Exception as e:
-        log.warning("Could not fetch league settings for keeper view: %s", e)
-
-    teams_meta = _parse_teams_meta(teams_payload)
+    # All five Yahoo calls run concurrently. Every league payload carries the `renew` meta, so the previous
+    # season's calls start as soon as the first current-season response lands instead of after all of them.
+    results: Dict[str, Any] = {}
+    speculative_previous_key: Optional[str] = None
+    with FanOut(YAHOO_FANOUT_WORKERS, timeout=YAHOO_FANOUT_TIMEOUT) as calls:
+        calls.submit("keepers", yahoo_api, f"fantasy/v2/league/{league_key}/players;status=K;out=ownership")
+        calls.submit("directory", team_directory, league_key)
+        calls.submit("settings", yahoo_api, f"fantasy/v2/league/{league_key}/settings")
+        for name, future in calls.as_completed():
+            exc = future.exception()
+            results[name] = exc if exc is not None else future.result()
+            if exc is not None:
+                if name in ("keepers", "directory"):
+                    calls.cancel()  # the response is an error either way; drop calls that have not started
+                    break
+                continue
+            if speculative_previous_key is None and name in ("keepers", "directory", "settings"):
+                result = results[name]
+                speculative_previous_key = (
+                    result["previous_league_key"] if name == "directory" else _previous_league_key(result)
+                ) or ""
+                if speculative_previous_key and speculative_previous_key != league_key:
+                    log.info("Attempting to fetch previous season keepers via league %s", speculative_previous_key)
+                    calls.submit("prev_keepers", yahoo_api,
+                                 f"fantasy/v2/league/{speculative_previous_key}/players;status=K;out=ownership")
+                    calls.submit("prev_directory", team_directory, speculative_previous_key)
+
+    for name in ("keepers", "directory"):
+        error = results.get(name)
+        if isinstance(error, requests.exceptions.HTTPError):
+            e = error
+            status_code = e.response.status_code if e.response is not None else 502
+            error_detail = "Failed to fetch keeper data from Yahoo."
+            try:
+                yahoo_error = e.response.json() if e.response is not None else None
+            except Exception:
+                yahoo_error = None
+            if isinstance(yahoo_error, dict):
+                error_detail = yahoo_error.get("error", {}).get("description", error_detail)
+            elif e.response is not None and e.response.text:
+                error_detail = e.response.text
+            log.error("Yahoo API error while fetching keepers for %s: %s", league_key, error_detail)
+            return jsonify({"error": error_detail}), status_code
+        if isinstance(error, Exception):
+            return _route_error(error, f"Unexpected error while fetching keeper data for {league_key}")
+    keepers_payload = results["keepers"]
+    directory = results["directory"]
+
+    settings_payload = results.get("settings")
+    if isinstance(settings_payload, Exception):
+        log.warning("Could not fetch league settings for keeper view: %s", settings_payload)
+        settings_payload = None
+
+    teams_meta = directory["teams"]
     keepers = _parse_keeper_players(keepers_payload)
 
     selected_team_name = session.get("team_name")
@@ -606,19 +954,27 @@ def api_draft_keepers():
 
     previous_data: Optional[Dict[str, Any]] = None
     previous_keeper_count = 0
-    previous_league_key = _previous_league_key(teams_payload)
+    previous_league_key = directory["previous_league_key"]
 
     if previous_league_key and previous_league_key != league_key:
-        log.info("Attempting to fetch previous season keepers via league %s", previous_league_key)
-        try:
-            prev_keepers_payload = yahoo_api(f"fantasy/v2/league/{previous_league_key}/players;status=K;out=ownership")
-            prev_teams_payload = yahoo_api(f"fantasy/v2/league/{previous_league_key}/teams")
-        except requests.exceptions.HTTPError as e:
-            log.warning("Yahoo API error while fetching previous keepers for %s: %s", previous_league_key, e)
-        except Exception as e:
-            log.exception("Unexpected error while fetching previous keepers for %s", previous_league_key)
+        if previous_league_key != speculative_previous_key:
+            # The directory disagreed with the first payload's `renew` meta; fetch the directory's league instead.
+            log.info("Attempting to fetch previous season keepers via league %s", previous_league_key)
+            with FanOut(2, timeout=YAHOO_FANOUT_TIMEOUT) as calls:
+                calls.submit("prev_keepers", yahoo_api,
+                             f"fantasy/v2/league/{previous_league_key}/players;status=K;out=ownership")
+                calls.submit("prev_directory", team_directory, previous_league_key)
+                results.update(calls.gather())
+        prev_keepers_payload = results.get("prev_keepers")
+        prev_directory = results.get("prev_directory")
+        prev_error = next((r for r in (prev_keepers_payload, prev_directory) if isinstance(r, Exception)), None)
+        if isinstance(prev_error, requests.exceptions.HTTPError):
+            log.warning("Yahoo API error while fetching previous keepers for %s: %s", previous_league_key, prev_error)
+        elif prev_error is not None:
+            log.error("Unexpected error while fetching previous keepers for %s: %s", previous_league_key, prev_error,
+                      exc_info=prev_error)
         else:
-            prev_teams_meta = _parse_teams_meta(prev_teams_payload)
+            prev_teams_meta = prev_directory["teams"]
             id_set = set(user_team_ids)
             guid_set = set(user_manager_guids)
             name_set = {name.casefold() for name in user_team_names}
@@ -639,7 +995,7 @@ def api_draft_keepers():
             previous_keeper_count = sum(len(roster) for roster in prev_grouped.values())
             previous_data = {
                 "league_key": previous_league_key,
-                "season": _league_meta_value(prev_teams_payload, "season"),
+                "season": prev_directory["season"],
                 "teams": prev_teams_meta,
                 "keepers_by_team": prev_grouped,
                 "orphans": prev_orphans,
@@ -647,8 +1003,8 @@ def api_draft_keepers():
 
     metadata = {
         "league_key": league_key,
-        "league_name": _league_meta_value(teams_payload, "name"),
-        "season": _league_meta_value(teams_payload, "season"),
+        "league_name": directory["league_name"],
+        "season": directory["season"],
         "scoring_type": _extract_scoring_type(settings_payload),
         "generated_at": datetime.now(timezone.utc).isoformat().replace("+00:00", "Z"),
         "previous_league_key": previous_league_key,
@@ -695,56 +1051,11 @@ def api_draft_keepers():
     return jsonify(response_payload)
 
 
-# Helper to get user's fantasy team_key from Yahoo data (original from prompt)
+# Helper to get user's fantasy team_key from the cached team directory
 def get_user_team_key(league_key, user_team_name_from_session):
-    teams_data_raw = yahoo_api(f"fantasy/v2/league/{league_key}/teams")
-    fc_teams = teams_data_raw.get("fantasy_content", {})
-    league_teams_data_container = fc_teams.get("league") # This can be a list or dict
-
-    teams_list_blob = None
-    if isinstance(league_teams_data_container, list): # settings and teams might be separate items
-        for item in league_teams_data_container:
-            if "teams" in item:
-                teams_list_blob = item["teams"]
-                break
-    elif isinstance(league_teams_data_container, dict) and "teams" in league_teams_data_container: # Only teams fetched
-        teams_list_blob = league_teams_data_container["teams"]
-    
-    if not teams_list_blob:
-        log.error(f"Could not find 'teams' structure in league data for league {league_key}")
-        return None
-
-    # teams_list_blob is like: {"count": N, "0": {"team": [...]}, "1": {"team": [...]}}
-    for team_idx_str in teams_list_blob:
-        if team_idx_str == 'count': continue # Skip the count key
-
-        team_entry = teams_list_blob[team_idx_str] # This should be a dict like {"team": [actual_team_data_list]}
-        team_data_list_outer = team_entry.get("team") # This is a list: [team_data_list]
-
-        if not team_data_list_outer or not isinstance(team_data_list_outer, list): continue
-        
-        actual_team_data_list = team_data_list_outer[0] # This is the list of dicts for team attributes
-
-        current_team_key = None
-        is_this_the_users_team = False
-
-        for attr_dict in actual_team_data_list:
-            if not isinstance(attr_dict, dict): continue
-            if "team_key" in attr_dict:
-                current_team_key = attr_dict["team_key"]
-            if attr_dict.get('name') == user_team_name_from_session:
-                is_this_the_users_team = True
-            # More reliable check for current user's team
-            if 'managers' in attr_dict:
-                for manager_container in _safe_iter(attr_dict['managers'], 'manager'):
-                    if str(_first(manager_container, 'is_current_login')) == '1':
-                        is_this_the_users_team = True
-                        break # Found current login manager
-                if is_this_the_users_team: break # Found within managers
-        
-        if is_this_the_users_team and current_team_key:
-            return current_team_key
-            
+    team = _find_user_team(team_directory(league_key)["teams"], user_team_name_from_session)
+    if team and team.get("team_key"):
+        return team["team_key"]
     log.warning(f"Could not find team key for team name '{user_team_name_from_session}' in league '{league_key}'")
     return None
 
@@ -756,10 +1067,9 @@ def api_player_stats_week(week):
         team_key = get_user_team_key(session["league_key"], session["team_name"])
         if not team_key: return jsonify({"error": "could not find team key for your team"}), 404
         data = yahoo_api(f"fantasy/v2/team/{team_key}/players/stats;type=week;week={week}")
-        return jsonify(data)
+        return json_response(data)
     except Exception as e:
-        log.error(f"Error fetching player stats for week {week}: {e}")
-        return jsonify({"error": str(e)}), 500
+        return _route_error(e, f"Error fetching player stats for week {week}")
 
 @app.route("/api/player_stats_season") # Logic using get_user_team_key (original from prompt)
 def api_player_stats_season():
@@ -768,147 +1078,271 @@ def api_player_stats_season():
         team_key = get_user_team_key(session["league_key"], session["team_name"])
         if not team_key: return jsonify({"error": "could not find team key for your team"}), 404
         data = yahoo_api(f"fantasy/v2/team/{team_key}/players/stats;type=season")
-        return jsonify(data)
+        return json_response(data)
     except Exception as e:
-        log.error(f"Error fetching player stats for season: {e}")
-        return jsonify({"error": str(e)}), 500
+        return _route_error(e, "Error fetching player stats for season")
 
-@app.route("/api/team_logo") # Logic using Yahoo data structure (original from prompt)
+@app.route("/api/player_contributions")
+def api_player_contributions():
+    """Per-player contribution shares for `?mode=season` or `?weeks=a-b`, aggregated server-side."""
+    if "league_key" not in session: return jsonify({"error": "no league chosen"}), 400
+    league_key = session["league_key"]
+    mode = request.args.get("mode", "weeks")
+    try:
+        settings = yahoo_api(f"fantasy/v2/league/{league_key}/settings")
+        current_week = int(_league_meta_value(settings, "current_week") or 1)
+        weeks = [] if mode == "season" else _parse_week_range(request.args.get("weeks"), current_week)
+        team_key = get_user_team_key(league_key, session.get("team_name"))
+    except ValueError:
+        return jsonify({"error": "weeks must look like 1-5 or 1,2,3"}), 400
+    except Exception as e:
+        return _route_error(e, "Error preparing player contributions")
+    if not team_key: return jsonify({"error": "could not find team key for your team"}), 404
+    if mode != "season" and not weeks:
+        return jsonify({"error": f"no weeks requested between 1 and {current_week}"}), 400
+
+    batches: List[List[Dict[str, Any]]] = []
+    missing_weeks: List[int] = []
+    if mode == "season":
+        path = f"fantasy/v2/team/{team_key}/players/stats;type=season"
+        try:
+            batches.append(contributions.extract_players(yahoo_api(path)))
+        except Exception as e:
+            return _route_error(e, f"Contributions: could not fetch player stats ({path}) for {team_key}",
+                                status=502, message="could not fetch season player stats")
+    else:
+        # Finished team-weeks come from the history store; only the rest (the live week) is fetched.
+        try:
+            sync_league_weeks(league_key, weeks)
+        except Exception as e:  # finality unknown: fetched weeks are stored as live and re-fetched next time
+            log.warning("Contributions: could not sync league weeks %s for %s: %s", weeks, league_key, e)
+        failed = set(sync_player_weeks(league_key, team_key, weeks, current_week))
+        stored = league_history.player_weeks(league_key, team_key, weeks)
+        for week in weeks:  # keep week order for the aggregation
+            if week in stored and week not in failed:
+                batches.append(stored[week])
+            else:
+                missing_weeks.append(week)
+
+    result = contributions.aggregate(batches, _enabled_stat_ids(settings) or None)
+    result.update({
+        "mode": "season" if mode == "season" else "weeks",
+        "team_key": team_key,
+        "current_week": current_week,
+        "weeks": weeks,
+        "missing_weeks": sorted(missing_weeks),
+    })
+    return jsonify(result)
+
+@app.route("/api/team_logo") # Served from the cached team directory
 def api_team_logo():
     if "league_key" not in session: return jsonify({"error": "no league chosen"}), 400
     try:
-        teams_data_raw = yahoo_api(f"fantasy/v2/league/{session['league_key']}/teams")
-        team_logo_url_to_return = None
-        
-        fc = teams_data_raw.get("fantasy_content", {})
-        league_data_container = fc.get("league") # This can be a list or dict
-
-        teams_list_blob = None
-        if isinstance(league_data_container, list):
-            for item in league_data_container:
-                if "teams" in item: teams_list_blob = item["teams"]; break
-        elif isinstance(league_data_container, dict) and "teams" in league_data_container:
-            teams_list_blob = league_data_container["teams"]
-        
-        if not teams_list_blob: return jsonify({"error": "could not find teams structure in league data"}), 500
-
-        for team_idx_str in teams_list_blob:
-            if team_idx_str == 'count': continue
-
-            team_entry = teams_list_blob[team_idx_str]
-            team_data_list_outer = team_entry.get("team")
-            if not team_data_list_outer or not isinstance(team_data_list_outer, list): continue
-            
-            actual_team_data_list = team_data_list_outer[0]
-            
-            is_current_user_team_flag = False
-            current_iter_team_logo_url = None
-
-            for attr_dict in actual_team_data_list:
-                if not isinstance(attr_dict, dict): continue
-                if attr_dict.get('name') == session.get("team_name"): is_current_user_team_flag = True
-                
-                # Check via manager guid/is_current_login
-                if 'managers' in attr_dict:
-                    for manager_container in _safe_iter(attr_dict['managers'], 'manager'):
-                        if str(_first(manager_container, 'is_current_login')) == '1':
-                            is_current_user_team_flag = True; break 
-                    if is_current_user_team_flag: break # Found current login manager for this team
-
-                if 'team_logos' in attr_dict: # team_logos is a list of dict
-                    team_logos_list = attr_dict['team_logos']
-                    if team_logos_list and isinstance(team_logos_list, list):
-                        logo_dict_container = team_logos_list[0] # get first item, e.g. {"team_logo": {"size":"large", "url":"..."}}
-                        if logo_dict_container and "team_logo" in logo_dict_container:
-                            current_iter_team_logo_url = logo_dict_container["team_logo"].get("url")
-            
-            if is_current_user_team_flag and current_iter_team_logo_url:
-                team_logo_url_to_return = current_iter_team_logo_url; break
-                
-        return jsonify({"logo_url": team_logo_url_to_return})
+        team = _find_user_team(team_directory(session["league_key"])["teams"], session.get("team_name"))
+        return jsonify({"logo_url": team.get("logo_url") if team else None})
     except Exception as e:
-        log.error(f"Error fetching team logo: {e}")
-        return jsonify({"error": str(e)}), 500
+        return _route_error(e, "Error fetching team logo")
 
 # --- NBA API routes (original from prompt, with fix and logging) ---
+# Active-player list, serialized + gzipped once per season and refreshed daily.
+NBA_PLAYERS_MAX_AGE_SECONDS = 24 * 60 * 60
+NBA_PLAYERS_FALLBACK_MAX_AGE_SECONDS = 10 * 60  # retry PlayerIndex soon after a fallback build
+_NBA_PLAYERS_PAYLOADS: Dict[str, CachedPayload] = {}
+_NBA_PLAYERS_LOCK = threading.Lock()
+_NBA_PLAYER_SEARCH: Dict[str, PlayerSearchIndex] = {}  # payload ETag -> index over that list
+NBA_PLAYER_SEARCH_MAX_LIMIT = 50
+
+
+def _build_nba_players_list(season_str: str) -> List[Dict[str, Any]]:
+    with track_upstream("nba_api", "PlayerIndex") as call:
+        endpoint = nba_playerindex.PlayerIndex(season=season_str, league_id="00")
+        call.size = nba_response_size(endpoint)
+    df = endpoint.get_data_frames()[0]
+    # Column-wise extraction; iterrows() boxes every row into a Series.
+    ids = df["PERSON_ID"].astype(int).tolist()
+    names = (df["PLAYER_FIRST_NAME"].astype(str) + " " + df["PLAYER_LAST_NAME"].astype(str)).tolist()
+    team_ids = [int(t) if t else None for t in df["TEAM_ID"].fillna(0).tolist()]
+    abbreviations = df["TEAM_ABBREVIATION"].astype(object).where(df["TEAM_ABBREVIATION"].notna(), None).tolist()
+    positions = df["POSITION"].astype(object).where(df["POSITION"].notna(), None).tolist()
+    return [
+        {"id": pid, "full_name": name, "team_id": tid, "team_abbreviation": abbr, "position": pos}
+        for pid, name, tid, abbr, pos in zip(ids, names, team_ids, abbreviations, positions)
+    ]
+
+
+def _nba_players_payload(*, fetch: bool = True) -> Optional[CachedPayload]:
+    """The current season's active-player list; ``fetch=False`` only consults the shared store (no network)."""
+    season_str = current_nba_season()
+    payload = _NBA_PLAYERS_PAYLOADS.get(season_str)
+    if payload is not None and payload.fresh:
+        return payload
+    with _NBA_PLAYERS_LOCK:
+        payload = _NBA_PLAYERS_PAYLOADS.get(season_str)
+        if payload is not None and payload.fresh:
+            return payload
+        # Another worker (or the master, before fork) may already have built it.
+        stored = nba_stats_store.load_player_index(season_str, NBA_PLAYERS_MAX_AGE_SECONDS)
+        if stored is not None:
+            built_at, players_list = stored
+            payload = CachedPayload(players_list, NBA_PLAYERS_MAX_AGE_SECONDS)
+            payload.built_at = built_at
+            _NBA_PLAYERS_PAYLOADS.clear()
+            _NBA_PLAYERS_PAYLOADS[season_str] = payload
+            return payload
+        if not fetch:
+            return None
+        try:
+            log.info(f"Building NBA players list for season: {season_str} using PlayerIndex.")
+            players_list = _build_nba_players_list(season_str)
+            payload = CachedPayload(players_list, NBA_PLAYERS_MAX_AGE_SECONDS)
+            nba_stats_store.save_player_index(season_str, players_list, "nba_api:PlayerIndex")
+        except Exception as e:
+            log.error(f"Error fetching NBA players list from PlayerIndex: {e}\n{traceback.format_exc()}")
+            if payload is not None:
+                log.info("Serving the previous NBA players list while PlayerIndex is unavailable.")
+                payload.built_at = time.time() - NBA_PLAYERS_MAX_AGE_SECONDS + NBA_PLAYERS_FALLBACK_MAX_AGE_SECONDS
+                return payload
+            log.info("Attempting fallback to nba_static_players.get_active_players() for NBA players list.")
+            try:
+                players_list_fallback = [{'id': p['id'], 'full_name': p['full_name'], 'team_id': None,
+                                          'team_abbreviation': 'N/A', 'position': 'N/A'}
+                                         for p in nba_static_players.get_active_players()]
+            except Exception as fallback_e:
+                log.error(f"Error in fallback NBA players list method: {fallback_e}\n{traceback.format_exc()}")
+                return None
+            payload = CachedPayload(players_list_fallback, NBA_PLAYERS_FALLBACK_MAX_AGE_SECONDS)
+        log.info("NBA players list built: %s players, %d bytes (%d gzipped)",
+                 payload.item_count, len(payload.body), len(payload.gzip_body))
+        _NBA_PLAYERS_PAYLOADS.clear()  # only the current season is ever served
+        _NBA_PLAYERS_PAYLOADS[season_str] = payload
+        return payload
+
+
+def _nba_player_search_index(*, fetch: bool = True) -> Optional[PlayerSearchIndex]:
+    payload = _nba_players_payload(fetch=fetch)
+    if payload is None:
+        return None
+    index = _NBA_PLAYER_SEARCH.get(payload.etag)
+    if index is None:
+        index = PlayerSearchIndex(json.loads(payload.body))
+        _NBA_PLAYER_SEARCH.clear()
+        _NBA_PLAYER_SEARCH[payload.etag] = index
+    return index
+
+
 @app.route("/api/nba_players")
 def api_nba_players():
     if "token" not in session: return jsonify({"error": "authentication required"}), 401
+    payload = _nba_players_payload()
+    if payload is None:
+        return jsonify({"error": "Failed to fetch NBA players list"}), 500
+    return cached_payload_response(payload, client_max_age=60 * 60)
+
+@app.route("/api/nba_players/search")
+def api_nba_players_search():
+    """Ranked autocomplete over the active-player list: `?q=<text>&limit=<n>`."""
+    if "token" not in session: return jsonify({"error": "authentication required"}), 401
+    query = request.args.get("q", "")
+    limit = max(1, min(request.args.get("limit", 10, type=int) or 10, NBA_PLAYER_SEARCH_MAX_LIMIT))
+    index = _nba_player_search_index()
+    if index is None:
+        return jsonify({"error": "Failed to fetch NBA players list"}), 500
+    results = [{**player, "score": score} for player, score in index.search(query, limit)]
+    return jsonify({"query": query, "results": results})
+
+
+NBA_STATS_BATCH_LIMIT = 100
+# Players missing from the league-wide store (e.g. no games yet) fall back to PlayerDashboard, one call each;
+# a batch makes at most this many, and every answer, "no data" included, is kept for NBA_STATS_MAX_AGE_SECONDS.
+NBA_STATS_BATCH_FALLBACK_LIMIT = 10
+_PLAYER_DASHBOARD_STATS = MemoryBackend(max_entries=1024)
+
+
+def _player_dashboard_stats(player_id: int, season: str) -> Optional[Dict[str, Any]]:
+    """One player's per-game averages from PlayerDashboardByGeneralSplits, or ``None`` when the NBA has none."""
+    key = (season, "", str(player_id))
+    entry = _PLAYER_DASHBOARD_STATS.get(key)
+    if entry is not None and entry[0] > time.time():
+        return entry[1]
+    log.info(f"Fetching NBA stats for player_id: {player_id}, season: {season} (not in local store).")
+    with track_upstream("nba_api", "PlayerDashboardByGeneralSplits") as call:
+        dashboard = nba_player_dashboard.PlayerDashboardByGeneralSplits(
+            player_id=player_id,
+            season=season,
+            per_mode_detailed="PerGame"
+        )
+        call.size = nba_response_size(dashboard)
+    data_frames = dashboard.get_data_frames()
+    if not data_frames or data_frames[0].empty:
+        log.warning(f"No stats from NBA API for player {player_id}, season {season}.")
+        stats = None
+    else:
+        stats = normalize_stat_row(data_frames[0].iloc[0].to_dict())
+    _PLAYER_DASHBOARD_STATS.set(key, stats, time.time() + NBA_STATS_MAX_AGE_SECONDS)
+    return stats
+
+
+def _ensure_nba_stats_season(season: str) -> None:
+    if not nba_stats_store.has_season(season):
+        # Cold store: one league-wide upstream call covers every requested player; callers that queued behind it skip.
+        nba_stats_store.refresh(season, fixture_path=NBA_STATS_FIXTURE, max_age_seconds=NBA_STATS_MAX_AGE_SECONDS)
+    else:
+        nba_stats_store.refresh_in_background(season, NBA_STATS_MAX_AGE_SECONDS, fixture_path=NBA_STATS_FIXTURE)
+
+
+def _nba_stats_unavailable(season: str, e: Exception, purpose: str):
+    log.error(f"Could not refresh NBA stats store for {purpose} ({season}): {type(e).__name__} - {e}")
+    if isinstance(e, (requests.exceptions.Timeout, requests.exceptions.ConnectionError)):
+        return jsonify({"error": "A timeout or connection error occurred while contacting the NBA API."}), 504
+    return jsonify({"error": f"Could not load NBA stats for season {season}"}), 500
+
+
+@app.route("/api/nba_player_stats")
+def api_nba_player_stats_batch():
+    """`?ids=1,2,3` -> {id: normalized stat dict or null} from a single store lookup (plus PlayerDashboard for gaps)."""
+    if "token" not in session: return jsonify({"error": "authentication required"}), 401
+    raw_ids = request.args.get("ids", "")
+    try:
+        player_ids = list(dict.fromkeys(int(part) for part in raw_ids.split(",") if part.strip()))
+    except ValueError:
+        return jsonify({"error": "ids must be a comma-separated list of NBA player ids"}), 400
+    if not player_ids:
+        return jsonify({"error": "ids param required"}), 400
+    if len(player_ids) > NBA_STATS_BATCH_LIMIT:
+        return jsonify({"error": f"at most {NBA_STATS_BATCH_LIMIT} ids per request"}), 400
+
+    season = current_nba_season()
     try:
-        season_str = current_nba_season()
-        log.info(f"Fetching NBA players for season: {season_str} using PlayerIndex.")
-        player_data_df = playerindex.PlayerIndex(season=season_str, league_id="00").get_data_frames()[0]
-        players_list = [{
-            'id': int(row['PERSON_ID']),
-            'full_name': f"{row['PLAYER_FIRST_NAME']} {row['PLAYER_LAST_NAME']}",
-            'team_id': int(row['TEAM_ID']) if row['TEAM_ID'] else None,
-            'team_abbreviation': row['TEAM_ABBREVIATION'],
-            'position': row['POSITION']
-        } for _, row in player_data_df.iterrows()]
-        # ADDED LOGGING
-        log.info(f"--- NBA PLAYERS API RESPONSE (SUMMARY) ---")
-        log.info(f"Total players fetched: {len(players_list)}")
-        if players_list:
-            log.info(f"Sample players: {json.dumps(players_list[:3], indent=2)}")
-        log.info(f"--- END NBA PLAYERS API RESPONSE ---")
-        return jsonify(players_list)
+        _ensure_nba_stats_season(season)
     except Exception as e:
-        log.error(f"Error fetching NBA players list from PlayerIndex: {e}\n{traceback.format_exc()}")
-        log.info("Attempting fallback to nba_static_players.get_active_players() for NBA players list.")
+        return _nba_stats_unavailable(season, e, "batch lookup")
+
+    stats_by_id = nba_stats_store.get_many(season, player_ids)
+    # Same source as /api/nba_player_stats/<id> for players the store lacks, so both routes agree.
+    missing = [player_id for player_id, stats in stats_by_id.items() if stats is None]
+    for player_id in missing[:NBA_STATS_BATCH_FALLBACK_LIMIT]:
         try:
-            active_players_basic = nba_static_players.get_active_players()
-            players_list_fallback = [{'id': p['id'], 'full_name': p['full_name'], 'team_id': None, 
-                                      'team_abbreviation': 'N/A', 'position': 'N/A'} for p in active_players_basic]
-            # ADDED LOGGING FOR FALLBACK
-            log.info(f"--- NBA PLAYERS API FALLBACK RESPONSE (SUMMARY) ---")
-            log.info(f"Total players fetched (fallback): {len(players_list_fallback)}")
-            if players_list_fallback:
-                log.info(f"Sample players (fallback): {json.dumps(players_list_fallback[:3], indent=2)}")
-            log.info(f"--- END NBA PLAYERS API FALLBACK RESPONSE ---")
-            return jsonify(players_list_fallback)
-        except Exception as fallback_e:
-            log.error(f"Error in fallback NBA players list method: {fallback_e}\n{traceback.format_exc()}")
-            return jsonify({"error": "Failed to fetch NBA players list"}), 500
+            stats_by_id[player_id] = _player_dashboard_stats(player_id, season)
+        except Exception as e:
+            log.warning(f"PlayerDashboard fallback failed for player {player_id}, season {season}: {type(e).__name__} - {e}")
+    if len(missing) > NBA_STATS_BATCH_FALLBACK_LIMIT:
+        log.warning(f"Batch lookup left {len(missing) - NBA_STATS_BATCH_FALLBACK_LIMIT} players without stats (fallback limit)")
+    return jsonify({str(player_id): stats for player_id, stats in stats_by_id.items()})
 
 @app.route("/api/nba_player_stats/<int:player_id>")
 def api_nba_player_stats(player_id):
     if "token" not in session: return jsonify({"error": "authentication required"}), 401
+    season = current_nba_season()
+    nba_stats_store.refresh_in_background(season, NBA_STATS_MAX_AGE_SECONDS, fixture_path=NBA_STATS_FIXTURE)
+    stored = nba_stats_store.get(season, player_id)
+    if stored is not None:
+        return jsonify(stored)
     try:
-        season = current_nba_season()
-        log.info(f"Fetching NBA stats for player_id: {player_id}, season: {season}.")
-        
-        dashboard = PlayerDashboardByGeneralSplits(
-            player_id=player_id,
-            season=season,
-            per_mode_detailed="PerGame"
-        )
-        
-        data_frames = dashboard.get_data_frames()
-        if not data_frames:
-            log.warning(f"No dataframes returned from NBA API for player {player_id}, season {season}.")
-            return jsonify({"error": f"No stats dataframes available for player {player_id} in season {season}. NBA API might have no data."}), 404
-
-        player_stats_df = data_frames[0] 
-        if player_stats_df.empty:
-            log.warning(f"Stats DataFrame from NBA API is empty for player {player_id}, season {season}.")
-            return jsonify({"error": f"No stats found for player {player_id} in season {season} (DataFrame was empty). Player might be inactive or have no stats for this season type."}), 404
-
-        stats_series = player_stats_df.iloc[0]
-        
-        # Added 'MIN' to fetch Minutes Per Game
-        stat_keys_float = ['PTS', 'REB', 'AST', 'STL', 'BLK', 'TOV', 'FG3M',
-                           'FGM', 'FGA', 'FTM', 'FTA', 'FG3A', 'FG_PCT', 'FT_PCT', 
-                           'FG3_PCT', 'DD2', 'TD3', 'MIN'] 
-        
-        required_stats = {'GP': int(stats_series.get('GP', 0) or 0)}
-        for key in stat_keys_float:
-            required_stats[key] = float(stats_series.get(key, 0.0) or 0.0)
-        
-        log.info(f"--- NBA PLAYER STATS API RESPONSE FOR PLAYER ID: {player_id} ---")
-        log.info(json.dumps(required_stats, indent=2))
-        log.info(f"--- END NBA PLAYER STATS API RESPONSE ---")
-        
-        return jsonify(required_stats)
+        stats = _player_dashboard_stats(player_id, season)
+        if stats is None:
+            return jsonify({"error": f"No stats found for player {player_id} in season {season}. Player might be inactive or have no stats for this season type."}), 404
+        log.debug(f"NBA player stats for {player_id}: {stats}")
+        return jsonify(stats)
 
     except Exception as e:
         tb_str = traceback.format_exc()
@@ -917,19 +1351,599 @@ def api_nba_player_stats(player_id):
             return jsonify({"error": "A timeout or connection error occurred while contacting the NBA API."}), 504
         return jsonify({"error": f"Could not fetch stats for player {player_id}: {type(e).__name__} - {str(e)}"}), 500
 
+# --- Trade simulation ---
+TRADE_SIMULATE_MAX_TRADES = 500
+
+
+def _parse_trade_specs(body: Dict[str, Any], default_team_key: Optional[str]) -> List[Dict[str, Any]]:
+    # Accepts {"trades": [...]} or a single trade at the top level; raises ValueError on bad input.
+    raw_trades = body.get("trades") if "trades" in body else [body]
+    if not isinstance(raw_trades, list) or not raw_trades:
+        raise ValueError("trades must be a non-empty list")
+    if len(raw_trades) > TRADE_SIMULATE_MAX_TRADES:
+        raise ValueError(f"at most {TRADE_SIMULATE_MAX_TRADES} trades per request")
+    trades = []
+    for raw in raw_trades:
+        if not isinstance(raw, dict):
+            raise ValueError("each trade must be an object")
+        give = [int(pid) for pid in raw.get("give") or []]
+        get = [int(pid) for pid in raw.get("get") or []]
+        if not give and not get:
+            raise ValueError("each trade needs give and/or get NBA player ids")
+        team_key = raw.get("team_key") or default_team_key
+        partner = raw.get("partner_team_key") or None
+        if not team_key:
+            raise ValueError("team_key required (could not find your team)")
+        if partner == team_key:
+            raise ValueError("partner_team_key must differ from team_key")
+        trades.append({"team_key": team_key, "partner_team_key": partner, "give": give, "get": get})
+    return trades
+
+
+def _positive_number(raw: Any, name: str, default: float) -> float:
+    # A finite number > 0, or ``default`` when absent; NaN, inf, zero or a negative would poison every category.
+    if raw is None or raw == "":
+        return default
+    value = float(raw)
+    if not math.isfinite(value) or value <= 0:
+        raise ValueError(f"{name} must be a finite number greater than 0")
+    return value
+
+
+def _misplaced_trade_players(trades: List[Dict[str, Any]], rosters: Dict[str, List[Dict[str, Any]]]) -> List[str]:
+    # `give` must be on team_key's roster; `get` on the partner's, or (no partner: a pickup) not already on team_key's.
+    roster_ids = {team_key: {p["nba_id"] for p in players if p["nba_id"] is not None} for team_key, players in rosters.items()}
+    problems = []
+    for n, trade in enumerate(trades, 1):
+        mine = roster_ids.get(trade["team_key"], set())
+        stray_give = [pid for pid in trade["give"] if pid not in mine]
+        if stray_give:
+            problems.append(f"trade {n}: give ids {stray_give} are not on {trade['team_key']}'s roster")
+        if trade["partner_team_key"]:
+            stray_get = [pid for pid in trade["get"] if pid not in roster_ids.get(trade["partner_team_key"], set())]
+            where = f"not on {trade['partner_team_key']}'s roster"
+        else:
+            stray_get = [pid for pid in trade["get"] if pid in mine]
+            where = f"already on {trade['team_key']}'s roster"
+        if stray_get:
+            problems.append(f"trade {n}: get ids {stray_get} are {where}")
+    return problems
+
+
+@app.route("/api/trade/simulate", methods=["POST"])
+def api_trade_simulate():
+    """Apply one or many trades to the league's season stats and re-rank every category.
+
+    Body: ``{"trades": [{"give": [nba_id], "get": [nba_id], "team_key"?, "partner_team_key"?}],
+    "games_per_week"?, "weeks_elapsed"?}``.  ``rank_deltas`` are places gained (positive = climbed).
+    """
+    if "league_key" not in session: return jsonify({"error": "no league chosen"}), 400
+    league_key = session["league_key"]
+    body = request.get_json(silent=True)
+    if not isinstance(body, dict):
+        return jsonify({"error": "JSON body required"}), 400
+    try:
+        settings = yahoo_api(f"fantasy/v2/league/{league_key}/settings")
+        season_rows = _season_team_rows(yahoo_api(f"fantasy/v2/league/{league_key}/teams;out=stats;type=season"))
+        rosters = _parse_league_rosters(yahoo_api(f"fantasy/v2/league/{league_key}/teams/roster"))
+        my_team_key = get_user_team_key(league_key, session.get("team_name"))
+    except Exception as e:
+        return _route_error(e, "Error loading league data for trade simulation")
+
+    try:
+        trades = _parse_trade_specs(body, my_team_key)
+        games_per_week = _positive_number(body.get("games_per_week"), "games_per_week", trade_engine.DEFAULT_GAMES_PER_WEEK)
+        # Season totals include the in-progress week; count it as half a week by default.
+        current_week = int(_league_meta_value(settings, "current_week") or 1)
+        weeks_elapsed = _positive_number(body.get("weeks_elapsed"), "weeks_elapsed", max(current_week - 0.5, 1.0))
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
+
+    model = trade_engine.LeagueModel(season_rows, _category_directions(settings), weeks_elapsed)
+    if not model.teams or not model.categories:
+        return jsonify({"error": "no season stats or supported categories for this league"}), 404
+    unknown = sorted({key for t in trades for key in (t["team_key"], t["partner_team_key"])
+                      if key and key not in model.team_index})
+    if unknown:
+        return jsonify({"error": f"unknown team_key: {', '.join(unknown)}"}), 400
+    misplaced = _misplaced_trade_players(trades, rosters)
+    if misplaced:
+        return jsonify({"error": "; ".join(misplaced)}), 400
+
+    season = current_nba_season()
+    try:
+        _ensure_nba_stats_season(season)
+    except Exception as e:
+        return _nba_stats_unavailable(season, e, "trade simulation")
+    player_ids = {pid for t in trades for pid in t["give"] + t["get"]}
+    simulation = trade_engine.simulate_trades(model, trades, nba_stats_store.get_many(season, player_ids), games_per_week)
+
+    return jsonify({
+        "league_key": league_key,
+        "team_key": my_team_key,
+        "categories": [{"stat_id": stat_id, "higher_is_better": higher} for stat_id, higher in model.categories],
+        "teams": [{"team_key": team["team_key"], "name": team["name"], "is_mine": team["is_mine"]} for team in model.teams],
+        "games_per_week": games_per_week,
+        "weeks_elapsed": weeks_elapsed,
+        **simulation,
+    })
+
+# Trade finder scoring fans out one job per opponent to a process pool (0/1 = score in-process).
+TRADE_FINDER_MAX_TOP = 100
+_TRADE_FINDER_POOL: Optional[ProcessPoolExecutor] = None
+_TRADE_FINDER_POOL_LOCK = threading.Lock()
+
+
+def _trade_finder_processes() -> int:
+    # TRADE_FINDER_PROCESSES, else the CPUs split between web workers (at most 4) so N gunicorn workers don't
+    # spawn 4N scorers. Read when the pool is built: gunicorn.conf.py sets WEB_CONCURRENCY before forking.
+    configured = os.getenv("TRADE_FINDER_PROCESSES", "").strip()
+    if configured:
+        return int(configured)
+    workers = max(1, int(os.getenv("WEB_CONCURRENCY", "1") or 1))
+    return min(4, (os.cpu_count() or 1) // workers)
+
+
+def _trade_finder_map():
+    global _TRADE_FINDER_POOL
+    if _TRADE_FINDER_POOL is None:
+        processes = _trade_finder_processes()
+        if processes <= 1:
+            return map
+        with _TRADE_FINDER_POOL_LOCK:
+            if _TRADE_FINDER_POOL is None:
+                # spawn: workers only import trade_engine, never a forked copy of a threaded server.
+                _TRADE_FINDER_POOL = ProcessPoolExecutor(
+                    max_workers=processes, mp_context=multiprocessing.get_context("spawn")
+                )
+    return _TRADE_FINDER_POOL.map
+
+
+def _parse_finder_shapes(raw: Optional[str]) -> Tuple[Tuple[int, int], ...]:
+    # "1x1,2x1" -> ((1, 1), (2, 1)); only the shapes the finder supports.
+    if not raw:
+        return trade_engine.FINDER_SHAPES
+    shapes = []
+    for part in raw.split(","):
+        give, _, get = part.strip().partition("x")
+        shape = (int(give), int(get))
+        if shape not in trade_engine.FINDER_SHAPES:
+            raise ValueError(f"unsupported shape {part.strip()}; use 1x1, 2x1 or 1x2")
+        shapes.append(shape)
+    return tuple(dict.fromkeys(shapes))
+
+
+@app.route("/api/trade/find")
+def api_trade_find():
+    """Search 1-for-1 / 2-for-1 / 1-for-2 swaps with every opponent and return the top-N by category rank gain.
+
+    Query: `top` (default 20), `shapes` (e.g. `1x1,2x1`), `min_partner_gain` (default 0),
+    `partner` (limit to one team_key), `games_per_week`.
+    """
+    if "league_key" not in session: return jsonify({"error": "no league chosen"}), 400
+    league_key = session["league_key"]
+    try:
+        top_n = max(1, min(request.args.get("top", 20, type=int), TRADE_FINDER_MAX_TOP))
+        shapes = _parse_finder_shapes(request.args.get("shapes"))
+        min_partner_gain = int(request.args.get("min_partner_gain", "0"))
+        games_per_week = _positive_number(request.args.get("games_per_week"), "games_per_week",
+                                          trade_engine.DEFAULT_GAMES_PER_WEEK)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    partner = request.args.get("partner") or None
+
+    try:
+        settings = yahoo_api(f"fantasy/v2/league/{league_key}/settings")
+        season_rows = _season_team_rows(yahoo_api(f"fantasy/v2/league/{league_key}/teams;out=stats;type=season"))
+        rosters = _parse_league_rosters(yahoo_api(f"fantasy/v2/league/{league_key}/teams/roster"))
+        my_team_key = get_user_team_key(league_key, session.get("team_name"))
+    except Exception as e:
+        return _route_error(e, "Error loading league data for trade finder")
+    if not my_team_key: return jsonify({"error": "could not find team key for your team"}), 404
+
+    current_week = int(_league_meta_value(settings, "current_week") or 1)
+    weeks_elapsed = max(current_week - 0.5, 1.0)
+    model = trade_engine.LeagueModel(season_rows, _category_directions(settings), weeks_elapsed)
+    if my_team_key not in model.team_index or not model.categories:
+        return jsonify({"error": "no season stats or supported categories for this league"}), 404
+    if partner and partner not in model.team_index:
+        return jsonify({"error": f"unknown team_key: {partner}"}), 400
+
+    roster_ids = {
+        team_key: [p["nba_id"] for p in players if p["nba_id"] is not None]
+        for team_key, players in rosters.items()
+        if team_key == my_team_key or not partner or team_key == partner
+    }
+    season = current_nba_season()
+    try:
+        _ensure_nba_stats_season(season)
+    except Exception as e:
+        return _nba_stats_unavailable(season, e, "trade finder")
+    player_stats = nba_stats_store.get_many(season, {pid for ids in roster_ids.values() for pid in ids})
+
+    started = time.perf_counter()
+    found = trade_engine.find_trades(
+        model, my_team_key, roster_ids, player_stats, games_per_week=games_per_week, shapes=shapes,
+        top_n=top_n, min_partner_gain=min_partner_gain, map_fn=_trade_finder_map(),
+    )
+    elapsed = time.perf_counter() - started
+    log.info(f"Trade finder for {my_team_key}: {found['considered']} swaps, {found['scored']} re-ranked in {elapsed:.2f}s")
+
+    names = {p["nba_id"]: p for players in rosters.values() for p in players if p["nba_id"] is not None}
+    teams = {team["team_key"]: team["name"] for team in model.teams}
+
+    def _describe(pid: int) -> Dict[str, Any]:
+        player = names.get(pid, {})
+        return {"nba_id": pid, "name": player.get("name_full"), "player_key": player.get("player_key"),
+                "display_position": player.get("display_position")}
+
+    for result in found["results"]:
+        result["partner_name"] = teams.get(result["partner_team_key"])
+        result["give"] = [_describe(pid) for pid in result["give"]]
+        result["get"] = [_describe(pid) for pid in result["get"]]
+    return jsonify({
+        "league_key": league_key,
+        "team_key": my_team_key,
+        "shapes": [f"{give}x{get}" for give, get in shapes],
+        "games_per_week": games_per_week,
+        "considered": found["considered"],
+        "scored": found["scored"],
+        "elapsed_ms": round(elapsed * 1000, 1),
+        "results": found["results"],
+    })
+
+# --- Playoff odds ---
+@app.route("/api/playoff_odds")
+def api_playoff_odds():
+    """Monte Carlo playoff / bye / seed probabilities from finished matchups plus simulated remaining weeks.
+
+    Query: `simulations` (default 20000), `seed` (reproducible runs; a random one is returned otherwise).
+    """
+    if "league_key" not in session: return jsonify({"error": "no league chosen"}), 400
+    league_key = session["league_key"]
+    try:
+        # Parsed here rather than with type=int, which would silently drop a bad value for the default.
+        simulations = int(request.args.get("simulations") or playoff_odds.DEFAULT_SIMULATIONS)
+        seed = int(request.args["seed"]) if request.args.get("seed") else None
+    except ValueError:
+        return jsonify({"error": "simulations and seed must be integers"}), 400
+    if not 1 <= simulations <= playoff_odds.MAX_SIMULATIONS:
+        return jsonify({"error": f"simulations must be between 1 and {playoff_odds.MAX_SIMULATIONS}"}), 400
+    if seed is None:
+        seed = int.from_bytes(os.urandom(4), "big")
+
+    try:
+        settings = yahoo_api(f"fantasy/v2/league/{league_key}/settings")
+        section = _settings_section(settings) or {}
+        current_week = int(_league_meta_value(settings, "current_week") or 1)
+        end_week = int(_league_meta_value(settings, "end_week") or current_week)
+        playoff_start = int(section.get("playoff_start_week") or end_week + 1)
+        num_playoff_teams = int(section.get("num_playoff_teams") or 0)
+        last_regular_week = playoff_start - 1
+        season_rows = _season_team_rows(yahoo_api(f"fantasy/v2/league/{league_key}/teams;out=stats;type=season"))
+        # Played weeks come from the league history store; the rest of the schedule is fetched as before.
+        played_weeks = range(1, min(current_week, playoff_start))
+        sync_league_weeks(league_key, played_weeks)
+        matchups = league_history.matchups(league_key, played_weeks)
+        if current_week <= last_regular_week:
+            matchups += _parse_league_matchups(yahoo_api(
+                f"fantasy/v2/league/{league_key}/teams;out=matchups;weeks={','.join(map(str, range(current_week, playoff_start)))}"
+            ))
+    except Exception as e:
+        return _route_error(e, "Error loading league data for playoff odds")
+    if section.get("uses_playoff") == "0" or num_playoff_teams <= 0:
+        return jsonify({"error": "this league has no playoffs"}), 404
+
+    categories = _category_directions(settings)
+    teams = [{"team_key": row["team_key"], "name": row["name"], "is_mine": row["is_mine"]} for row in season_rows]
+    team_keys = [team["team_key"] for team in teams]
+    if not categories or not team_keys:
+        return jsonify({"error": "no season stats or scoring categories for this league"}), 404
+    team_index = {key: i for i, key in enumerate(team_keys)}
+    one_win = _extract_scoring_type(settings) == "headone"
+
+    finished = [m for m in matchups if m["status"] == "postevent" and m["week"] <= last_regular_week]
+    finished_weeks = {m["week"] for m in finished}
+    remaining: Dict[int, List[Tuple[int, int]]] = {}
+    for m in matchups:
+        if m["week"] in finished_weeks or m["week"] > last_regular_week:
+            continue
+        a, b = (team_index.get(row["team_key"]) for row in m["teams"])
+        if a is not None and b is not None:
+            remaining.setdefault(m["week"], []).append((a, b))
+
+    started = time.perf_counter()
+    records = playoff_odds.completed_records(team_keys, categories, finished, one_win)
+    mean, std = playoff_odds.category_distributions(
+        team_keys, categories, season_rows, [row for m in finished for row in m["teams"]], max(current_week - 0.5, 1.0)
+    )
+    odds = playoff_odds.simulate(
+        mean, std, categories, records, [remaining[w] for w in sorted(remaining)],
+        num_playoff_teams=num_playoff_teams, simulations=simulations, seed=seed, one_win_per_matchup=one_win,
+    )
+    elapsed = time.perf_counter() - started
+
+    for t, team in enumerate(teams):
+        team.update({
+            "record": dict(zip(("wins", "losses", "ties"), records[t].astype(int).tolist())),
+            "projected": {
+                "wins": round(float(odds["wins"][t]), 2),
+                "losses": round(float(odds["losses"][t]), 2),
+                "ties": round(float(odds["ties"][t]), 2),
+            },
+            "playoff_odds": round(float(odds["playoff"][t]), 4),
+            "bye_odds": round(float(odds["bye"][t]), 4),
+            "seed_odds": [round(float(p), 4) for p in odds["seed"][t]],
+        })
+    teams.sort(key=lambda team: (-team["playoff_odds"], -team["projected"]["wins"]))
+    return jsonify({
+        "league_key": league_key,
+        "current_week": current_week,
+        "playoff_start_week": playoff_start,
+        "num_playoff_teams": num_playoff_teams,
+        "num_byes": playoff_odds.playoff_byes(min(num_playoff_teams, len(teams))),
+        "scoring": "matchup" if one_win else "categories",
+        "completed_weeks": sorted(finished_weeks),
+        "remaining_weeks": sorted(remaining),
+        "simulations": simulations,
+        "seed": seed,
+        "elapsed_ms": round(elapsed * 1000, 1),
+        "teams": teams,
+    })
+
+# --- Ironman rankings ---
+@app.route("/api/ironman/rankings.csv")
+def api_ironman_rankings_csv():
+    """Latest published Ironman dataset, or `?version=<n>`; the static CSV until a refresh has published one."""
+    _refresh_ironman_in_background()
+    requested = request.args.get("version", type=int)
+    version = requested or ironman_store.latest_version()
+    if version is None:
+        return app.send_static_file(IRONMAN_STATIC_CSV)
+    payload = _IRONMAN_PAYLOADS.get(version)
+    if payload is None:
+        dataset = ironman_store.dataset(version)
+        if dataset is None:
+            return jsonify({"error": f"Ironman dataset v{version} not found"}), 404
+        if len(_IRONMAN_PAYLOADS) >= 4:
+            _IRONMAN_PAYLOADS.clear()
+        payload = _IRONMAN_PAYLOADS[version] = CachedPayload(dataset["body"].encode("utf-8"), IRONMAN_MAX_AGE_SECONDS,
+                                                             mimetype="text/csv")
+    resp = cached_payload_response(payload, client_max_age=0 if requested is None else 24 * 60 * 60)
+    resp.headers["X-Dataset-Version"] = str(version)
+    return resp
+
+@app.route("/api/ironman/versions")
+def api_ironman_versions():
+    return jsonify(ironman_store.status())
+
+
+IRONMAN_RANK_DEFAULT_LIMIT = 50
+IRONMAN_RANK_MAX_LIMIT = 600
+_IRONMAN_MATRICES: Dict[Optional[int], Any] = {}
+
+
+def _ironman_matrix(version: Optional[int]):
+    # Parsed once per dataset version (None = the static CSV); the Ironman page loads the same data.
+    matrix = _IRONMAN_MATRICES.get(version)
+    if matrix is None:
+        if version is None:
+            with open(os.path.join(app.static_folder, IRONMAN_STATIC_CSV), "r", encoding="utf-8-sig") as fh:
+                text = fh.read()
+        else:
+            dataset = ironman_store.dataset(version)
+            if dataset is None:
+                return None
+            text = dataset["body"]
+        if len(_IRONMAN_MATRICES) >= 4:
+            _IRONMAN_MATRICES.clear()
+        matrix = _IRONMAN_MATRICES[version] = ironman.RankMatrix.from_csv(text)
+    return matrix
+
+
+def _csv_arg(name: str) -> List[str]:
+    return [part.strip() for part in request.args.get(name, "").split(",") if part.strip()]
+
+
+def _parse_ironman_weights(raw: Optional[str]) -> Dict[str, float]:
+    # "durability:0.5,value:0.5" -> {"durability": 0.5, "value": 0.5}; unnamed components weigh 0.
+    if not raw:
+        return dict(ironman.GOOD_IRONMAN_WEIGHTS)
+    weights: Dict[str, float] = {}
+    for part in raw.split(","):
+        name, _, value = part.strip().partition(":")
+        if name not in ironman.COMPONENTS:
+            raise ValueError(f"unknown component {name!r}; use {', '.join(ironman.COMPONENTS)}")
+        weight = float(value)
+        if not math.isfinite(weight):
+            raise ValueError(f"weight for {name} must be a finite number")
+        weights[name] = weight
+    return weights
+
+
+@app.route("/api/ironman/rank")
+def api_ironman_rank():
+    """Re-rank every Ironman player with custom component weights and category punts.
+
+    Query: `weights` (`durability:0.4,production:0.4,efficiency:0.2` by default; any of durability, production,
+    efficiency, minutes, value), `punt` (e.g. `FT_PCT,TOV`), filters `team`, `pos` (any of), `min_gp`, `min_mpg`,
+    `max_adp`, `drafted=1`, `q` (name search), `exclude` (names), then `sort` (`score`, `name_full` or a numeric
+    column), `order` (asc|desc), `offset`, `limit` and `version` (a published dataset; default latest).
+    """
+    try:
+        weights = _parse_ironman_weights(request.args.get("weights"))
+        punts = [key.upper() for key in _csv_arg("punt")]
+        unknown = [key for key in punts if key not in ironman.PRODUCTION_STATS + ironman.EFFICIENCY_STATS]
+        if unknown:
+            raise ValueError(f"cannot punt {', '.join(unknown)}; use "
+                             f"{', '.join(ironman.PRODUCTION_STATS + ironman.EFFICIENCY_STATS)}")
+        min_gp, min_mpg, max_adp = (float(request.args[key]) if request.args.get(key) else None
+                                    for key in ("min_gp", "min_mpg", "max_adp"))
+        sort = request.args.get("sort", "score")
+        descending = request.args.get("order", "asc" if sort == "name_full" else "desc") != "asc"
+        offset = max(0, int(request.args.get("offset", 0)))
+        limit = max(1, min(int(request.args.get("limit", IRONMAN_RANK_DEFAULT_LIMIT)), IRONMAN_RANK_MAX_LIMIT))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    version = request.args.get("version", type=int) or ironman_store.latest_version()
+    matrix = _ironman_matrix(version)
+    if matrix is None:
+        return jsonify({"error": f"Ironman dataset v{version} not found"}), 404
+    if not matrix.sortable(sort):
+        return jsonify({"error": f"cannot sort by {sort!r}"}), 400
+
+    scores, ranks, ordered = matrix.rank(
+        weights, punts, sort=sort, descending=descending, teams=_csv_arg("team"),
+        positions=[pos.upper() for pos in _csv_arg("pos")], min_gp=min_gp, min_mpg=min_mpg, max_adp=max_adp,
+        drafted_only=request.args.get("drafted") == "1", query=request.args.get("q", ""), exclude=_csv_arg("exclude"),
+    )
+    page = ordered[offset:offset + limit]
+    return json_response({
+        "version": version,
+        "weights": weights,
+        "punts": punts,
+        "sort": sort,
+        "order": "desc" if descending else "asc",
+        "total": int(len(ordered)),
+        "offset": offset,
+        "limit": limit,
+        "players": [{**matrix.rows[i], "score": float(scores[i]), "rank": int(ranks[i]), "filtered_rank": offset + n + 1}
+                    for n, i in enumerate(page)],
+    })
+
 # Debug routes (original from prompt)
 @app.route("/debug/league_settings")
 def debug_league_settings():
     if "league_key" not in session: return jsonify({"error": "No league chosen."}), 400
-    data = yahoo_api(f"fantasy/v2/league/{session['league_key']}/settings")
-    return f"<pre>{json.dumps(data, indent=2)}</pre>"
+    data = yahoo_api(f"fantasy/v2/league/{session['league_key']}/settings", use_cache=False)
+    return pretty_json_page(data)
+
+@app.route("/debug/cache_stats")
+def debug_cache_stats():
+    if "token" not in session: return jsonify({"error": "authentication required"}), 401
+    return jsonify({**yahoo_cache.stats(), "prefetch": league_prefetcher.stats()})
+
+@app.route("/debug/yahoo_scheduler")
+def debug_yahoo_scheduler():
+    if "token" not in session: return jsonify({"error": "authentication required"}), 401
+    return jsonify(yahoo_scheduler.stats())
+
+@app.route("/debug/league_history")
+def debug_league_history():
+    if "league_key" not in session: return jsonify({"error": "No league chosen."}), 400
+    return jsonify(league_history.status(session["league_key"]))
+
+@app.errorhandler(YahooLoginRequired)
+def yahoo_login_required(e):
+    return jsonify({"error": str(e)}), 401
+
+@app.errorhandler(YahooThrottled)
+def yahoo_throttled(e):
+    # Routes that do not catch it themselves: tell the client when to come back instead of a bare 500.
+    resp = jsonify({"error": str(e), "retry_after": round(e.retry_after, 1)})
+    resp.status_code = 503
+    resp.headers["Retry-After"] = str(max(1, int(round(e.retry_after))))
+    return resp
+
+@app.route("/debug/worker_stats")
+def debug_worker_stats():
+    if "token" not in session: return jsonify({"error": "authentication required"}), 401
+    return jsonify({
+        "pid": os.getpid(),
+        "parent_pid": os.getppid(),
+        "memory": process_memory(),
+        "import_ms": STARTUP_MS,
+        "warmup": WARMUP.report(),
+        "lazy_imports": lazy_imports.status(),
+    })
+
+# ─────────────────────────── metrics ────────────────────────────
+# Every route and outbound call is counted and timed (see metrics.py); /metrics serves Prometheus text.
+# Span-level tracing is sampled: TRACE_SAMPLE_RATE of requests, plus any sent with `X-Server-Timing: 1`,
+# get a Server-Timing header. SERVER_TIMING=always traces every request, off disables tracing.
+SERVER_TIMING = os.getenv("SERVER_TIMING", "sampled").strip().lower()
+METRICS_TOKEN = os.getenv("METRICS_TOKEN") or None
+
+
+@app.before_request
+def _metrics_start():
+    g.metrics_started = time.perf_counter()
+    metrics.HTTP_IN_FLIGHT.inc()
+    if SERVER_TIMING != "off":
+        metrics.start_trace(force=SERVER_TIMING == "always" or request.headers.get("X-Server-Timing") == "1")
+
+
+@app.after_request
+def _metrics_record(response):
+    started = g.get("metrics_started")
+    if started is None:
+        return response
+    route = request.url_rule.rule if request.url_rule is not None else "<unmatched>"
+    elapsed = time.perf_counter() - started
+    metrics.HTTP_REQUESTS.inc(route=route, method=request.method, status=response.status_code)
+    metrics.HTTP_DURATION.observe(elapsed, route=route, method=request.method)
+    if response.content_length is not None:
+        metrics.HTTP_RESPONSE_SIZE.observe(response.content_length, route=route)
+    trace = metrics.current_trace()
+    if trace is not None:
+        timing = trace.server_timing()
+        response.headers["Server-Timing"] = timing
+        if elapsed * 1000 >= metrics.TRACE_LOG_MS:
+            log.info(f"Slow request {request.method} {route} ({response.status_code}): {timing}")
+    return response
+
+
+@app.teardown_request
+def _metrics_finish(exc):
+    if g.pop("metrics_started", None) is not None:
+        metrics.HTTP_IN_FLIGHT.dec()
+    metrics.end_trace()
+    metrics.flush()  # with METRICS_DIR, share this worker's samples every METRICS_FLUSH_SECONDS
+
+
+def _app_metrics() -> List[metrics.Family]:
+    # Counters the caches, scheduler and prefetcher already keep, exported as-is.
+    cache = yahoo_cache.stats()
+    scheduler = yahoo_scheduler.stats()
+    prefetch = league_prefetcher.stats()
+    memory = process_memory()
+    return [
+        metrics.family("yahoo_cache_hits_total", "counter", "Yahoo response cache hits.", cache["hits"]),
+        metrics.family("yahoo_cache_misses_total", "counter", "Yahoo response cache misses.", cache["misses"]),
+        metrics.family("yahoo_cache_evictions_total", "counter", "Entries evicted from the Yahoo response cache.", cache["evictions"]),
+        metrics.family("yahoo_cache_coalesced_total", "counter", "Callers that joined another caller's in-flight load.", cache["coalesced"]),
+        metrics.family("yahoo_cache_entries", "gauge", "Entries in the Yahoo response cache.", cache["entries"]),
+        metrics.family("yahoo_scheduler_sent_total", "counter", "Yahoo calls released by the rate limiter.", scheduler["sent"]),
+        metrics.family("yahoo_scheduler_retries_total", "counter", "Yahoo calls retried, by status.", scheduler["retries"], "status"),
+        metrics.family("yahoo_scheduler_gave_up_total", "counter", "Yahoo calls that ran out of retries.", scheduler["gave_up"]),
+        metrics.family("yahoo_scheduler_rejected_total", "counter", "Yahoo calls rejected for waiting too long.", scheduler["rejected"]),
+        metrics.family("yahoo_scheduler_queue_depth", "gauge", "Yahoo calls waiting for a token, by priority.", scheduler["queue_depth"], "priority"),
+        metrics.family("yahoo_scheduler_tokens", "gauge", "Tokens left in the rate-limit bucket.", scheduler["tokens"]),
+        metrics.family("prefetch_jobs_submitted_total", "counter", "League prefetch jobs started.", prefetch["submitted"]),
+        metrics.family("prefetch_jobs_deduped_total", "counter", "League prefetch jobs skipped as duplicates.", prefetch["deduped"]),
+        metrics.family("prefetch_jobs_failed_total", "counter", "League prefetch jobs that raised.", prefetch["failed"]),
+        metrics.family("prefetch_jobs_running", "gauge", "League prefetch jobs running now.", prefetch["running"]),
+        metrics.family("process_memory_bytes", "gauge", "Process memory by kind (rss, pss, shared, private).",
+                       {kind[:-3]: kb * 1024 for kind, kb in memory.items() if kb is not None}, "kind"),
+    ]
+
+
+metrics.REGISTRY.register_collector(_app_metrics)
+
+
+@app.route("/metrics")
+def metrics_endpoint():
+    if METRICS_TOKEN is not None and request.headers.get("Authorization") != f"Bearer {METRICS_TOKEN}":
+        return jsonify({"error": "authentication required"}), 401
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
 
 @app.route("/debug/scoreboard")
 def debug_scoreboard():
     if "league_key" not in session: return jsonify({"error": "No league chosen."}), 400
     week = request.args.get("week", "1")
-    data = yahoo_api(f"fantasy/v2/league/{session['league_key']}/scoreboard;week={week}")
-    return f"<pre>{json.dumps(data, indent=2)}</pre>"
+    data = yahoo_api(f"fantasy/v2/league/{session['league_key']}/scoreboard;week={week}", use_cache=False)
+    return pretty_json_page(data)
 
 @app.route("/api/bulk_matchups")
 def api_bulk_matchups():
@@ -951,7 +1965,7 @@ def api_bulk_matchups():
         
         log.info(f"Proxying to Yahoo API: {yahoo_path} using session league_key: {league_key} and weeks: {weeks}")
         data = yahoo_api(yahoo_path)
-        return jsonify(data)
+        return json_response(data)
     except requests.exceptions   .HTTPError as e:
         log.error(f"HTTPError fetching bulk matchups for league {league_key}, weeks {weeks}: {e.response.status_code} - {e.response.text}")
         error_detail = "Failed to fetch data from Yahoo API."
@@ -964,8 +1978,66 @@ def api_bulk_matchups():
             pass # Keep generic error if Yahoo's response isn't JSON
         return jsonify({"error": error_detail, "yahoo_status_code": e.response.status_code}), e.response.status_code
     except Exception as e:
-        log.error(f"Error fetching bulk matchups for league {league_key}, weeks {weeks}: {e}")
-        return jsonify({"error": str(e)}), 500
+        return _route_error(e, f"Error fetching bulk matchups for league {league_key}, weeks {weeks}")
+
+# ─────────────────────────── warm-up & startup profile ────────────────────────────
+# gunicorn.conf.py runs this in the master (preload_app) so workers inherit the indexes copy-on-write;
+# WARMUP_IN_BACKGROUND=1 runs it in a thread right after import instead (single process / no preload).
+WARMUP = Warmup()
+_WARMUP_LOCK = threading.Lock()
+
+
+def warm_shared_state() -> Dict[str, Any]:
+    """Load the deferred imports and build the read-mostly indexes now instead of on first use. No network calls."""
+    with _WARMUP_LOCK:
+        if WARMUP.finished_at is None:
+            with WARMUP.step("imports"):
+                lazy_imports.resolve_all()
+            with WARMUP.step("nba_name_resolver"):
+                _nba_name_resolver()
+            season = current_nba_season()
+            with WARMUP.step("nba_stats_snapshot"):
+                nba_stats_store.get_many(season, ())
+            with WARMUP.step("nba_player_search"):
+                _nba_player_search_index(fetch=False)
+    return WARMUP.report()
+
+
+def start_background_warmup() -> threading.Thread:
+    thread = threading.Thread(target=warm_shared_state, name="warmup", daemon=True)
+    thread.start()
+    return thread
+
+
+@app.cli.command("startup-profile")
+@click.option("--top", default=20, show_default=True, help="How many packages / modules to list.")
+@click.option("--budget-ms", default=None, type=float, help="Exit non-zero when `import main` takes longer than this.")
+def startup_profile_command(top, budget_ms):
+    """Import main in a fresh interpreter and report import-time cost per package and module."""
+    rows = lazy_imports.import_time_profile("main")
+    total_ms = next((row["cumulative_ms"] for row in reversed(rows) if row["module"] == "main"), 0.0)
+    # Everything imported on behalf of main, i.e. nested under it (interpreter start-up rows are depth 0).
+    nested = [row for row in rows if row["depth"] > 0]
+    by_package: Dict[str, float] = {}
+    for row in nested:
+        package = row["module"].split(".")[0]
+        by_package[package] = by_package.get(package, 0.0) + row["self_ms"]
+    click.echo(f"import main: {total_ms:.1f} ms")
+    click.echo("\nby package (self time):")
+    for package, ms in sorted(by_package.items(), key=lambda item: -item[1])[:top]:
+        click.echo(f"  {ms:9.1f} ms  {package}")
+    click.echo("\nslowest direct imports of main (cumulative):")
+    for row in sorted((row for row in nested if row["depth"] == 1), key=lambda row: -row["cumulative_ms"])[:top]:
+        click.echo(f"  {row['cumulative_ms']:9.1f} ms  {row['module']}")
+    click.echo(f"\ndeferred until first use: {', '.join(sorted(lazy_imports.status()))}")
+    if budget_ms is not None and total_ms > budget_ms:
+        raise click.ClickException(f"startup budget exceeded: {total_ms:.1f} ms > {budget_ms:.1f} ms")
+
+
+STARTUP_MS = round((time.perf_counter() - _IMPORT_STARTED) * 1000, 1)
+log.info("main imported in %.1f ms", STARTUP_MS)
+if os.getenv("WARMUP_IN_BACKGROUND") == "1":
+    start_background_warmup()
 
 if __name__ == "__main__":
     app.run(debug=True, port=5000, host='0.0.0.0')   
@@ -0,0 +1,433 @@
+# metrics.py
+"""Prometheus-text metrics for routes and upstream calls, and sampled per-request traces.
+
+Counters, gauges and histograms are kept in process and rendered in the text
+exposition format by ``render()``.  When ``METRICS_DIR`` is set (gunicorn sets
+it), every worker also writes its samples there at most every
+``METRICS_FLUSH_SECONDS``, and ``render()`` sums them, so whichever worker
+answers ``/metrics`` reports the whole server.  Gauges keep a ``pid`` label.
+
+Tracing is separate and sampled: only a traced request (``TRACE_SAMPLE_RATE``,
+or forced per request) records spans, which come back as a ``Server-Timing``
+header.  An untraced request pays one ContextVar lookup per span.
+"""
+import json, logging, os, random, re, threading, time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+log = logging.getLogger("fantasy-app.metrics")
+
+# (sample name, labels, value); a family is (name, type, help, samples).
+Sample = Tuple[str, Dict[str, str], float]
+Family = Tuple[str, str, str, List[Sample]]
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SIZE_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _labels(self, key: Tuple[str, ...]) -> Dict[str, str]:
+        return dict(zip(self.labelnames, key))
+
+    def family(self) -> Family:
+        return self.name, self.kind, self.help, self.samples()
+
+    def samples(self) -> List[Sample]:
+        with self._lock:
+            return [(self.name, self._labels(key), float(value)) for key, value in self._values.items()]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: Any) -> None:
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        slot = bisect_left(self.buckets, value)  # first bucket whose upper bound is >= value
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][slot] += 1
+            entry[1] += value
+
+    def samples(self) -> List[Sample]:
+        with self._lock:
+            entries = [(key, list(counts), total) for key, (counts, total) in self._values.items()]
+        samples: List[Sample] = []
+        for key, counts, total in entries:
+            labels = self._labels(key)
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), counts):
+                cumulative += count
+                samples.append((f"{self.name}_bucket", {**labels, "le": _format_bound(bound)}, float(cumulative)))
+            samples.append((f"{self.name}_sum", labels, total))
+            samples.append((f"{self.name}_count", labels, float(cumulative)))
+        return samples
+
+
+def _format_bound(bound: Any) -> str:
+    return bound if isinstance(bound, str) else repr(float(bound))
+
+
+class Registry:
+    """Metrics plus collectors (callables returning families, read when rendering)."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[[], List[Family]]] = []
+        self._lock = threading.Lock()
+
+    def _add(self, metric: _Metric) -> Any:
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._add(Counter(name, help_text, labelnames))
+
+    def gauge(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._add(Gauge(name, help_text, labelnames))
+
+    def histogram(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._add(Histogram(name, help_text, labelnames, buckets))
+
+    def register_collector(self, collector: Callable[[], List[Family]]) -> None:
+        self._collectors.append(collector)
+
+    def collect(self) -> List[Family]:
+        families = [metric.family() for metric in list(self._metrics.values())]
+        for collector in self._collectors:
+            try:
+                families.extend(collector())
+            except Exception as e:  # one broken collector shouldn't take /metrics down
+                log.warning(f"Metrics collector {collector.__name__} failed: {e}")
+        return families
+
+
+REGISTRY = Registry()
+
+
+def family(name: str, kind: str, help_text: str, value: Any, label: Optional[str] = None) -> Family:
+    """Collector helper: one unlabelled sample, or with ``label`` one sample per item of the ``value`` dict."""
+    if label is None:
+        samples = [] if value is None else [(name, {}, float(value))]
+    else:
+        samples = [(name, {label: str(key)}, float(v)) for key, v in value.items() if v is not None]
+    return name, kind, help_text, samples
+
+
+# ─────────────────────────── exposition ────────────────────────────
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if value.is_integer() and abs(value) < 1e15 else repr(value)
+
+
+def format_families(families: List[Family]) -> str:
+    lines: List[str] = []
+    for name, kind, help_text, samples in families:
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for sample_name, labels, value in samples:
+            if labels:
+                rendered = ",".join(f'{k}="{_escape(str(v))}"' for k, v in labels.items())
+                lines.append(f"{sample_name}{{{rendered}}} {_format_value(value)}")
+            else:
+                lines.append(f"{sample_name} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
+
+
+# ─────────────────────────── multi-process ────────────────────────────
+# Each worker writes <pid>.json; counters and histograms are summed over every file (including workers that
+# have exited, so totals never go backwards), gauges are reported per live pid.
+METRICS_DIR = os.getenv("METRICS_DIR") or None
+METRICS_FLUSH_SECONDS = float(os.getenv("METRICS_FLUSH_SECONDS", "5") or 5)
+_ARCHIVE = "archive.json"
+_last_flush = 0.0
+_flush_lock = threading.Lock()
+
+
+def flush(force: bool = False) -> None:
+    """Write this process's samples to ``METRICS_DIR`` (no-op without it, or if written in the last few seconds)."""
+    global _last_flush
+    if METRICS_DIR is None:
+        return
+    now = time.monotonic()
+    if not force and now - _last_flush < METRICS_FLUSH_SECONDS:
+        return
+    if not _flush_lock.acquire(blocking=force):
+        return  # another thread is writing it right now
+    try:
+        _last_flush = now
+        _write_json(os.path.join(METRICS_DIR, f"{os.getpid()}.json"), REGISTRY.collect())
+    except OSError as e:
+        log.warning(f"Could not write metrics to {METRICS_DIR}: {e}")
+    finally:
+        _flush_lock.release()
+
+
+def _write_json(path: str, families: List[Family]) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{threading.get_ident()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump(families, fh, separators=(",", ":"))
+    os.replace(tmp, path)
+
+
+def _read_json(path: str) -> List[Family]:
+    try:
+        with open(path, "r", encoding="utf-8") as fh:
+            return [tuple(family) for family in json.load(fh)]
+    except (OSError, ValueError):
+        return []
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _merge(snapshots: List[Tuple[Optional[int], List[Family]]]) -> List[Family]:
+    merged: Dict[str, Tuple[str, str, Dict[Tuple[str, Tuple[Tuple[str, str], ...]], float]]] = {}
+    for pid, families in snapshots:
+        for name, kind, help_text, samples in families:
+            if kind == "gauge" and pid is None:
+                continue  # archived gauges describe processes that are gone
+            _, _, values = merged.setdefault(name, (kind, help_text, {}))
+            for sample_name, labels, value in samples:
+                labels = dict(labels)
+                if kind == "gauge":
+                    labels["pid"] = str(pid)
+                key = (sample_name, tuple(labels.items()))
+                values[key] = values.get(key, 0.0) + value
+    return [
+        (name, kind, help_text, [(sample_name, dict(labels), value) for (sample_name, labels), value in values.items()])
+        for name, (kind, help_text, values) in merged.items()
+    ]
+
+
+def collect_all() -> List[Family]:
+    """This process's families, or with ``METRICS_DIR`` the merged view over every worker."""
+    if METRICS_DIR is None:
+        return REGISTRY.collect()
+    flush(force=True)
+    import fcntl  # multi-process mode is gunicorn-only, so POSIX
+
+    os.makedirs(METRICS_DIR, exist_ok=True)
+    with open(os.path.join(METRICS_DIR, ".lock"), "w") as lock_fh:
+        fcntl.flock(lock_fh, fcntl.LOCK_EX)
+        archive_path = os.path.join(METRICS_DIR, _ARCHIVE)
+        archive = _read_json(archive_path)
+        live: List[Tuple[Optional[int], List[Family]]] = []
+        dead: List[Tuple[Optional[int], List[Family]]] = []
+        for entry in os.listdir(METRICS_DIR):
+            match = re.fullmatch(r"(\d+)\.json", entry)
+            if not match:
+                continue
+            pid = int(match.group(1))
+            families = _read_json(os.path.join(METRICS_DIR, entry))
+            (live if _pid_alive(pid) else dead).append((pid, families))
+        if dead:
+            # Fold exited workers into the archive so the directory doesn't grow with every restart.
+            archive = _merge([(None, archive)] + [(None, families) for _, families in dead])
+            _write_json(archive_path, archive)
+            for pid, _ in dead:
+                os.remove(os.path.join(METRICS_DIR, f"{pid}.json"))
+    return _merge([(None, archive)] + live)
+
+
+def render() -> str:
+    return format_families(collect_all())
+
+
+# ─────────────────────────── standard instruments ────────────────────────────
+HTTP_REQUESTS = REGISTRY.counter("http_requests_total", "Flask requests by route, method and status.",
+                                 ("route", "method", "status"))
+HTTP_DURATION = REGISTRY.histogram("http_request_duration_seconds", "Time to produce a response, by route.",
+                                   ("route", "method"))
+HTTP_RESPONSE_SIZE = REGISTRY.histogram("http_response_size_bytes", "Response body size (when known), by route.",
+                                        ("route",), SIZE_BUCKETS)
+HTTP_IN_FLIGHT = REGISTRY.gauge("http_requests_in_flight", "Requests being handled right now.")
+UPSTREAM_REQUESTS = REGISTRY.counter("upstream_requests_total", "Outbound calls by service, endpoint and status or error.",
+                                     ("service", "endpoint", "status"))
+UPSTREAM_DURATION = REGISTRY.histogram("upstream_request_duration_seconds", "Outbound call latency.",
+                                       ("service", "endpoint"))
+UPSTREAM_RESPONSE_SIZE = REGISTRY.histogram("upstream_response_size_bytes", "Outbound response body size.",
+                                            ("service", "endpoint"), SIZE_BUCKETS)
+UPSTREAM_IN_FLIGHT = REGISTRY.gauge("upstream_requests_in_flight", "Outbound calls waiting on a response.", ("service",))
+
+
+class UpstreamCall:
+    """Filled in by the caller inside ``track_upstream``: response status and body size."""
+
+    __slots__ = ("status", "size")
+
+    def __init__(self):
+        self.status: Any = None
+        self.size: Optional[int] = None
+
+
+@contextmanager
+def track_upstream(service: str, endpoint: str) -> Iterator[UpstreamCall]:
+    """Time one outbound call; an exception is counted under its class name as the status."""
+    call = UpstreamCall()
+    UPSTREAM_IN_FLIGHT.inc(service=service)
+    started = time.perf_counter()
+    try:
+        yield call
+    except BaseException as e:
+        call.status = type(e).__name__
+        raise
+    finally:
+        elapsed = time.perf_counter() - started
+        UPSTREAM_IN_FLIGHT.dec(service=service)
+        UPSTREAM_REQUESTS.inc(service=service, endpoint=endpoint, status=call.status if call.status is not None else "ok")
+        UPSTREAM_DURATION.observe(elapsed, service=service, endpoint=endpoint)
+        if call.size is not None:
+            UPSTREAM_RESPONSE_SIZE.observe(call.size, service=service, endpoint=endpoint)
+        trace = _trace.get()
+        if trace is not None:
+            trace.add(service, elapsed)
+
+
+_YAHOO_KEY = re.compile(r"^\d+(\.[a-z]\.\d+)*$")
+_YAHOO_KEPT_PARAMS = ("out", "type", "use_login")
+
+
+def yahoo_endpoint(rel_path: str) -> str:
+    """Low-cardinality label for a Yahoo path: resource names without keys, weeks or player lists.
+
+    ``fantasy/v2/league/428.l.1/teams;out=matchups;weeks=1,2`` -> ``league/teams;out=matchups``.
+    """
+    parts = []
+    for segment in rel_path.split("?", 1)[0].split("/"):
+        name, *params = segment.split(";")
+        if not name or name in ("fantasy", "v2") or _YAHOO_KEY.match(name):
+            continue
+        kept = [param for param in params if param.split("=", 1)[0] in _YAHOO_KEPT_PARAMS]
+        parts.append(";".join([name, *kept]))
+    return "/".join(parts)
+
+
+def nba_response_size(endpoint: Any) -> Optional[int]:
+    """Body size of an ``nba_api`` endpoint's last response, if it kept one."""
+    response = getattr(endpoint, "nba_response", None)
+    try:
+        return len(response.get_response()) if response is not None else None
+    except Exception:
+        return None
+
+
+# ─────────────────────────── sampled tracing ────────────────────────────
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "0.01") or 0)
+TRACE_LOG_MS = float(os.getenv("TRACE_LOG_MS", "1000") or 1000)
+_trace: ContextVar[Optional["Trace"]] = ContextVar("fantasy_trace", default=None)
+
+
+class Trace:
+    """Span totals for one request; shared by the threads its FanOut calls run on."""
+
+    __slots__ = ("started", "spans", "_lock")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.spans: Dict[str, List[float]] = {}  # name -> [seconds, count]
+        self._lock = threading.Lock()
+
+    def add(self, name: str, seconds: float) -> None:
+        with self._lock:
+            entry = self.spans.setdefault(name, [0.0, 0])
+            entry[0] += seconds
+            entry[1] += 1
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self.started) * 1000
+
+    def server_timing(self) -> str:
+        with self._lock:
+            spans = sorted(self.spans.items())
+        entries = [f'{name};dur={seconds * 1000:.1f};desc="{count}x"' for name, (seconds, count) in spans]
+        entries.append(f"total;dur={self.elapsed_ms():.1f}")
+        return ", ".join(entries)
+
+
+def start_trace(force: bool = False) -> Optional[Trace]:
+    """Begin tracing the current request if it is sampled (or ``force``); returns the trace or ``None``."""
+    if not force and (TRACE_SAMPLE_RATE <= 0 or random.random() >= TRACE_SAMPLE_RATE):
+        return None
+    trace = Trace()
+    _trace.set(trace)
+    return trace
+
+
+def end_trace() -> None:
+    _trace.set(None)
+
+
+def current_trace() -> Optional[Trace]:
+    return _trace.get()
+
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    """Time a block into the current trace; nearly free when the request isn't traced."""
+    trace = _trace.get()
+    if trace is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.add(name, time.perf_counter() - started)
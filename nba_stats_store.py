@@ -0,0 +1,237 @@
+# nba_stats_store.py
+"""Local store of NBA per-game averages for every player in a season.
+
+One league-wide ``LeagueDashPlayerStats`` call (or a saved copy of its JSON
+response) refreshes the whole season; only rows whose numbers changed are
+rewritten.  Reads are served from an in-memory snapshot of the SQLite table.
+"""
+import json, logging, os, sqlite3, threading, time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from metrics import nba_response_size, track_upstream
+
+log = logging.getLogger("fantasy-app.nba-store")
+
+# Same keys /api/nba_player_stats has always returned.
+STAT_KEYS_FLOAT: Tuple[str, ...] = (
+    "PTS", "REB", "AST", "STL", "BLK", "TOV", "FG3M",
+    "FGM", "FGA", "FTM", "FTA", "FG3A", "FG_PCT", "FT_PCT",
+    "FG3_PCT", "DD2", "TD3", "MIN",
+)
+_SNAPSHOT_RECHECK_SECONDS = 30
+RETRY_BACKOFF_SECONDS = 5 * 60  # wait after a failed background refresh before starting another
+
+
+def normalize_stat_row(row: Dict[str, Any]) -> Dict[str, Any]:
+    stats: Dict[str, Any] = {"GP": int(row.get("GP", 0) or 0)}
+    for key in STAT_KEYS_FLOAT:
+        stats[key] = float(row.get(key, 0.0) or 0.0)
+    return stats
+
+
+def rows_from_result_sets(payload: Dict[str, Any], name: str = "LeagueDashPlayerStats") -> List[Dict[str, Any]]:
+    """Turn an nba_api ``resultSets`` payload into a list of column -> value dicts."""
+    result_sets = payload.get("resultSets") or payload.get("resultSet") or []
+    if isinstance(result_sets, dict):
+        result_sets = [result_sets]
+    for result_set in result_sets:
+        if result_set.get("name") == name or len(result_sets) == 1:
+            headers = result_set.get("headers") or []
+            return [dict(zip(headers, values)) for values in result_set.get("rowSet") or []]
+    return []
+
+
+def fetch_league_per_game(season: str) -> Dict[str, Any]:
+    from nba_api.stats.endpoints import leaguedashplayerstats
+    with track_upstream("nba_api", "LeagueDashPlayerStats") as call:
+        endpoint = leaguedashplayerstats.LeagueDashPlayerStats(season=season, per_mode_detailed="PerGame")
+        call.size = nba_response_size(endpoint)
+    return endpoint.get_dict()
+
+
+def load_fixture(path: str) -> Dict[str, Any]:
+    with open(path, "r", encoding="utf-8") as fh:
+        return json.load(fh)
+
+
+class NBAStatsStore:
+    def __init__(self, path: str):
+        self.path = path
+        self._connect()
+        # Forked workers (gunicorn preload_app) inherit the store; give each its own handle and locks.
+        os.register_at_fork(after_in_child=self._connect)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS player_season_stats ("
+                " season TEXT NOT NULL, player_id INTEGER NOT NULL, player_name TEXT,"
+                " team_abbreviation TEXT, stats TEXT NOT NULL, updated_at REAL NOT NULL,"
+                " PRIMARY KEY (season, player_id))"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS refresh_log ("
+                " season TEXT PRIMARY KEY, refreshed_at REAL NOT NULL, source TEXT, row_count INTEGER)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS player_index ("
+                " season TEXT PRIMARY KEY, players TEXT NOT NULL, built_at REAL NOT NULL, source TEXT)"
+            )
+        # season -> (refreshed_at, checked_at, {player_id: stats})
+        self._snapshots: Dict[str, Tuple[Optional[float], float, Dict[int, Dict[str, Any]]]] = {}
+
+    def _connect(self) -> None:
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._failed_at: Dict[str, float] = {}  # season -> time of the last failed background refresh
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=10)
+
+    # ─────────────── refresh ───────────────
+    def refresh(self, season: str, *, fixture_path: Optional[str] = None,
+                max_age_seconds: Optional[float] = None) -> Dict[str, Any]:
+        """Pull league-wide per-game averages and upsert changed rows. Returns write counts.
+
+        With ``max_age_seconds``, freshness is checked again once the refresh lock is held: a caller that
+        queued behind another refresh (or another worker's) returns ``skipped`` instead of pulling again.
+        """
+        with self._refresh_lock:
+            if max_age_seconds is not None and self.is_fresh(season, max_age_seconds):
+                return {"season": season, "source": None, "inserted": 0, "updated": 0, "unchanged": 0,
+                        "skipped": True}
+            source = fixture_path or "nba_api:LeagueDashPlayerStats"
+            payload = load_fixture(fixture_path) if fixture_path else fetch_league_per_game(season)
+            rows = rows_from_result_sets(payload)
+            return self._apply(season, rows, source)
+
+    def _apply(self, season: str, rows: Iterable[Dict[str, Any]], source: str) -> Dict[str, Any]:
+        now = time.time()
+        with self._lock:
+            existing = dict(self._conn.execute(
+                "SELECT player_id, stats FROM player_season_stats WHERE season=?", (season,)
+            ).fetchall())
+        inserted = updated = unchanged = 0
+        writes = []
+        for row in rows:
+            try:
+                player_id = int(row["PLAYER_ID"])
+            except (KeyError, TypeError, ValueError):
+                continue
+            blob = json.dumps(normalize_stat_row(row), sort_keys=True, separators=(",", ":"))
+            previous = existing.get(player_id)
+            if previous == blob:
+                unchanged += 1
+                continue
+            if previous is None:
+                inserted += 1
+            else:
+                updated += 1
+            writes.append((season, player_id, row.get("PLAYER_NAME"), row.get("TEAM_ABBREVIATION"), blob, now))
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO player_season_stats"
+                " (season, player_id, player_name, team_abbreviation, stats, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+                writes,
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO refresh_log (season, refreshed_at, source, row_count) VALUES (?, ?, ?, ?)",
+                (season, now, source, inserted + updated + unchanged),
+            )
+        self._snapshots.pop(season, None)
+        result = {"season": season, "source": source, "inserted": inserted, "updated": updated, "unchanged": unchanged}
+        log.info("NBA stats store refreshed: %s", result)
+        return result
+
+    def refresh_in_background(self, season: str, max_age_seconds: float, *, fixture_path: Optional[str] = None) -> bool:
+        """Kick off a refresh thread when the season is missing or older than ``max_age_seconds``.
+
+        After a failed refresh no new one starts for ``RETRY_BACKOFF_SECONDS`` (at most ``max_age_seconds``),
+        so an nba_api outage doesn't cost every stale request a full-timeout pull.
+        """
+        if self.is_fresh(season, max_age_seconds) or self._refresh_lock.locked():
+            return False
+        failed_at = self._failed_at.get(season)
+        if failed_at is not None and time.time() - failed_at < min(RETRY_BACKOFF_SECONDS, max_age_seconds):
+            return False
+
+        def _run() -> None:
+            try:
+                self.refresh(season, fixture_path=fixture_path, max_age_seconds=max_age_seconds)
+            except Exception:
+                log.exception("Background NBA stats refresh failed for %s", season)
+                self._failed_at[season] = time.time()
+            else:
+                self._failed_at.pop(season, None)
+
+        threading.Thread(target=_run, name=f"nba-stats-refresh-{season}", daemon=True).start()
+        return True
+
+    # ─────────────── reads ───────────────
+    def last_refreshed(self, season: str) -> Optional[float]:
+        with self._lock:
+            row = self._conn.execute("SELECT refreshed_at FROM refresh_log WHERE season=?", (season,)).fetchone()
+        return row[0] if row else None
+
+    def is_fresh(self, season: str, max_age_seconds: float) -> bool:
+        refreshed_at = self.last_refreshed(season)
+        return refreshed_at is not None and time.time() - refreshed_at < max_age_seconds
+
+    def _snapshot(self, season: str) -> Dict[int, Dict[str, Any]]:
+        now = time.time()
+        cached = self._snapshots.get(season)
+        if cached is not None and now - cached[1] < _SNAPSHOT_RECHECK_SECONDS:
+            return cached[2]
+        refreshed_at = self.last_refreshed(season)
+        if cached is not None and cached[0] == refreshed_at:
+            self._snapshots[season] = (refreshed_at, now, cached[2])
+            return cached[2]
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT player_id, stats FROM player_season_stats WHERE season=?", (season,)
+            ).fetchall()
+        players = {player_id: json.loads(blob) for player_id, blob in rows}
+        self._snapshots[season] = (refreshed_at, now, players)
+        return players
+
+    def get(self, season: str, player_id: int) -> Optional[Dict[str, Any]]:
+        stats = self._snapshot(season).get(int(player_id))
+        return dict(stats) if stats is not None else None
+
+    def get_many(self, season: str, player_ids: Iterable[int]) -> Dict[int, Optional[Dict[str, Any]]]:
+        """One snapshot lookup for a batch of players; unknown ids map to ``None``."""
+        snapshot = self._snapshot(season)
+        result: Dict[int, Optional[Dict[str, Any]]] = {}
+        for player_id in player_ids:
+            stats = snapshot.get(int(player_id))
+            result[int(player_id)] = dict(stats) if stats is not None else None
+        return result
+
+    # ─────────────── active-player list ───────────────
+    def save_player_index(self, season: str, players: List[Dict[str, Any]], source: str) -> None:
+        """Store the season's active-player list so other worker processes can skip the PlayerIndex call."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO player_index (season, players, built_at, source) VALUES (?, ?, ?, ?)",
+                (season, json.dumps(players, separators=(",", ":")), time.time(), source),
+            )
+
+    def load_player_index(self, season: str, max_age_seconds: float) -> Optional[Tuple[float, List[Dict[str, Any]]]]:
+        """``(built_at, players)`` for the season if stored less than ``max_age_seconds`` ago."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT built_at, players FROM player_index WHERE season=? AND built_at > ?",
+                (season, time.time() - max_age_seconds),
+            ).fetchone()
+        return (row[0], json.loads(row[1])) if row else None
+
+    def has_season(self, season: str) -> bool:
+        return self.last_refreshed(season) is not None
+
+    def status(self, season: str) -> Dict[str, Any]:
+        return {
+            "season": season,
+            "players": len(self._snapshot(season)),
+            "refreshed_at": self.last_refreshed(season),
+        }
+
+
+def build_store_from_env() -> NBAStatsStore:
+    return NBAStatsStore(os.getenv("NBA_STATS_DB_PATH", "nba_stats.sqlite3"))
@@ -0,0 +1,266 @@
+# player_names.py
+"""Player-name normalization, the autocomplete index and the Yahoo -> NBA name resolver."""
+import re, unicodedata
+from bisect import bisect_left
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+_NAME_NORMALIZER = re.compile(r"[^a-z0-9]+")
+_NAME_JOINERS = re.compile(r"['\u2019`.]")  # De'Aaron -> deaaron, P.J. -> pj
+NAME_SUFFIXES: Tuple[str, ...] = (" jr", " sr", " ii", " iii", " iv", " v")
+# Letters NFKD does not decompose into base + combining mark.
+_FOLD_TABLE = str.maketrans({"ø": "o", "đ": "d", "ł": "l", "ß": "ss", "æ": "ae", "œ": "oe", "ı": "i", "þ": "th"})
+
+# Short / alternate first names seen on Yahoo rosters -> NBA.com first names (both directions are tried).
+NICKNAMES: Dict[str, Tuple[str, ...]] = {
+    "cam": ("cameron",),
+    "nic": ("nicolas",),
+    "nick": ("nicolas", "nicholas"),
+    "herb": ("herbert",),
+    "moe": ("moritz",),
+    "mo": ("mohamed", "maurice"),
+    "greg": ("gregory",),
+    "gg": ("gregory",),
+    "kj": ("kenyon",),
+    "bones": ("nahshon",),
+    "matt": ("matthew",),
+    "mike": ("michael",),
+    "jeff": ("jeffrey",),
+    "alex": ("alexander", "alexandre"),
+    "ron": ("ronald",),
+    "tim": ("timothy",),
+    "bub": ("jared",),
+    "scotty": ("scottie",),
+    "vince": ("vincent",),
+}
+
+
+def fold_accents(value: str) -> str:
+    decomposed = unicodedata.normalize("NFKD", value.lower().translate(_FOLD_TABLE))
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+def normalize_player_name(value: str) -> str:
+    if not value:
+        return ""
+    normalized = _NAME_NORMALIZER.sub(" ", _NAME_JOINERS.sub("", fold_accents(value))).strip()
+    if not normalized:
+        return ""
+    for suffix in NAME_SUFFIXES:
+        if normalized.endswith(suffix):
+            normalized = normalized[: -len(suffix)].strip()
+    return normalized
+
+
+def trigrams(normalized: str) -> Set[str]:
+    padded = f"  {normalized} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class PlayerSearchIndex:
+    """Prefix + trigram index over a player list for ranked autocomplete.
+
+    Ranking: exact name, then full-name prefix, then any-word prefix (e.g. a
+    last name), then trigram similarity for typos and mid-word fragments.
+    """
+
+    MIN_SIMILARITY = 0.3
+
+    def __init__(self, players: Iterable[Dict[str, Any]]):
+        self.players: List[Dict[str, Any]] = []
+        self.names: List[str] = []
+        self._gram_counts: List[int] = []
+        self._word_grams: List[List[Set[str]]] = []
+        prefix_keys: List[Tuple[str, int, int]] = []  # (text, word position, player index)
+        self._trigrams: Dict[str, List[int]] = {}
+        for player in players:
+            normalized = normalize_player_name(player.get("full_name", ""))
+            if not normalized:
+                continue
+            idx = len(self.players)
+            self.players.append(player)
+            self.names.append(normalized)
+            prefix_keys.append((normalized, 0, idx))
+            words = normalized.split()
+            for position in range(1, len(words)):
+                prefix_keys.append((" ".join(words[position:]), position, idx))
+            grams = trigrams(normalized)
+            self._gram_counts.append(len(grams))
+            self._word_grams.append([trigrams(word) for word in words] if len(words) > 1 else [])
+            for gram in grams:
+                self._trigrams.setdefault(gram, []).append(idx)
+        prefix_keys.sort()
+        self._prefix_text = [key[0] for key in prefix_keys]
+        self._prefix_meta = [(key[1], key[2]) for key in prefix_keys]
+
+    def __len__(self) -> int:
+        return len(self.players)
+
+    def _prefix_matches(self, query: str) -> Iterable[Tuple[int, int]]:
+        start = bisect_left(self._prefix_text, query)
+        for pos in range(start, len(self._prefix_text)):
+            if not self._prefix_text[pos].startswith(query):
+                break
+            yield self._prefix_meta[pos]
+
+    def search(self, raw_query: str, limit: int = 10) -> List[Tuple[Dict[str, Any], float]]:
+        """Return up to ``limit`` ``(player, score)`` pairs, best first; scores are in ``(0, 1]``."""
+        query = normalize_player_name(raw_query)
+        if not query or limit <= 0:
+            return []
+        scored: Dict[int, float] = {}
+        for position, idx in self._prefix_matches(query):
+            name = self.names[idx]
+            if name == query:
+                score = 1.0
+            elif position == 0:
+                score = 0.9
+            else:
+                score = 0.8
+            # Shorter names complete "more" of the query: slight boost so "Jo" prefers "Joe X" over "Jonathan X".
+            score += 0.05 * len(query) / len(name)
+            if score > scored.get(idx, 0.0):
+                scored[idx] = score
+        if len(scored) < limit and len(query) >= 4:
+            for idx, similarity in self._trigram_candidates(query):
+                if idx not in scored and similarity >= self.MIN_SIMILARITY:
+                    scored[idx] = 0.7 * similarity
+        ranked = sorted(scored.items(), key=lambda item: (-item[1], self.names[item[0]]))[:limit]
+        return [(self.players[idx], round(min(score, 1.0), 4)) for idx, score in ranked]
+
+    def _trigram_candidates(self, query: str) -> List[Tuple[int, float]]:
+        query_grams = trigrams(query)
+        overlap: Dict[int, int] = {}
+        for gram in query_grams:
+            for idx in self._trigrams.get(gram, ()):
+                overlap[idx] = overlap.get(idx, 0) + 1
+        results = []
+        for idx, shared in overlap.items():
+            union = len(query_grams) + self._gram_counts[idx] - shared
+            similarity = shared / union if union else 0.0
+            # A one-word query ("curyr") is compared against each name word too, not just the whole name.
+            for word_grams in self._word_grams[idx]:
+                word_shared = len(query_grams & word_grams)
+                if word_shared:
+                    similarity = max(similarity, word_shared / (len(query_grams) + len(word_grams) - word_shared))
+            results.append((idx, similarity))
+        return results
+
+
+def name_variants(normalized: str) -> List[str]:
+    """Alternate keys for a normalized name: dropped middle names, squashed spaces and nickname swaps."""
+    if not normalized:
+        return []
+    parts = normalized.split()
+    variants = [normalized]
+    if len(parts) > 2:
+        variants.append(f"{parts[0]} {parts[-1]}")
+    squashed = normalized.replace(" ", "")
+    if squashed != normalized:
+        variants.append(squashed)
+    if len(parts) > 1:
+        rest = " ".join(parts[1:])
+        for alias in NICKNAMES.get(parts[0], ()):
+            variants.append(f"{alias} {rest}")
+        for short, full_names in NICKNAMES.items():
+            if parts[0] in full_names:
+                variants.append(f"{short} {rest}")
+    return list(dict.fromkeys(variants))
+
+
+def name_parts(normalized: str) -> Tuple[str, str]:
+    """``(first name, rest squashed)``: "shai gilgeous alexander" -> ("shai", "gilgeousalexander")."""
+    first, _, rest = normalized.partition(" ")
+    return first, rest.replace(" ", "")
+
+
+def _similarity(a: str, b: str) -> float:
+    grams_a, grams_b = trigrams(a), trigrams(b)
+    return len(grams_a & grams_b) / len(grams_a | grams_b)
+
+
+class PlayerNameResolver:
+    """Resolve free-text player names (Yahoo spellings) to NBA player ids.
+
+    Built once from the static NBA player list.  Lookups try the exact
+    normalized key, then ``name_variants``, then trigram candidates whose
+    similarity clears ``MIN_SIMILARITY``.  A trigram candidate must also agree
+    on one name part (first name, nicknames included, or last name) exactly,
+    with the other part at least ``PART_SIMILARITY`` alike, so a shared
+    surname alone ("Jayden Williams" vs Jalen Williams) never matches.
+    Active players win ties.
+    """
+
+    MIN_SIMILARITY = 0.7
+    PART_SIMILARITY = 0.5
+
+    def __init__(self, players: Iterable[Dict[str, Any]]):
+        self._ids: List[int] = []
+        self._names: List[str] = []
+        self._parts: List[Tuple[str, str]] = []
+        self._gram_counts: List[int] = []
+        self._by_key: Dict[str, List[int]] = {}
+        self._trigrams: Dict[str, List[int]] = {}
+        for player in players:
+            normalized = normalize_player_name(player.get("full_name", ""))
+            try:
+                player_id = int(player["id"])
+            except (KeyError, TypeError, ValueError):
+                continue
+            if not normalized:
+                continue
+            idx = len(self._ids)
+            self._ids.append(player_id)
+            self._names.append(normalized)
+            self._parts.append(name_parts(normalized))
+            grams = trigrams(normalized)
+            self._gram_counts.append(len(grams))
+            for gram in grams:
+                self._trigrams.setdefault(gram, []).append(idx)
+            bucket = self._by_key.setdefault(normalized, [])
+            # Active players first so a retired namesake never shadows a current one.
+            if player.get("is_active"):
+                bucket.insert(0, idx)
+            else:
+                bucket.append(idx)
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def resolve(self, full_name: str) -> Tuple[Optional[int], float]:
+        """Return ``(nba_id, score)``; score is 1.0 for exact/variant hits and the trigram similarity otherwise."""
+        normalized = normalize_player_name(full_name)
+        if not normalized:
+            return None, 0.0
+        for key in name_variants(normalized):
+            bucket = self._by_key.get(key)
+            if bucket:
+                return self._ids[bucket[0]], 1.0
+        first, rest = name_parts(normalized)
+        best_idx, best_score = None, 0.0
+        query_grams = trigrams(normalized)
+        overlap: Dict[int, int] = {}
+        for gram in query_grams:
+            for idx in self._trigrams.get(gram, ()):
+                overlap[idx] = overlap.get(idx, 0) + 1
+        for idx, shared in overlap.items():
+            score = shared / (len(query_grams) + self._gram_counts[idx] - shared)
+            if score > best_score and score >= self.MIN_SIMILARITY and self._parts_agree(first, rest, idx):
+                best_idx, best_score = idx, score
+        if best_idx is None:
+            return None, 0.0
+        return self._ids[best_idx], round(best_score, 4)
+
+    def _parts_agree(self, first: str, rest: str, idx: int) -> bool:
+        candidate_first, candidate_rest = self._parts[idx]
+        if not rest or not candidate_rest:
+            return False
+        if candidate_first == first or candidate_first in NICKNAMES.get(first, ()) \
+                or first in NICKNAMES.get(candidate_first, ()):
+            return _similarity(rest, candidate_rest) >= self.PART_SIMILARITY
+        if candidate_rest == rest:
+            return _similarity(first, candidate_first) >= self.PART_SIMILARITY
+        return False
+
+    def resolve_many(self, names: Iterable[str]) -> Dict[str, Tuple[Optional[int], float]]:
+        """``resolve`` for a batch: each distinct name once, mapped to its ``(nba_id, score)``."""
+        return {name: self.resolve(name) for name in dict.fromkeys(names)}
@@ -0,0 +1,194 @@
+# playoff_odds.py
+"""Monte Carlo playoff odds for head-to-head leagues.
+
+Completed weeks are scored from the matchup payloads as they stand; every
+remaining regular-season matchup is simulated ``simulations`` times at once.
+Each team's weekly category value is modeled as a normal distribution
+(season-stat means, spreads from the completed weeks) and each category is
+decided by drawing the difference between the two sides.
+"""
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+DEFAULT_SIMULATIONS = 20000
+MAX_SIMULATIONS = 100000
+# Team spreads are shrunk toward the league's pooled spread as if it were this many extra weeks.
+PRIOR_WEEKS = 3
+# Weekly spread used before any week is complete: a fraction of the mean for counting stats, absolute for percentages.
+DEFAULT_CV = 0.15
+DEFAULT_PCT_STD = 0.03
+PERCENTAGE_STATS = frozenset({"5", "8", "11"})
+
+
+def _num(raw: Any) -> float:
+    if raw is None or raw == "" or raw == "-":
+        return float("nan")
+    try:
+        return float(raw)
+    except (TypeError, ValueError):
+        return float("nan")
+
+
+def playoff_byes(num_playoff_teams: int) -> int:
+    """Teams seeded straight into round two: whatever fills the bracket up to the next power of two."""
+    if num_playoff_teams <= 1:
+        return 0
+    bracket = 1 << (num_playoff_teams - 1).bit_length()
+    return bracket - num_playoff_teams
+
+
+def category_distributions(team_keys: Sequence[str], categories: Sequence[Tuple[str, bool]],
+                           season_rows: Sequence[Dict[str, Any]], weekly_rows: Sequence[Dict[str, Any]],
+                           weeks_elapsed: float) -> Tuple[np.ndarray, np.ndarray]:
+    """Per-team weekly ``(mean, std)`` matrices of shape ``(teams, categories)``.
+
+    Means come from season totals (percentages as-is, counting stats divided by
+    ``weeks_elapsed``) and fall back to the weekly average; spreads come from the
+    completed weekly rows, shrunk toward the league's pooled spread.
+    """
+    index = {key: i for i, key in enumerate(team_keys)}
+    stat_ids = [stat_id for stat_id, _ in categories]
+    n_teams, n_cats = len(team_keys), len(stat_ids)
+
+    history: List[List[List[float]]] = [[[] for _ in stat_ids] for _ in team_keys]
+    for row in weekly_rows:
+        t = index.get(row["team_key"])
+        if t is None:
+            continue
+        for c, stat_id in enumerate(stat_ids):
+            value = _num(row["stats"].get(stat_id))
+            if value == value:
+                history[t][c].append(value)
+
+    weekly_mean = np.full((n_teams, n_cats), np.nan)
+    variance = np.full((n_teams, n_cats), np.nan)
+    counts = np.zeros((n_teams, n_cats))
+    for t in range(n_teams):
+        for c in range(n_cats):
+            values = history[t][c]
+            counts[t, c] = len(values)
+            if values:
+                weekly_mean[t, c] = float(np.mean(values))
+            if len(values) > 1:
+                variance[t, c] = float(np.var(values, ddof=1))
+
+    mean = np.full((n_teams, n_cats), np.nan)
+    weeks = max(float(weeks_elapsed), 1.0)
+    for row in season_rows:
+        t = index.get(row["team_key"])
+        if t is None:
+            continue
+        for c, stat_id in enumerate(stat_ids):
+            value = _num(row["stats"].get(stat_id))
+            mean[t, c] = value if stat_id in PERCENTAGE_STATS else value / weeks
+    mean = np.where(np.isnan(mean), weekly_mean, mean)
+    # Still unknown (team with no stats at all): league average for that category.
+    known = ~np.isnan(mean)
+    league_mean = np.nan_to_num(mean).sum(axis=0) / np.maximum(known.sum(axis=0), 1)
+    mean = np.where(known, mean, league_mean[None, :])
+
+    default_std = np.array([
+        DEFAULT_PCT_STD if stat_id in PERCENTAGE_STATS else DEFAULT_CV * max(float(league_mean[c]), 1.0)
+        for c, stat_id in enumerate(stat_ids)
+    ])
+    has_variance = ~np.isnan(variance)
+    pooled_observed = np.nan_to_num(variance).sum(axis=0) / np.maximum(has_variance.sum(axis=0), 1)
+    pooled = np.where(has_variance.any(axis=0), pooled_observed, default_std ** 2)
+    observed = np.nan_to_num(variance, nan=0.0) * np.maximum(counts - 1, 0)
+    shrunk = (observed + PRIOR_WEEKS * pooled[None, :]) / (np.maximum(counts - 1, 0) + PRIOR_WEEKS)
+    return mean, np.sqrt(shrunk)
+
+
+def _category_outcomes(a: np.ndarray, b: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Category wins for side a and side b over the last axis (inputs already direction-signed)."""
+    return (a > b).sum(axis=-1), (b > a).sum(axis=-1)
+
+
+def completed_records(team_keys: Sequence[str], categories: Sequence[Tuple[str, bool]],
+                      matchups: Sequence[Dict[str, Any]], one_win_per_matchup: bool) -> np.ndarray:
+    """``(teams, 3)`` wins / losses / ties from finished matchups (category or matchup results)."""
+    index = {key: i for i, key in enumerate(team_keys)}
+    direction = np.array([1.0 if higher else -1.0 for _, higher in categories])
+    records = np.zeros((len(team_keys), 3))
+    for matchup in matchups:
+        a_row, b_row = matchup["teams"]
+        a, b = index.get(a_row["team_key"]), index.get(b_row["team_key"])
+        if a is None or b is None:
+            continue
+        values = np.array([[_num(row["stats"].get(stat_id)) for stat_id, _ in categories] for row in (a_row, b_row)])
+        signed = np.where(np.isnan(values), -np.inf, values * direction)
+        a_wins, b_wins = _category_outcomes(signed[0], signed[1])
+        if one_win_per_matchup:
+            a_wins, b_wins = int(a_wins > b_wins), int(b_wins > a_wins)
+            ties = 1 - a_wins - b_wins
+        else:
+            ties = len(categories) - a_wins - b_wins
+        records[a] += (a_wins, b_wins, ties)
+        records[b] += (b_wins, a_wins, ties)
+    return records
+
+
+def simulate(mean: np.ndarray, std: np.ndarray, categories: Sequence[Tuple[str, bool]], records: np.ndarray,
+             remaining: Sequence[Sequence[Tuple[int, int]]], *, num_playoff_teams: int, simulations: int = DEFAULT_SIMULATIONS,
+             seed: Optional[int] = None, one_win_per_matchup: bool = False) -> Dict[str, np.ndarray]:
+    """Play out ``remaining`` (one list of ``(team_a, team_b)`` index pairs per week) ``simulations`` times.
+
+    Returns per-team arrays: ``playoff``, ``bye`` and ``seed`` (``teams x num_playoff_teams``)
+    probabilities plus the mean final ``wins`` / ``losses`` / ``ties``.
+    """
+    rng = np.random.default_rng(seed)
+    n_teams, n_cats = mean.shape
+    direction = np.array([1.0 if higher else -1.0 for _, higher in categories])
+    signed_mean = mean * direction
+    variance = std ** 2
+    units = 1 if one_win_per_matchup else n_cats  # results per matchup
+    wins = np.zeros((simulations, n_teams), dtype=np.int32)
+    losses = np.zeros((simulations, n_teams), dtype=np.int32)
+    played = np.zeros(n_teams, dtype=np.int32)
+
+    for pairs in remaining:
+        if not pairs:
+            continue
+        a = np.array([p[0] for p in pairs])
+        b = np.array([p[1] for p in pairs])
+        # Only the difference between the two sides decides a category, so draw a - b directly:
+        # N(mean_a - mean_b, sqrt(var_a + var_b)), one normal per (simulation, matchup, category).
+        diff_mean = (signed_mean[a] - signed_mean[b]).astype(np.float32)
+        diff_std = np.sqrt(variance[a] + variance[b]).astype(np.float32)
+        diff = rng.standard_normal((simulations, len(pairs), n_cats), dtype=np.float32)
+        diff *= diff_std
+        diff += diff_mean
+        a_wins = np.count_nonzero(diff > 0, axis=-1)
+        b_wins = np.count_nonzero(diff < 0, axis=-1)
+        if one_win_per_matchup:
+            a_wins, b_wins = a_wins > b_wins, b_wins > a_wins
+        # Each team plays at most once a week, so fancy-indexed += never hits the same column twice.
+        wins[:, a] += a_wins
+        wins[:, b] += b_wins
+        losses[:, a] += b_wins
+        losses[:, b] += a_wins
+        played[a] += 1
+        played[b] += 1
+
+    totals = np.stack([wins, losses, played[None, :] * units - wins - losses], axis=-1) + records[None, :, :]
+    games = totals.sum(axis=2)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        win_pct = np.where(games > 0, (totals[:, :, 0] + 0.5 * totals[:, :, 2]) / games, 0.0)
+    # Random tiebreak: Yahoo's real tiebreakers (points for, head-to-head) are not modeled.
+    order = np.argsort(-(win_pct + rng.random(win_pct.shape) * 1e-9), axis=1)
+    seeds = np.empty_like(order)
+    np.put_along_axis(seeds, order, np.broadcast_to(np.arange(n_teams), order.shape), axis=1)
+
+    playoff_teams = min(num_playoff_teams, n_teams)
+    counts = np.bincount((np.arange(n_teams) * n_teams + seeds).ravel(), minlength=n_teams * n_teams)
+    counts = counts.reshape(n_teams, n_teams)
+    seed_probs = counts[:, :playoff_teams] / simulations
+    return {
+        "playoff": seed_probs.sum(axis=1),
+        "bye": seed_probs[:, :playoff_byes(playoff_teams)].sum(axis=1),
+        "seed": seed_probs,
+        "wins": totals[:, :, 0].mean(axis=0),
+        "losses": totals[:, :, 1].mean(axis=0),
+        "ties": totals[:, :, 2].mean(axis=0),
+    }
@@ -0,0 +1,80 @@
+# prefork.py
+"""Warm-up bookkeeping and per-process memory readings for gunicorn ``preload_app``.
+
+With ``preload_app`` the master imports ``main`` and builds the read-mostly
+indexes once; forked workers inherit them copy-on-write.  ``Warmup`` records
+how long each step took and in which process, and ``process_memory`` reports
+how much of a worker's RSS is still shared with its siblings.
+"""
+import os, resource, time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+# smaps_rollup field -> reported key; values are kB.
+_SMAPS_FIELDS = {
+    "Rss": "rss_kb",
+    "Pss": "pss_kb",
+    "Shared_Clean": "shared_kb",
+    "Shared_Dirty": "shared_kb",
+    "Private_Clean": "private_kb",
+    "Private_Dirty": "private_kb",
+}
+
+
+def process_memory() -> Dict[str, Optional[int]]:
+    """RSS / PSS / shared / private kB for this process (Linux), else peak RSS from ``getrusage``.
+
+    ``shared_kb`` is what copy-on-write still shares with the master and other workers; ``pss_kb``
+    splits shared pages evenly, so summing it over workers gives their real combined footprint.
+    """
+    memory: Dict[str, Optional[int]] = {"rss_kb": None, "pss_kb": None, "shared_kb": None, "private_kb": None}
+    try:
+        with open("/proc/self/smaps_rollup", "r") as fh:
+            for line in fh:
+                field, _, rest = line.partition(":")
+                key = _SMAPS_FIELDS.get(field)
+                if key:
+                    memory[key] = (memory[key] or 0) + int(rest.split()[0])
+        return memory
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        with open("/proc/self/status", "r") as fh:
+            for line in fh:
+                if line.startswith("VmRSS:"):
+                    memory["rss_kb"] = int(line.split()[1])
+                    return memory
+    except (OSError, ValueError, IndexError):
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    memory["rss_kb"] = peak // 1024 if os.uname().sysname == "Darwin" else peak  # bytes on macOS
+    return memory
+
+
+class Warmup:
+    """Timings for the warm-up steps, remembering which process ran them."""
+
+    def __init__(self):
+        self.pid: Optional[int] = None
+        self.steps: Dict[str, float] = {}
+        self.finished_at: Optional[float] = None
+
+    @contextmanager
+    def step(self, name: str) -> Iterator[None]:
+        self.pid = os.getpid()
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.steps[name] = round((time.perf_counter() - started) * 1000, 1)
+            self.finished_at = time.time()
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "pid": self.pid,
+            # True in a worker whose indexes were built by the master before fork.
+            "inherited": self.pid is not None and self.pid != os.getpid(),
+            "total_ms": round(sum(self.steps.values()), 1),
+            "steps_ms": dict(self.steps),
+            "finished_at": self.finished_at,
+        }
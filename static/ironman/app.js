@@ -1,4 +1,4 @@
-const CSV_PATH = new URL("./ironmen_rankings.csv", import.meta.url).href;
+const CSV_PATH = "/api/ironman/rankings.csv";
 const DEFAULT_SORT = { key: "displayRank", direction: "asc" };
 
 const COLUMN_META = {
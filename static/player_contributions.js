@@ -86,8 +86,8 @@ document.addEventListener('DOMContentLoaded', () => {
 
   const STATE = {
     currentWeek: 0,
-    weeklyPlayerStats: {},
-    seasonPlayerStats: null,
+    contributions: {}, // '/api/player_contributions' responses keyed by 'season' or 'week:N'
+
     statCategories: [],
     selectedStat: null,
     viewMode: 'weekly', // Default view mode
@@ -136,52 +136,6 @@ document.addEventListener('DOMContentLoaded', () => {
     },
     hideLoading: () => {
       if (DOM.loadingWrapper) DOM.loadingWrapper.style.display = 'none';
-    },
-    getPlayerName: playerObj => {
-      if (!playerObj) return 'Unknown Player';
-      if (Array.isArray(playerObj) && playerObj.length > 0) {
-        const metadata = playerObj[0];
-        if (Array.isArray(metadata)) {
-          for (const item of metadata) if (item?.name) return item.name.full || item.name;
-        } else if (metadata?.name) return metadata.name.full || metadata.name;
-      }
-      return 'Unknown Player';
-    },
-    getStatValue: (playerObj, statId) => {
-      if (!playerObj || !Array.isArray(playerObj)) return 0; // Return 0 for consistency, will be parsed to float
-      const playerStats = playerObj[1]?.player_stats?.stats;
-      if (!Array.isArray(playerStats)) return 0;
-      for (const stat of playerStats) {
-        if (stat.stat?.stat_id === statId.toString()) {
-          const rawValue = stat.stat.value;
-          if (rawValue === null || rawValue === undefined || rawValue === '' || rawValue === '-') return 0; // Treat '-' as 0 for calculations
-          const numVal = parseFloat(rawValue);
-          return isNaN(numVal) ? 0 : numVal;
-        }
-      }
-      return 0;
-    },
-    calculateTotal: (players, statId) => {
-      if (CONFIG.PERCENTAGE_STATS.includes(statId)) {
-        let weightedSum = 0, totalWeight = 0;
-        players.forEach(player => {
-          let attemptsKey, madeKey;
-          if (statId === '11') { attemptsKey = '9'; madeKey = '10'; } // 3PTA for 3PT%, 3PTM
-          else if (statId === '5') { attemptsKey = '3'; madeKey = '4'; } // FGA for FG%, FGM
-          else if (statId === '8') { attemptsKey = '6'; madeKey = '7'; } // FTA for FT%, FTM
-          else return;
-
-          const attempts = Utils.getStatValue(player, attemptsKey);
-          const made = Utils.getStatValue(player, madeKey);
-
-          if (typeof attempts === 'number' && attempts > 0 && typeof made === 'number') {
-            weightedSum += made; 
-            totalWeight += attempts;
-          }
-        });
-        return totalWeight > 0 ? (weightedSum / totalWeight) : 0;
-      }
-      return players.reduce((sum, p) => sum + Utils.getStatValue(p, statId), 0);
     }
   };
 
@@ -222,189 +176,73 @@ document.addEventListener('DOMContentLoaded', () => {
       }
     },
     
-    fetchAllWeeksPlayerStats: async () => {
-      let messageCycleInterval;
-      try {
-        messageCycleInterval = Utils.showLoading();
-        
-        Utils.updateLoadingMessage('Fetching league settings...');
-        const settingsResult = await DataService.tryGetLeagueSettings();
-
-        if (!settingsResult.success) {
-            throw new Error("Failed to fetch initial league settings.");
-        }
-        if (!settingsResult.leagueData) {
-             throw new Error("League data is missing after settings fetch.");
-        }
-
-        STATE.statCategories = CONFIG.COLS; 
-        
-        const leagueData = settingsResult.leagueData;
-        const currentWeek = parseInt(leagueData.fantasy_content.league[0]?.current_week || "1", 10);
-        STATE.currentWeek = currentWeek;
-        
-        console.log(`Player Contributions: Fetching player data up to week: ${currentWeek}`);
-        
-        const weeklyPlayerStatsPromises = [];
-        let fetchesCompleted = 0;
-        Utils.updateLoadingMessage('Preparing to gather player data...', 0, currentWeek);
-
-        for (let week = 1; week <= currentWeek; week++) {
-          const promise = fetch(`/api/player_stats_week/${week}`)
-            .then(response => {
-              if (!response.ok) {
-                console.warn(`Could not load player data for week ${week}. Status: ${response.status}`);
-                return null; 
-              }
-              return response.json();
-            })
-            .then(weekData => ({ week, players: weekData ? DataService.extractPlayers(weekData) : null }))
-            .catch(error => {
-              console.error(`Error processing week ${week} player data:`, error);
-              return { week, players: null, error: true };
-            })
-            .finally(() => {
-              fetchesCompleted++;
-              Utils.updateLoadingMessage(`Fetching player data...`, fetchesCompleted, currentWeek);
-            });
-          weeklyPlayerStatsPromises.push(promise);
-        }
-        
-        const settledResults = await Promise.allSettled(weeklyPlayerStatsPromises);
-        const populatedWeeklyStats = {};
-        settledResults.forEach(result => {
-          if (result.status === 'fulfilled' && result.value) {
-            const { week, players, error } = result.value;
-            populatedWeeklyStats[week] = error ? null : players;
-          } else if (result.status === 'rejected') {
-            console.error('A weekly player stats promise was rejected:', result.reason);
-          }
-        });
-        
-        Utils.updateLoadingMessage('Finalizing data...', currentWeek, currentWeek);
-        clearInterval(messageCycleInterval); 
-        
-        return populatedWeeklyStats;
-
-      } catch (error) {
-        console.error('Player Contributions: Error in fetchAllWeeksPlayerStats:', error);
-        if (messageCycleInterval) clearInterval(messageCycleInterval);
-        Utils.hideLoading();
-        throw error;
+    fetchLeagueContext: async () => {
+      Utils.updateLoadingMessage('Fetching league settings...');
+      const settingsResult = await DataService.tryGetLeagueSettings();
+      if (!settingsResult.success) {
+          throw new Error("Failed to fetch initial league settings.");
       }
-    },
-    
-    fetchSeasonPlayerStats: async () => {
-      try {
-        Utils.updateLoadingMessage('Loading season player data...');
-        const response = await fetch(`/api/player_stats_season`);
-        if (!response.ok) {
-          throw new Error(`API returned ${response.status} for season player stats`);
-        }
-        const data = await response.json();
-        return DataService.extractPlayers(data);
-      } catch (error) {
-        console.error('Player Contributions: Error fetching season player data:', error);
-        return null;
+      if (!settingsResult.leagueData) {
+           throw new Error("League data is missing after settings fetch.");
       }
+      STATE.statCategories = CONFIG.COLS;
+      const leagueData = settingsResult.leagueData;
+      STATE.currentWeek = parseInt(leagueData.fantasy_content.league[0]?.current_week || "1", 10);
     },
-    
-    extractPlayers: (data) => {
-      const players = [];
-      try {
-        const teamRoster = data.fantasy_content?.team?.[1]?.players;
-        if (!teamRoster) return players;
-        Object.keys(teamRoster).forEach(key => {
-          if (key === 'count') return;
-          if (teamRoster[key]?.player) players.push(teamRoster[key].player);
-        });
-      } catch (error) {
-        console.error('Player Contributions: Error extracting players:', error);
+
+    // Aggregation happens server-side; each view is one small request, cached per view key.
+    fetchContributions: async (viewMode, week) => {
+      const key = viewMode === 'season' ? 'season' : `week:${week}`;
+      if (STATE.contributions[key]) return STATE.contributions[key];
+      const query = viewMode === 'season' ? 'mode=season' : `weeks=${week}-${week}`;
+      const response = await fetch(`/api/player_contributions?${query}`);
+      if (!response.ok) {
+        console.warn(`Could not load player contributions (${key}). Status: ${response.status}`);
+        return null;
       }
-      return players;
+      const data = await response.json();
+      STATE.contributions[key] = data;
+      return data;
     },
-    
-    processPlayerData: (players, statId) => { // `players` are full API player objects
-      if (!players || players.length === 0) return { labels: [], data: [], rawValues: [] };
-      
-      const overallTeamStatTotal = Utils.calculateTotal(players, statId);
-      if (overallTeamStatTotal === 0 && !CONFIG.PERCENTAGE_STATS.includes(statId)) {
-          return { labels: [], data: [], rawValues: [] };
-      }
 
-      const playerStats = players.map(player => {
-        const rawPlayerStatValue = Utils.getStatValue(player, statId);
-        let contributionPercentage = 0;
-        
-        if (CONFIG.PERCENTAGE_STATS.includes(statId)) {
-            let attemptsKey;
-            if (statId === '11') { attemptsKey = '9'; } // 3PTA for 3PT%
-            else if (statId === '5') { attemptsKey = '3'; } // FGA for FG%
-            else if (statId === '8') { attemptsKey = '6'; } // FTA for FT%
-            
-            const playerAttempts = attemptsKey ? Utils.getStatValue(player, attemptsKey) : 0;
-            
-            let totalAttemptsDenominator = 0;
-            if (attemptsKey) {
-                 totalAttemptsDenominator = players.reduce((sum, p_inner) => {
-                    return sum + Utils.getStatValue(p_inner, attemptsKey);
-                }, 0);
-            }
-            contributionPercentage = totalAttemptsDenominator > 0 ? (playerAttempts / totalAttemptsDenominator) * 100 : 0;
-        } else if (overallTeamStatTotal > 0) { // Counting stat
-            contributionPercentage = (rawPlayerStatValue / overallTeamStatTotal) * 100;
-        }
-        
-        return {
-          name: Utils.getPlayerName(player),
-          value: rawPlayerStatValue, // Actual stat value for the player (for tooltip)
-          percentage: contributionPercentage // Contribution percentage (for pie slice)
-        };
-      }).filter(p => p.percentage > 0 || (CONFIG.PERCENTAGE_STATS.includes(statId) && p.value !== null) ) 
-        .sort((a, b) => b.percentage - a.percentage); 
-      
-      let chartLabels = [];
-      let chartData = []; 
-      let chartRawValues = [];
+    processPlayerData: (contrib, statId) => { // `contrib` is a /api/player_contributions response
+      if (!contrib || !contrib.players?.length || !contrib.shares?.[statId]) return { labels: [], data: [], rawValues: [] };
+      const isPct = CONFIG.PERCENTAGE_STATS.includes(statId);
+      const shares = contrib.shares[statId];
+      const values = contrib.values[statId] || [];
+      const weights = contrib.weights?.[statId] || [];
 
-      if (playerStats.length > 12) {
-        const topPlayersStats = playerStats.slice(0, 11);
-        const otherPlayersProcessedStats = playerStats.slice(11); 
-
-        chartLabels = topPlayersStats.map(p => p.name);
-        chartData = topPlayersStats.map(p => p.percentage);
-        chartRawValues = topPlayersStats.map(p => p.value);
+      const playerStats = contrib.players.map((player, i) => ({
+        name: player.name,
+        value: values[i], // Actual stat value for the player (for tooltip)
+        weight: weights[i] || 0,
+        percentage: shares[i] || 0 // Contribution percentage (for pie slice)
+      })).filter(p => p.percentage > 0 || (isPct && p.value !== null))
+        .sort((a, b) => b.percentage - a.percentage);
 
-        if (otherPlayersProcessedStats.length > 0) {
-          const othersPercentageSum = otherPlayersProcessedStats.reduce((sum, p) => sum + p.percentage, 0);
-          if (othersPercentageSum > 0.01) { 
-            chartLabels.push('Others');
-            chartData.push(othersPercentageSum);
-
-            let othersAggregatedRawValue;
-            const originalApiObjectsForOthers = players.filter(api_p => {
-                const playerName = Utils.getPlayerName(api_p);
-                return otherPlayersProcessedStats.some(op_stat => op_stat.name === playerName);
-            });
+      let topPlayers = playerStats;
+      let others = [];
+      if (playerStats.length > 12) {
+        topPlayers = playerStats.slice(0, 11);
+        others = playerStats.slice(11);
+      }
+      const labels = topPlayers.map(p => p.name);
+      const data = topPlayers.map(p => p.percentage);
+      const rawValues = topPlayers.map(p => p.value);
 
-            if (originalApiObjectsForOthers.length > 0) {
-                if (CONFIG.PERCENTAGE_STATS.includes(statId)) {
-                    othersAggregatedRawValue = Utils.calculateTotal(originalApiObjectsForOthers, statId);
-                } else { 
-                    othersAggregatedRawValue = otherPlayersProcessedStats.reduce((sum, p) => sum + (p.value || 0), 0);
-                }
-            } else {
-                othersAggregatedRawValue = null; 
-            }
-            chartRawValues.push(othersAggregatedRawValue);
-          }
+      const othersPercentageSum = others.reduce((sum, p) => sum + p.percentage, 0);
+      if (othersPercentageSum > 0.01) {
+        labels.push('Others');
+        data.push(othersPercentageSum);
+        if (isPct) {
+          const attempts = others.reduce((sum, p) => sum + p.weight, 0);
+          const made = others.reduce((sum, p) => sum + (p.value || 0) * p.weight, 0);
+          rawValues.push(attempts > 0 ? made / attempts : null);
+        } else {
+          rawValues.push(others.reduce((sum, p) => sum + (p.value || 0), 0));
         }
-      } else { 
-        chartLabels = playerStats.map(p => p.name);
-        chartData = playerStats.map(p => p.percentage);
-        chartRawValues = playerStats.map(p => p.value);
       }
-      return { labels: chartLabels, data: chartData, rawValues: chartRawValues };
+      return { labels, data, rawValues };
     }
   };
 
@@ -473,17 +311,20 @@ document.addEventListener('DOMContentLoaded', () => {
         });
       }
     },
-    renderChart: () => {
+    renderChart: async () => {
       const canvas = document.getElementById('contributionsChart');
       if (!canvas) return console.warn('Contributions chart canvas not found');
+      if (!STATE.selectedStat) return console.warn('No stat selected for chart');
+
+      let contrib = null;
+      try {
+        contrib = await DataService.fetchContributions(STATE.viewMode, STATE.selectedWeek);
+      } catch (error) {
+        console.error('Player Contributions: Error fetching contributions:', error);
+      }
       const ctx = canvas.getContext('2d');
       if (DOM.chart) DOM.chart.destroy();
-      if (!STATE.selectedStat) return console.warn('No stat selected for chart');
-      
-      const players = STATE.viewMode === 'weekly' 
-                      ? (STATE.weeklyPlayerStats[STATE.selectedWeek] || []) 
-                      : (STATE.seasonPlayerStats || []);
-                      
+
       const statInfo = STATE.statCategories.find(cat => cat[0] === STATE.selectedStat);
       const statName = statInfo ? statInfo[1] : 'Stat';
       let chartTitle = `${statName} Contributions ${STATE.viewMode === 'weekly' ? `- Week ${STATE.selectedWeek}` : '- Season Totals'}`;
@@ -497,11 +338,11 @@ document.addEventListener('DOMContentLoaded', () => {
         }
       };
       
-      if (!players || players.length === 0) {
+      if (!contrib || !contrib.players?.length) {
         DOM.chart = new Chart(ctx, { type: 'pie', data: { labels: ['No Players'], datasets: [{ data: [1], rawValues: [null], backgroundColor: ['#e0e0e0'] }]}, options: noDataOptions });
         return;
       }
-      const { labels, data, rawValues } = DataService.processPlayerData(players, STATE.selectedStat);
+      const { labels, data, rawValues } = DataService.processPlayerData(contrib, STATE.selectedStat);
       
       if (!labels.length || data.every(d => d === 0)) { 
         DOM.chart = new Chart(ctx, { type: 'pie', data: { labels: ['No Contributions'], datasets: [{ data: [1], rawValues: [null], backgroundColor: ['#e0e0e0'] }]}, options: noDataOptions });
@@ -593,10 +434,15 @@ document.addEventListener('DOMContentLoaded', () => {
     let loadingInterval;
     try {
       loadingInterval = Utils.showLoading(); 
-      STATE.weeklyPlayerStats = await DataService.fetchAllWeeksPlayerStats();
-      STATE.seasonPlayerStats = await DataService.fetchSeasonPlayerStats(); 
+      await DataService.fetchLeagueContext();
+      Utils.updateLoadingMessage('Loading player contributions...');
+      STATE.selectedWeek = Math.max(1, Math.min(STATE.selectedWeek, STATE.currentWeek || 1));
+      const [weekly, season] = await Promise.all([
+        DataService.fetchContributions('weekly', STATE.selectedWeek),
+        DataService.fetchContributions('season')
+      ]);
       
-      if (Object.keys(STATE.weeklyPlayerStats).length === 0 && !STATE.seasonPlayerStats) {
+      if (!weekly && !season) {
         throw new Error('No player data could be loaded.');
       }
       
@@ -607,7 +453,7 @@ document.addEventListener('DOMContentLoaded', () => {
       
       ChartRenderer.initStatSelector(); 
       ChartRenderer.initWeekSelector(); 
-      ChartRenderer.renderChart();
+      await ChartRenderer.renderChart();
       
     } catch (error) {
       console.error('Player Contributions: Error during loadPlayerData:', error);
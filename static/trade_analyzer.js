@@ -115,6 +115,25 @@ document.addEventListener('DOMContentLoaded', () => {
           }
       },
       
+      // One round trip for every player in the trade; returns stats objects for ids that have data.
+      fetchNbaPlayerStatsBatch: async (playerIds) => {
+          if (!playerIds.length) return [];
+          try {
+              const response = await fetch(`/api/nba_player_stats?ids=${playerIds.join(',')}`);
+              if (!response.ok) {
+                  console.error(`Failed to fetch batch player stats: ${response.status} ${await response.text()}`);
+                  return [];
+              }
+              const data = await response.json();
+              return playerIds
+                  .filter(id => data[id])
+                  .map(id => ({ ...data[id], PLAYER_ID: id }));
+          } catch (error) {
+              console.error('Network or parsing error fetching batch player stats:', error);
+              return [];
+          }
+      },
+      
       // NEW: Fetch current season team data for ranking analysis
       fetchCurrentSeasonData: async () => {
           try {
@@ -529,8 +548,9 @@ document.addEventListener('DOMContentLoaded', () => {
           }
           
           // Fetch player stats
-          const tradingStatsRaw = (await Promise.all(tradingPlayerIds.map(id => DataService.fetchNbaPlayerStats(id)))).filter(s => s !== null);
-          const acquiringStatsRaw = (await Promise.all(acquiringPlayerIds.map(id => DataService.fetchNbaPlayerStats(id)))).filter(s => s !== null);
+          const batchStats = await DataService.fetchNbaPlayerStatsBatch([...tradingPlayerIds, ...acquiringPlayerIds]);
+          const tradingStatsRaw = batchStats.filter(s => tradingPlayerIds.includes(s.PLAYER_ID));
+          const acquiringStatsRaw = batchStats.filter(s => acquiringPlayerIds.includes(s.PLAYER_ID));
 
           let missingPlayersMessage = "";
           if (tradingStatsRaw.length !== tradingPlayerIds.length) {
@@ -5,10 +5,10 @@
  * - Combining the fetch for league settings (stat categories) and current week into a single API call.
  * - This reduces serial network requests before fetching weekly scoreboard data.
  *
- * It maintains the existing parallel fetching of all weekly scoreboard data using `Promise.allSettled`.
- * No other public API or DOM contract changed, so `dashboard.html`, CSS,
- * and the Flask backend continue to work as‑is.
- * `main.py` does not need any modifications.
+ * Weekly scoreboards are fetched in parallel on the server by `/api/trends`, which
+ * returns a compact `team x category x week` series in a single response.
+ * No other public API or DOM contract changed, so `dashboard.html` and CSS
+ * continue to work as‑is.
  */
 
 document.addEventListener('DOMContentLoaded', () => {
@@ -244,8 +244,8 @@ document.addEventListener('DOMContentLoaded', () => {
     },
 
     /**
-     * Fetches all weekly scoreboard data for the user's team up to the current week.
-     * Data fetching for each week occurs in parallel.
+     * Fetches all weekly scoreboard data for the user's team up to the current week
+     * via the `/api/trends` series endpoint.
      */
     fetchAllWeeklyData: async () => {
       let loadingTickerIntervalId = null;
@@ -273,35 +273,29 @@ document.addEventListener('DOMContentLoaded', () => {
         }
 
         const numWeeksToFetch = STATE.currentWeek;
-        
-        // 2️⃣ Kick off *all* week requests in parallel
+
+        // 2️⃣ One server-side call fans out every week's scoreboard and returns a columnar series
         Utils.updateLoadingMessage('Fetching weekly data…', 0, numWeeksToFetch);
-        let completedFetches = 0;
         const weeklyStatsData = Array(numWeeksToFetch).fill(null);
 
-        const weekFetchPromises = Array.from({ length: numWeeksToFetch }, (_, i) => {
-          const weekNum = i + 1;
-          return fetch(`/api/scoreboard?week=${weekNum}`)
-            .then(response => (response.ok ? response.json() : null))
-            .then(jsonData => {
-              if (jsonData) {
-                const teams = DataService.extractTeams(jsonData); // extractTeams is unchanged
-                const myTeamData  = teams.find(team => team.isMine);
-                if (myTeamData) {
-                  weeklyStatsData[weekNum - 1] = { week: weekNum, stats: myTeamData.statMap };
-                }
-              }
-            })
-            .catch(error => console.warn(`Error fetching data for week ${weekNum}:`, error))
-            .finally(() => {
-              completedFetches += 1;
-              // Update loading message with progress for fetching weekly data
-              Utils.updateLoadingMessage(`Fetching weekly data…`, completedFetches, numWeeksToFetch);
+        try {
+          const response = await fetch(`/api/trends?weeks=1-${numWeeksToFetch}`);
+          if (!response.ok) throw new Error(`API returned ${response.status}`);
+          const series = await response.json();
+          const mine = (series.teams || []).findIndex(team => team.is_mine);
+          if (mine >= 0) {
+            (series.weeks || []).forEach((weekNum, col) => {
+              if ((series.missing_weeks || []).includes(weekNum)) return;
+              const stats = {};
+              (series.stat_ids || []).forEach(id => { stats[id] = series.values[id]?.[mine]?.[col]; });
+              weeklyStatsData[weekNum - 1] = { week: weekNum, stats };
             });
-        });
+          }
+        } catch (error) {
+          console.warn('Error fetching trends series:', error);
+        }
+        Utils.updateLoadingMessage('Fetching weekly data…', numWeeksToFetch, numWeeksToFetch);
 
-        await Promise.allSettled(weekFetchPromises);
-        
         clearInterval(loadingTickerIntervalId);
         Utils.hideLoading();
         return weeklyStatsData;
@@ -0,0 +1,47 @@
+import pytest
+
+from ironman import FULL_SEASON_GAMES, compute
+from ironman_store import GAME_STATS
+
+SEASONS = ["2025-26", "2024-25", "2023-24"]
+
+
+def _total(season, player_id, name, gp, team_gp, final):
+    row = {"season": season, "player_id": player_id, "player_name": name, "team": "AAA",
+           "last_game_date": "", "GP": gp, "TEAM_GP": team_gp, "final": final}
+    row.update({key: 10.0 * gp for key in GAME_STATS})
+    return row
+
+
+def _history(player_id, name, live_gp, team_gp, past):
+    rows = [_total(season, player_id, name, gp, FULL_SEASON_GAMES, True) for season, gp in zip(SEASONS[1:], past)]
+    if live_gp:
+        rows.append(_total(SEASONS[0], player_id, name, live_gp, team_gp, False))
+    return rows
+
+
+def _by_name(rows):
+    return {row["name_full"]: row for row in rows}
+
+
+def test_early_live_season_does_not_sink_an_ironman():
+    rows = _by_name(compute(_history(1, "Ever Present", 5, 5, [82, 82])
+                            + _history(2, "Sat Out", 0, 5, [60, 60]), SEASONS))
+    assert rows["Ever Present"]["Durability_Composite"] == pytest.approx(82)
+    assert rows["Ever Present"]["Seasons_Used"] == "2024-25,2023-24"
+    assert rows["Ever Present"]["DurabilityZ"] > rows["Sat Out"]["DurabilityZ"]
+
+
+def test_live_season_is_pro_rated_by_team_games():
+    rows = _by_name(compute(_history(1, "Half Way", 41, 41, [82, 82])
+                            + _history(2, "Missed Half", 20, 40, [82, 82]), SEASONS))
+    assert rows["Half Way"]["Weighted_GP"] == pytest.approx(82)
+    assert rows["Half Way"]["Durability_Penalty"] == pytest.approx(0)
+    assert rows["Half Way"]["Seasons_Used"] == ",".join(SEASONS)
+    assert rows["Missed Half"]["Weighted_GP"] == pytest.approx(0.6 * 41 + 0.4 * 82)
+
+
+def test_rookie_with_only_an_early_live_season_is_still_ranked():
+    rows = _by_name(compute(_history(1, "Rookie", 4, 5, []) + _history(2, "Vet", 0, 5, [70, 70]), SEASONS))
+    assert rows["Rookie"]["Seasons_Used"] == SEASONS[0]
+    assert rows["Rookie"]["Weighted_GP"] == pytest.approx(4 * FULL_SEASON_GAMES / 5)
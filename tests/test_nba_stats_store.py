@@ -0,0 +1,35 @@
+import json
+import os
+
+from nba_stats_store import NBAStatsStore
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "..", "fixtures", "nba", "league_dash_player_stats_per_game.json")
+SEASON = "2024-25"
+
+
+def _fixture_rows():
+    with open(FIXTURE, "r", encoding="utf-8") as fh:
+        result_set = json.load(fh)["resultSets"][0]
+    return [dict(zip(result_set["headers"], values)) for values in result_set["rowSet"]]
+
+
+def test_refresh_from_fixture_is_idempotent(tmp_path):
+    store = NBAStatsStore(str(tmp_path / "nba_stats.sqlite3"))
+    rows = _fixture_rows()
+
+    first = store.refresh(SEASON, fixture_path=FIXTURE)
+    assert (first["inserted"], first["updated"], first["unchanged"]) == (len(rows), 0, 0)
+    second = store.refresh(SEASON, fixture_path=FIXTURE)
+    assert (second["inserted"], second["updated"], second["unchanged"]) == (0, 0, len(rows))
+
+    player_ids = [row["PLAYER_ID"] for row in rows]
+    stats = store.get_many(SEASON, player_ids + [1])
+    assert stats[1] is None
+    assert stats[rows[0]["PLAYER_ID"]]["GP"] == rows[0]["GP"]
+    assert stats[rows[0]["PLAYER_ID"]]["PTS"] == float(rows[0]["PTS"])
+
+
+def test_refresh_with_max_age_skips_a_fresh_season(tmp_path):
+    store = NBAStatsStore(str(tmp_path / "nba_stats.sqlite3"))
+    store.refresh(SEASON, fixture_path=FIXTURE)
+    assert store.refresh(SEASON, fixture_path=FIXTURE, max_age_seconds=3600)["skipped"]
@@ -0,0 +1,350 @@
+# trade_engine.py
+"""Vectorized trade simulation over a league's season team stats.
+
+Every team is reduced to weekly *components* (counting stats plus made /
+attempted pairs for shooting percentages).  A trade adds the per-game NBA
+averages of the incoming players and subtracts the outgoing ones, scaled by
+``games_per_week``; category values and league ranks are then recomputed for
+every trade in the batch at once with NumPy.
+"""
+from itertools import combinations
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from contributions import SHOOTING_SPLITS
+
+DEFAULT_GAMES_PER_WEEK = 3.5
+# Trade finder: swap shapes as (players given, players received).
+FINDER_SHAPES: Tuple[Tuple[int, int], ...] = ((1, 1), (2, 1), (1, 2))
+# Candidates per opponent that survive the linear z-score pre-filter and get fully re-ranked.
+FINDER_KEEP_PER_OPPONENT = 400
+# Partner side's linear value may drop by at most this many league standard deviations before pruning.
+FINDER_MAX_PARTNER_Z_LOSS = 1.0
+# Weight of the partner's roto gain in the final score (acceptability), mine counts 1.0.
+FINDER_PARTNER_WEIGHT = 0.5
+# Percentile of rostered players used as the free-agent pickup that fills an opened roster spot.
+REPLACEMENT_PERCENTILE = 20
+
+# Yahoo stat_id -> NBA per-game keys. One key: counting stat; two keys: (made, attempted) percentage.
+CATEGORY_SOURCES: Dict[str, Tuple[str, ...]] = {
+    "12": ("PTS",),
+    "15": ("REB",),
+    "16": ("AST",),
+    "17": ("STL",),
+    "18": ("BLK",),
+    "10": ("FG3M",),
+    "19": ("TOV",),
+    "27": ("DD2_PG",),
+    "28": ("TD3_PG",),
+    "5": ("FGM", "FGA"),
+    "8": ("FTM", "FTA"),
+    "11": ("FG3M", "FG3A"),
+}
+
+# Weekly attempts assumed for a team when Yahoo exposes neither the composite nor the made count.
+_NOMINAL_WEEKLY_ATTEMPTS = {"5": 300.0, "8": 80.0, "11": 110.0}
+
+
+def _num(raw: Any) -> float:
+    try:
+        return float(raw)
+    except (TypeError, ValueError):
+        return float("nan")
+
+
+def player_per_game(stats: Dict[str, Any]) -> Dict[str, float]:
+    """NBA store stats -> per-game values keyed like ``CATEGORY_SOURCES`` (DD2/TD3 are season counts)."""
+    games = float(stats.get("GP") or 0)
+    values = {key: float(stats.get(key) or 0.0) for key in ("PTS", "REB", "AST", "STL", "BLK", "FG3M", "FG3A",
+                                                           "TOV", "FGM", "FGA", "FTM", "FTA")}
+    values["DD2_PG"] = float(stats.get("DD2") or 0.0) / games if games else 0.0
+    values["TD3_PG"] = float(stats.get("TD3") or 0.0) / games if games else 0.0
+    return values
+
+
+class LeagueModel:
+    """Weekly component matrix for every team plus the league's scoring categories."""
+
+    def __init__(self, teams: Sequence[Dict[str, Any]], categories: Sequence[Tuple[str, bool]], weeks_elapsed: float):
+        self.teams = list(teams)
+        self.categories = [(stat_id, higher) for stat_id, higher in categories if stat_id in CATEGORY_SOURCES]
+        self.team_index = {team["team_key"]: i for i, team in enumerate(self.teams)}
+        weeks = max(float(weeks_elapsed), 1.0)
+
+        self.component_keys: List[str] = []
+        for stat_id, _ in self.categories:
+            for key in CATEGORY_SOURCES[stat_id]:
+                if key not in self.component_keys:
+                    self.component_keys.append(key)
+        self._component_pos = {key: k for k, key in enumerate(self.component_keys)}
+
+        base = np.full((len(self.teams), len(self.component_keys)), np.nan)
+        for t, team in enumerate(self.teams):
+            stats = team.get("stats", {})
+            for stat_id, _ in self.categories:
+                sources = CATEGORY_SOURCES[stat_id]
+                if len(sources) == 1:
+                    base[t, self._component_pos[sources[0]]] = _num(stats.get(stat_id)) / weeks
+                else:
+                    made, attempted = self._shooting_totals(stat_id, stats, weeks)
+                    base[t, self._component_pos[sources[0]]] = made / weeks
+                    base[t, self._component_pos[sources[1]]] = attempted / weeks
+        self.base = base
+
+    @staticmethod
+    def _shooting_totals(stat_id: str, stats: Dict[str, Any], weeks: float) -> Tuple[float, float]:
+        """Season (made, attempted) for a percentage category."""
+        made_id, attempted_id, composite_id = SHOOTING_SPLITS[stat_id]
+        composite = stats.get(composite_id) if composite_id else None
+        if isinstance(composite, str) and "/" in composite:
+            made, _, attempted = composite.partition("/")
+            return _num(made), _num(attempted)
+        made, attempted = _num(stats.get(made_id)), _num(stats.get(attempted_id))
+        if attempted > 0:
+            return made, attempted
+        pct = _num(stats.get(stat_id))
+        if pct > 0 and made > 0:
+            return made, made / pct
+        # Neither piece available: keep the team's percentage at a nominal weekly volume.
+        attempted = _NOMINAL_WEEKLY_ATTEMPTS[stat_id] * weeks
+        return pct * attempted, attempted
+
+    def player_vector(self, per_game: Dict[str, float]) -> np.ndarray:
+        return np.array([per_game.get(key, 0.0) for key in self.component_keys], dtype=np.float64)
+
+    def category_values(self, components: np.ndarray) -> np.ndarray:
+        """``(..., teams, components)`` -> ``(..., teams, categories)``."""
+        columns = []
+        with np.errstate(divide="ignore", invalid="ignore"):
+            for stat_id, _ in self.categories:
+                sources = CATEGORY_SOURCES[stat_id]
+                if len(sources) == 1:
+                    columns.append(components[..., self._component_pos[sources[0]]])
+                else:
+                    made = components[..., self._component_pos[sources[0]]]
+                    attempted = components[..., self._component_pos[sources[1]]]
+                    columns.append(np.where(attempted > 0, made / attempted, np.nan))
+        return np.stack(columns, axis=-1)
+
+    def signed(self, values: np.ndarray) -> np.ndarray:
+        """Flip lower-is-better categories so that larger always wins; NaN becomes -inf."""
+        direction = np.array([1.0 if higher else -1.0 for _, higher in self.categories])
+        return np.where(np.isnan(values), -np.inf, values * direction)
+
+    def ranks(self, values: np.ndarray) -> np.ndarray:
+        """Competition ranks (1 = best, ties share the better rank) along the team axis; NaN ranks last."""
+        signed = self.signed(values)
+        # better[..., i, j, c] is True when team j beats team i in category c.
+        better = signed[..., None, :, :] > signed[..., :, None, :]
+        return 1 + better.sum(axis=-2)
+
+    def simulate(self, deltas: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Apply ``(trades, teams, components)`` deltas; returns (baseline ranks, ranks per trade, values per trade)."""
+        baseline = self.ranks(self.category_values(self.base))
+        values = self.category_values(self.base[None, :, :] + deltas)
+        return baseline, self.ranks(values), values
+
+
+def build_deltas(model: LeagueModel, trades: Sequence[Dict[str, Any]], player_stats: Dict[int, Optional[Dict[str, Any]]],
+                 games_per_week: float) -> Tuple[np.ndarray, List[List[int]]]:
+    """Turn trade specs into a ``(trades, teams, components)`` delta tensor; also returns missing player ids per trade."""
+    vectors = {pid: model.player_vector(player_per_game(stats)) for pid, stats in player_stats.items() if stats}
+    deltas = np.zeros((len(trades), len(model.teams), len(model.component_keys)))
+    missing: List[List[int]] = []
+    for b, trade in enumerate(trades):
+        trade_missing = [pid for pid in list(trade["give"]) + list(trade["get"]) if pid not in vectors]
+        missing.append(trade_missing)
+        incoming = sum((vectors[pid] for pid in trade["get"] if pid in vectors), np.zeros(len(model.component_keys)))
+        outgoing = sum((vectors[pid] for pid in trade["give"] if pid in vectors), np.zeros(len(model.component_keys)))
+        net = (incoming - outgoing) * games_per_week
+        deltas[b, model.team_index[trade["team_key"]]] += net
+        partner = trade.get("partner_team_key")
+        if partner:
+            deltas[b, model.team_index[partner]] -= net
+    return deltas, missing
+
+
+def roto_points(ranks: np.ndarray) -> np.ndarray:
+    """Sum of (teams - rank + 1) across categories: a single 'how good is this team' score."""
+    teams = ranks.shape[-2]
+    return (teams + 1 - ranks).sum(axis=-1)
+
+
+def simulate_trades(model: LeagueModel, trades: Sequence[Dict[str, Any]], player_stats: Dict[int, Optional[Dict[str, Any]]],
+                    games_per_week: float = DEFAULT_GAMES_PER_WEEK) -> Dict[str, Any]:
+    """Evaluate every trade in one pass; returns ``{baseline_ranks, results}`` ready for JSON.
+
+    ``rank_deltas`` / ``roto_delta`` only list teams whose ranks moved; positive means places gained.
+    """
+    deltas, missing = build_deltas(model, trades, player_stats, games_per_week)
+    baseline, after, values = model.simulate(deltas)
+    gained = baseline[None, :, :] - after
+    roto_gained = roto_points(after) - roto_points(baseline)[None, :]
+
+    stat_ids = [stat_id for stat_id, _ in model.categories]
+    team_keys = [team["team_key"] for team in model.teams]
+    results = []
+    for b, trade in enumerate(trades):
+        t = model.team_index[trade["team_key"]]
+        results.append({
+            **trade,
+            "missing_players": missing[b],
+            "ranks_after": dict(zip(stat_ids, after[b, t].tolist())),
+            "values_after": {
+                stat_id: (None if np.isnan(v) else round(float(v), 4)) for stat_id, v in zip(stat_ids, values[b, t])
+            },
+            "rank_deltas": {
+                team_keys[i]: {stat_id: int(d) for stat_id, d in zip(stat_ids, gained[b, i]) if d}
+                for i in np.flatnonzero(np.any(gained[b] != 0, axis=1))
+            },
+            "roto_delta": {team_keys[i]: int(roto_gained[b, i]) for i in np.flatnonzero(roto_gained[b])},
+        })
+    return {
+        "baseline_ranks": {key: dict(zip(stat_ids, baseline[i].tolist())) for i, key in enumerate(team_keys)},
+        "results": results,
+    }
+
+
+# ─────────────── trade finder ───────────────
+def replacement_vector(model: LeagueModel, vectors: np.ndarray) -> np.ndarray:
+    """A low-end rostered player: the per-component ``REPLACEMENT_PERCENTILE`` of every rostered vector."""
+    if not len(vectors):
+        return np.zeros(len(model.component_keys))
+    return np.percentile(vectors, REPLACEMENT_PERCENTILE, axis=0)
+
+
+def _swap_matrices(n_mine: int, n_theirs: int, shapes: Iterable[Tuple[int, int]]) -> Tuple[np.ndarray, np.ndarray, List[Tuple[Tuple[int, ...], Tuple[int, ...]]]]:
+    """0/1 selection matrices ``(swaps, n_mine)`` and ``(swaps, n_theirs)`` for every swap of the given shapes."""
+    swaps = [
+        (give, get)
+        for n_give, n_get in shapes
+        for give in combinations(range(n_mine), n_give)
+        for get in combinations(range(n_theirs), n_get)
+    ]
+    give_matrix = np.zeros((len(swaps), n_mine))
+    get_matrix = np.zeros((len(swaps), n_theirs))
+    for row, (give, get) in enumerate(swaps):
+        give_matrix[row, list(give)] = 1.0
+        get_matrix[row, list(get)] = 1.0
+    return give_matrix, get_matrix, swaps
+
+
+def score_opponent(job: Dict[str, Any]) -> Dict[str, Any]:
+    """Score every swap between ``me`` and one opponent; top-level so a process pool can run it.
+
+    Swaps are pre-filtered on a linear z-score of the category changes (cheap,
+    no ranking), then the survivors are re-ranked against the whole league.
+    """
+    model: LeagueModel = job["model"]
+    me, opp = job["me"], job["opp"]
+    mine, theirs = job["mine"], job["theirs"]
+    games_per_week = job["games_per_week"]
+    give_matrix, get_matrix, swaps = _swap_matrices(len(mine), len(theirs), job["shapes"])
+    considered = len(swaps)
+    if not considered:
+        return {"opp": opp, "considered": 0, "candidates": []}
+
+    # Rosters stay full: the side a player short picks up a replacement-level player, the other side drops one.
+    roster_change = (get_matrix.sum(axis=1) - give_matrix.sum(axis=1))[:, None]
+    swapped = get_matrix @ theirs - give_matrix @ mine
+    net = swapped - roster_change * job["replacement"]
+    partner_net = -swapped + roster_change * job["replacement"]
+    my_after = model.category_values(model.base[me] + net * games_per_week)
+    opp_after = model.category_values(model.base[opp] + partner_net * games_per_week)
+
+    base_values = model.category_values(model.base)
+    signed_base = model.signed(base_values)
+    finite = signed_base[np.isfinite(signed_base).all(axis=1)]
+    scale = finite.std(axis=0) if len(finite) > 1 else np.ones(len(model.categories))
+    scale = np.where(scale > 0, scale, 1.0)
+    with np.errstate(invalid="ignore"):
+        my_z = np.nan_to_num(((model.signed(my_after) - signed_base[me]) / scale).sum(axis=1), nan=-np.inf)
+        opp_z = np.nan_to_num(((model.signed(opp_after) - signed_base[opp]) / scale).sum(axis=1), nan=-np.inf)
+
+    keep = np.flatnonzero((my_z > 0) & (opp_z > -job["max_partner_z_loss"]))
+    if len(keep) > job["keep"]:
+        keep = keep[np.argsort(-(my_z[keep] + FINDER_PARTNER_WEIGHT * opp_z[keep]), kind="stable")[: job["keep"]]]
+    if not len(keep):
+        return {"opp": opp, "considered": considered, "candidates": []}
+
+    league = np.broadcast_to(base_values, (len(keep),) + base_values.shape).copy()
+    league[:, me] = my_after[keep]
+    league[:, opp] = opp_after[keep]
+    signed = model.signed(league)
+    my_ranks = 1 + (signed > signed[:, me][:, None, :]).sum(axis=1)
+    opp_ranks = 1 + (signed > signed[:, opp][:, None, :]).sum(axis=1)
+    baseline = model.ranks(base_values)
+    my_gained = baseline[me][None, :] - my_ranks
+    opp_gained = baseline[opp][None, :] - opp_ranks
+
+    candidates = []
+    for row, idx in enumerate(keep.tolist()):
+        give, get = swaps[idx]
+        candidates.append({
+            "give": list(give),
+            "get": list(get),
+            "my_gain": int(my_gained[row].sum()),
+            "partner_gain": int(opp_gained[row].sum()),
+            "my_z": round(float(my_z[idx]), 3),
+            "partner_z": round(float(opp_z[idx]), 3),
+            "my_rank_deltas": my_gained[row].tolist(),
+            "partner_rank_deltas": opp_gained[row].tolist(),
+        })
+    return {"opp": opp, "considered": considered, "candidates": candidates}
+
+
+def find_trades(model: LeagueModel, my_team_key: str, rosters: Dict[str, List[int]],
+                player_stats: Dict[int, Optional[Dict[str, Any]]], *, games_per_week: float = DEFAULT_GAMES_PER_WEEK,
+                shapes: Sequence[Tuple[int, int]] = FINDER_SHAPES, top_n: int = 20, min_partner_gain: int = 0,
+                map_fn: Callable[..., Iterable[Dict[str, Any]]] = map) -> Dict[str, Any]:
+    """Enumerate swaps between ``my_team_key`` and every other roster, best first.
+
+    ``rosters`` maps team_key -> NBA ids; players without store stats are skipped.
+    ``map_fn`` runs one job per opponent (pass ``ProcessPoolExecutor.map`` to fan out).
+    Results are ranked by ``my_gain + FINDER_PARTNER_WEIGHT * partner_gain`` and
+    limited to trades where I gain and the partner's roto change is at least ``min_partner_gain``.
+    """
+    vectors = {pid: model.player_vector(player_per_game(stats)) for pid, stats in player_stats.items() if stats}
+    me = model.team_index[my_team_key]
+    roster_ids = {key: [pid for pid in ids if pid in vectors] for key, ids in rosters.items() if key in model.team_index}
+    all_vectors = np.array([vectors[pid] for ids in roster_ids.values() for pid in ids]).reshape(-1, len(model.component_keys))
+    replacement = replacement_vector(model, all_vectors)
+
+    def _stack(ids: List[int]) -> np.ndarray:
+        return np.array([vectors[pid] for pid in ids]).reshape(len(ids), len(model.component_keys))
+
+    my_ids = roster_ids.get(my_team_key, [])
+    jobs = [
+        {
+            "model": model, "me": me, "opp": model.team_index[key], "mine": _stack(my_ids), "theirs": _stack(ids),
+            "shapes": tuple(shapes), "games_per_week": games_per_week, "replacement": replacement,
+            "keep": FINDER_KEEP_PER_OPPONENT, "max_partner_z_loss": FINDER_MAX_PARTNER_Z_LOSS,
+        }
+        for key, ids in roster_ids.items() if key != my_team_key and ids
+    ]
+    team_keys = [team["team_key"] for team in model.teams]
+    stat_ids = [stat_id for stat_id, _ in model.categories]
+    considered = scored = 0
+    results: List[Dict[str, Any]] = []
+    for outcome in map_fn(score_opponent, jobs):
+        partner_key = team_keys[outcome["opp"]]
+        considered += outcome["considered"]
+        scored += len(outcome["candidates"])
+        for candidate in outcome["candidates"]:
+            if candidate["my_gain"] <= 0 or candidate["partner_gain"] < min_partner_gain:
+                continue
+            results.append({
+                "partner_team_key": partner_key,
+                "give": [my_ids[i] for i in candidate["give"]],
+                "get": [roster_ids[partner_key][i] for i in candidate["get"]],
+                "my_gain": candidate["my_gain"],
+                "partner_gain": candidate["partner_gain"],
+                "score": round(candidate["my_gain"] + FINDER_PARTNER_WEIGHT * candidate["partner_gain"], 2),
+                "my_z": candidate["my_z"],
+                "partner_z": candidate["partner_z"],
+                "my_rank_deltas": {s: d for s, d in zip(stat_ids, candidate["my_rank_deltas"]) if d},
+                "partner_rank_deltas": {s: d for s, d in zip(stat_ids, candidate["partner_rank_deltas"]) if d},
+            })
+    results.sort(key=lambda r: (-r["score"], -r["my_z"] - FINDER_PARTNER_WEIGHT * r["partner_z"]))
+    return {"considered": considered, "scored": scored, "results": results[:top_n]}
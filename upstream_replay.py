@@ -0,0 +1,195 @@
+# upstream_replay.py
+"""Recorded Yahoo Fantasy and NBA Stats responses, served in place of the real hosts.
+
+``ReplayAdapter`` is a ``requests`` transport adapter.  ``install`` mounts it on
+the Yahoo session and on nba_api's session, so everything above the socket
+(rate limiter, 401 handling, response cache, parsers, metrics) runs unchanged.
+In ``replay`` mode it answers from a ``FixtureStore``; in ``record`` mode it
+forwards to the network and saves what comes back.
+
+Fixtures are keyed by method + URL with the query sorted.  Request headers
+(and so OAuth tokens) are never part of a fixture.  A fixture saved for a URL
+without a query also answers that path with any query, which is how
+hand-written and synthetic fixtures cover nba_api's long parameter lists.
+"""
+import hashlib, json, logging, os, re, threading, time
+from http import HTTPStatus
+from typing import Any, Callable, Dict, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+log = logging.getLogger("fantasy-app.replay")
+
+YAHOO_BASE = "https://fantasysports.yahooapis.com/"
+NBA_STATS_BASE = "https://stats.nba.com/"
+MODES = ("replay", "record")
+
+
+class FixtureMissing(requests.exceptions.ConnectionError):
+    """No recorded response for a request made in replay mode."""
+
+
+def fixture_key(method: str, url: str, *, with_query: bool = True) -> str:
+    parts = urlsplit(url)
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True))) if with_query else ""
+    return f"{method.upper()} {urlunsplit((parts.scheme, parts.netloc, parts.path, query, ''))}"
+
+
+class FixtureStore:
+    """Fixtures in memory and, if ``directory`` is given, one JSON file per request under it.
+
+    A fixture is ``{"method", "url", "status", "content_type", "json" | "text"}``; JSON bodies are
+    stored parsed and indented so recordings diff cleanly.  ``responder(method, url)`` is asked last
+    and may build a fixture on the fly (the benchmarks' synthetic leagues).
+    """
+
+    def __init__(self, directory: Optional[str] = None,
+                 responder: Optional[Callable[[str, str], Optional[Dict[str, Any]]]] = None):
+        self.directory = directory
+        self.responder = responder
+        self._memory: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def path_for(self, key: str) -> str:
+        method, _, url = key.partition(" ")
+        parts = urlsplit(url)
+        slug = re.sub(r"[^A-Za-z0-9]+", "_", parts.path).strip("_")[:80] or "root"
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:12]
+        return os.path.join(self.directory or "", parts.netloc, f"{slug}-{method.lower()}-{digest}.json")
+
+    def add(self, url: str, body: Any, *, status: int = 200, method: str = "GET",
+            content_type: str = "application/json") -> None:
+        """Register an in-memory fixture; ``body`` is JSON-serialisable unless it is already ``str``/``bytes``."""
+        fixture: Dict[str, Any] = {"method": method.upper(), "url": url, "status": status, "content_type": content_type}
+        if isinstance(body, (str, bytes)):
+            fixture["text"] = body.decode("utf-8") if isinstance(body, bytes) else body
+        else:
+            fixture["json"] = body
+        with self._lock:
+            self._memory[fixture_key(method, url)] = fixture
+
+    def get(self, method: str, url: str) -> Optional[Dict[str, Any]]:
+        for key in (fixture_key(method, url), fixture_key(method, url, with_query=False)):
+            with self._lock:
+                fixture = self._memory.get(key)
+            if fixture is not None:
+                return fixture
+            if self.directory:
+                try:
+                    with open(self.path_for(key), "r", encoding="utf-8") as fh:
+                        fixture = json.load(fh)
+                except FileNotFoundError:
+                    continue
+                with self._lock:
+                    self._memory[key] = fixture
+                return fixture
+        return self.responder(method.upper(), url) if self.responder is not None else None
+
+    def save(self, method: str, url: str, response: requests.Response) -> str:
+        """Write a live response as a fixture file (record mode); returns its path."""
+        if not self.directory:
+            raise ValueError("recording needs a fixture directory")
+        fixture: Dict[str, Any] = {
+            "method": method.upper(),
+            "url": fixture_key(method, url).partition(" ")[2],
+            "status": response.status_code,
+            "content_type": response.headers.get("Content-Type", ""),
+        }
+        try:
+            fixture["json"] = response.json()
+        except ValueError:
+            fixture["text"] = response.text
+        path = self.path_for(fixture_key(method, url))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as fh:
+            json.dump(fixture, fh, indent=1, ensure_ascii=False)
+        with self._lock:
+            self._memory[fixture_key(method, url)] = fixture
+        return path
+
+    def __len__(self) -> int:
+        return len(self._memory)
+
+
+def _build_response(request: requests.PreparedRequest, fixture: Dict[str, Any]) -> requests.Response:
+    response = requests.Response()
+    response.status_code = int(fixture.get("status", 200))
+    try:
+        response.reason = HTTPStatus(response.status_code).phrase
+    except ValueError:  # Yahoo's 999
+        response.reason = ""
+    if "json" in fixture:
+        body = json.dumps(fixture["json"], separators=(",", ":")).encode("utf-8")
+    else:
+        body = (fixture.get("text") or "").encode("utf-8")
+    response._content = body
+    response.headers = CaseInsensitiveDict({
+        "Content-Type": fixture.get("content_type") or "application/json",
+        "Content-Length": str(len(body)),
+    })
+    response.encoding = "utf-8"
+    response.url = request.url
+    response.request = request
+    return response
+
+
+class ReplayAdapter(BaseAdapter):
+    """Serve requests from a ``FixtureStore`` (``replay``) or forward and save them (``record``).
+
+    ``latency_ms`` delays every replayed response, to approximate upstream round trips in benchmarks.
+    """
+
+    def __init__(self, store: FixtureStore, *, mode: str = "replay", latency_ms: float = 0.0):
+        if mode not in MODES:
+            raise ValueError(f"mode must be one of {MODES}, not {mode!r}")
+        super().__init__()
+        self.store = store
+        self.mode = mode
+        self.latency = max(0.0, latency_ms) / 1000
+        self._forward = HTTPAdapter() if mode == "record" else None
+        self.served = 0
+        self.recorded = 0
+        self.missing = 0
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        if self._forward is not None:
+            response = self._forward.send(request, stream=False, timeout=timeout, verify=verify, cert=cert, proxies=proxies)
+            if response.status_code == 401:
+                return response  # an expired token, not something to replay
+            path = self.store.save(request.method, request.url, response)
+            self.recorded += 1
+            log.info(f"Recorded {request.method} {request.url} -> {path}")
+            return response
+        fixture = self.store.get(request.method, request.url)
+        if fixture is None:
+            self.missing += 1
+            raise FixtureMissing(f"no fixture for {fixture_key(request.method, request.url)} "
+                                 f"(record one with UPSTREAM_REPLAY=record)", request=request)
+        if self.latency:
+            time.sleep(self.latency)
+        self.served += 1
+        return _build_response(request, fixture)
+
+    def close(self) -> None:
+        if self._forward is not None:
+            self._forward.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"mode": self.mode, "served": self.served, "recorded": self.recorded, "missing": self.missing}
+
+
+def install(yahoo_session: requests.Session, store: FixtureStore, *, mode: str = "replay",
+            latency_ms: float = 0.0) -> ReplayAdapter:
+    """Route Yahoo calls on ``yahoo_session`` and every nba_api stats call through one ``ReplayAdapter``."""
+    from nba_api.stats.library.http import NBAStatsHTTP
+
+    adapter = ReplayAdapter(store, mode=mode, latency_ms=latency_ms)
+    yahoo_session.mount(YAHOO_BASE, adapter)
+    nba_session = requests.Session()
+    nba_session.mount(NBA_STATS_BASE, adapter)
+    NBAStatsHTTP.set_session(nba_session)
+    log.info(f"Upstream {mode} via {store.directory or 'in-memory fixtures'}")
+    return adapter
@@ -0,0 +1,395 @@
+# yahoo_cache.py
+"""TTL-aware response cache that sits underneath ``main.yahoo_api``.
+
+Entries are keyed by ``(league_key, viewer, rel_path)``.  ``viewer`` is only
+filled in for resources whose payload carries per-login flags
+(``is_current_login`` / ``is_owned_by_current_login``); everything else is
+shared by every manager in the league.  Shared league entries are only served
+to viewers Yahoo has already answered for that league (a membership marker
+written after their own upstream fetch), and callers without a viewer bypass
+the cache entirely.
+"""
+import json, logging, os, re, sqlite3, threading, time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional, Tuple
+
+log = logging.getLogger("fantasy-app.cache")
+
+CacheKey = Tuple[str, str, str]
+
+FOREVER: Optional[float] = None  # expires_at value for entries that never expire
+
+_LEAGUE_KEY_RE = re.compile(r"(\d+\.l\.\d+)")
+_WEEK_RE = re.compile(r";week=(\d+)")
+
+# Seconds; tuned so the dashboard never shows data older than a refresh or two.
+TTL_SETTINGS = 6 * 60 * 60
+TTL_TEAMS = 60 * 60
+TTL_KEEPERS = 60 * 60
+TTL_SEASON_STATS = 5 * 60
+TTL_WEEK_PLAYER_STATS = 10 * 60
+TTL_LIVE_WEEK = 60
+TTL_UPCOMING_WEEK = 5 * 60
+TTL_DEFAULT = 2 * 60
+TTL_MEMBERSHIP = 60 * 60
+
+# rel_path of the (league_key, viewer) entry recording that Yahoo served this viewer the league.
+MEMBER_MARKER = "__member__"
+
+# Substrings of rel_path whose payloads include the caller's login flags.
+_VIEWER_SCOPED_MARKERS: Tuple[str, ...] = ("/teams", "/scoreboard", "users;use_login=1", "matchups")
+
+
+def league_key_for(rel_path: str) -> str:
+    match = _LEAGUE_KEY_RE.search(rel_path)
+    return match.group(1) if match else ""
+
+
+def is_viewer_scoped(rel_path: str) -> bool:
+    return any(marker in rel_path for marker in _VIEWER_SCOPED_MARKERS)
+
+
+def _matchup_statuses(payload: Any) -> Iterable[str]:
+    # Walk the payload for every matchup "status" (preevent / midevent / postevent).
+    stack = [payload]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            matchup = node.get("matchup")
+            if isinstance(matchup, dict) and isinstance(matchup.get("status"), str):
+                yield matchup["status"]
+            stack.extend(node.values())
+        elif isinstance(node, list):
+            stack.extend(node)
+
+
+def ttl_for(rel_path: str, payload: Any) -> Optional[float]:
+    """Return the TTL in seconds for a payload, ``FOREVER`` for finalized weeks, or 0 to skip caching."""
+    if "users;use_login=1" in rel_path:
+        return TTL_DEFAULT
+    if rel_path.endswith("/settings"):
+        return TTL_SETTINGS
+    if "scoreboard" in rel_path or "out=matchups" in rel_path:
+        statuses = set(_matchup_statuses(payload))
+        if not statuses:
+            return TTL_DEFAULT
+        if statuses == {"postevent"}:
+            return FOREVER
+        if "midevent" in statuses:
+            return TTL_LIVE_WEEK
+        return TTL_UPCOMING_WEEK
+    if "type=season" in rel_path:
+        return TTL_SEASON_STATS
+    if "type=week" in rel_path and _WEEK_RE.search(rel_path):
+        return TTL_WEEK_PLAYER_STATS
+    if "status=K" in rel_path:
+        return TTL_KEEPERS
+    if rel_path.endswith("/teams"):
+        return TTL_TEAMS
+    return TTL_DEFAULT
+
+
+# ─────────────────────────── backends ────────────────────────────
+class MemoryBackend:
+    """In-process LRU bounded by entry count."""
+
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max(1, int(max_entries))
+        self._data: "OrderedDict[CacheKey, Tuple[Optional[float], Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key: CacheKey) -> Optional[Tuple[Optional[float], Any]]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                self._data.move_to_end(key)
+            return entry
+
+    def set(self, key: CacheKey, value: Any, expires_at: Optional[float]) -> None:
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key: CacheKey) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def delete_league(self, league_key: str) -> int:
+        with self._lock:
+            doomed = [k for k in self._data if k[0] == league_key]
+            for k in doomed:
+                del self._data[k]
+            return len(doomed)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class SQLiteBackend:
+    """On-disk LRU; survives restarts and can be shared by several worker processes.
+
+    Several backends may share one file under different ``table`` names.  The
+    size is only checked every ``evict_every`` writes, so the table may run that
+    many rows past ``max_entries`` (per process) before being trimmed back.
+    """
+
+    def __init__(self, path: str, max_entries: int = 5000, table: str = "yahoo_cache"):
+        if not re.fullmatch(r"[A-Za-z_][A-Za-z0-9_]*", table):
+            raise ValueError(f"invalid table name: {table!r}")
+        self.path = path
+        self.table = table
+        self.max_entries = max(1, int(max_entries))
+        self.evict_every = max(1, min(64, self.max_entries // 16))
+        self.evictions = 0
+        self._connect()
+        # Forked workers (gunicorn preload_app) inherit this object; give each its own handle and lock.
+        os.register_at_fork(after_in_child=self._connect)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} ("
+                " league_key TEXT NOT NULL, viewer TEXT NOT NULL, rel_path TEXT NOT NULL,"
+                " value TEXT NOT NULL, expires_at REAL, accessed_at REAL NOT NULL,"
+                " PRIMARY KEY (league_key, viewer, rel_path))"
+            )
+            self._conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_lru ON {table} (accessed_at)")
+
+    def _connect(self) -> None:
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=10)
+        self._writes = 0
+
+    def get(self, key: CacheKey) -> Optional[Tuple[Optional[float], Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT value, expires_at FROM {self.table} WHERE league_key=? AND viewer=? AND rel_path=?", key
+            ).fetchone()
+            if row is None:
+                return None
+            with self._conn:
+                self._conn.execute(
+                    f"UPDATE {self.table} SET accessed_at=? WHERE league_key=? AND viewer=? AND rel_path=?",
+                    (time.time(), *key),
+                )
+        return row[1], json.loads(row[0])
+
+    def set(self, key: CacheKey, value: Any, expires_at: Optional[float]) -> None:
+        blob = json.dumps(value, separators=(",", ":"))
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (league_key, viewer, rel_path, value, expires_at, accessed_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (*key, blob, expires_at, time.time()),
+            )
+            self._writes += 1
+            if self._writes % self.evict_every:
+                return
+            (count,) = self._conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()
+            overflow = count - self.max_entries
+            if overflow > 0:
+                self._conn.execute(
+                    f"DELETE FROM {self.table} WHERE rowid IN"
+                    f" (SELECT rowid FROM {self.table} ORDER BY accessed_at ASC LIMIT ?)",
+                    (overflow,),
+                )
+                self.evictions += overflow
+
+    def delete(self, key: CacheKey) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(f"DELETE FROM {self.table} WHERE league_key=? AND viewer=? AND rel_path=?", key)
+
+    def delete_league(self, league_key: str) -> int:
+        with self._lock, self._conn:
+            return self._conn.execute(f"DELETE FROM {self.table} WHERE league_key=?", (league_key,)).rowcount
+
+    def clear(self) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(f"DELETE FROM {self.table}")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+
+
+# ─────────────────────────── cache front ────────────────────────────
+class _Flight:
+    __slots__ = ("done", "value", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """Collapse concurrent calls that share a key into one execution.
+
+    The first caller (the leader) runs ``fn``; callers arriving while it is in
+    flight wait and receive the same result, or the same exception.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights: Dict[Hashable, _Flight] = {}
+        self.leaders = 0
+        self.followers = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                self.leaders += 1
+            else:
+                self.followers += 1
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+        try:
+            flight.value = fn()
+            return flight.value
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+
+
+class ResponseCache:
+    def __init__(self, backend: Any, ttl_policy: Callable[[str, Any], Optional[float]] = ttl_for):
+        self.backend = backend
+        self.ttl_policy = ttl_policy
+        self.hits = 0
+        self.misses = 0
+        self._counter_lock = threading.Lock()
+        self.flights = SingleFlight()
+
+    def key_for(self, rel_path: str, viewer: Optional[str]) -> CacheKey:
+        scoped_viewer = (viewer or "") if is_viewer_scoped(rel_path) else ""
+        return (league_key_for(rel_path), scoped_viewer, rel_path)
+
+    def _fresh(self, key: CacheKey) -> Optional[Any]:
+        entry = self.backend.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at is FOREVER or expires_at > time.time():
+                return value
+            self.backend.delete(key)
+        return None
+
+    def is_member(self, league_key: str, viewer: str) -> bool:
+        return self._fresh((league_key, viewer, MEMBER_MARKER)) is not None
+
+    def _readable(self, rel_path: str, viewer: Optional[str]) -> bool:
+        # Per-viewer and league-less entries are readable by their key alone; shared league entries need membership.
+        if not viewer:
+            return False
+        league_key = league_key_for(rel_path)
+        return not league_key or is_viewer_scoped(rel_path) or self.is_member(league_key, viewer)
+
+    def get(self, rel_path: str, viewer: Optional[str] = None) -> Optional[Any]:
+        value = self._fresh(self.key_for(rel_path, viewer)) if self._readable(rel_path, viewer) else None
+        self._count(hit=value is not None)
+        return value
+
+    def put(self, rel_path: str, value: Any, viewer: Optional[str] = None) -> None:
+        if not viewer:
+            return
+        ttl = self.ttl_policy(rel_path, value)
+        if ttl is not FOREVER and ttl <= 0:
+            return
+        expires_at = FOREVER if ttl is FOREVER else time.time() + ttl
+        self.backend.set(self.key_for(rel_path, viewer), value, expires_at)
+
+    def get_or_fetch(self, rel_path: str, fetch: Callable[[], Any], viewer: Optional[str] = None) -> Any:
+        """Cached value, else one upstream ``fetch`` shared by every concurrent caller for the same path.
+
+        Flights are keyed per viewer even for shared payloads, so one user's auth failure never reaches another.
+        A successful fetch of a league path records the viewer as a member of that league.
+        """
+        if not viewer:
+            return fetch()
+        cached = self.get(rel_path, viewer)
+        if cached is not None:
+            return cached
+
+        def _load() -> Any:
+            # A flight that finished between our miss and this one may already have filled the cache.
+            if self._readable(rel_path, viewer):
+                filled = self._fresh(self.key_for(rel_path, viewer))
+                if filled is not None:
+                    return filled
+            value = fetch()
+            self.put(rel_path, value, viewer)
+            league_key = league_key_for(rel_path)
+            if league_key:
+                self.backend.set((league_key, viewer, MEMBER_MARKER), True, time.time() + TTL_MEMBERSHIP)
+            return value
+
+        return self.flights.do((viewer, rel_path), _load)
+
+    def invalidate_league(self, league_key: str) -> int:
+        return self.backend.delete_league(league_key)
+
+    def clear(self) -> None:
+        self.backend.clear()
+        with self._counter_lock:
+            self.hits = self.misses = 0
+
+    def _count(self, *, hit: bool) -> None:
+        with self._counter_lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "backend": type(self.backend).__name__,
+            "entries": len(self.backend),
+            "max_entries": self.backend.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.backend.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            "flights": self.flights.leaders,
+            "coalesced": self.flights.followers,
+        }
+
+
+def shared_backend_from_env(table: str, max_entries: int) -> Any:
+    """A ``SQLiteBackend`` table in the response-cache file when ``YAHOO_CACHE_BACKEND=sqlite``, else ``MemoryBackend``.
+
+    For the app's other derived caches, so gunicorn workers share them the same way they share the response cache.
+    """
+    if os.getenv("YAHOO_CACHE_BACKEND", "memory").strip().lower() == "sqlite":
+        return SQLiteBackend(os.getenv("YAHOO_CACHE_PATH", "yahoo_cache.sqlite3"), max_entries=max_entries, table=table)
+    return MemoryBackend(max_entries=max_entries)
+
+
+def build_cache_from_env() -> ResponseCache:
+    """Build the cache selected by ``YAHOO_CACHE_BACKEND`` (``memory`` default, ``sqlite``, or ``off``)."""
+    kind = os.getenv("YAHOO_CACHE_BACKEND", "memory").strip().lower()
+    max_entries = int(os.getenv("YAHOO_CACHE_MAX_ENTRIES", "512") or 512)
+    if kind == "sqlite":
+        path = os.getenv("YAHOO_CACHE_PATH", "yahoo_cache.sqlite3")
+        log.info("Yahoo response cache: sqlite at %s (max %d entries)", path, max_entries)
+        return ResponseCache(SQLiteBackend(path, max_entries=max_entries))
+    if kind == "off":
+        log.info("Yahoo response cache disabled")
+        return ResponseCache(MemoryBackend(1), ttl_policy=lambda rel_path, payload: 0)
+    return ResponseCache(MemoryBackend(max_entries=max_entries))
@@ -0,0 +1,457 @@
+# yahoo_client.py
+"""Connection pooling, rate limiting and request-scoped fan-out for Yahoo Fantasy calls.
+
+``build_http_session`` gives every worker thread one shared keep-alive pool
+instead of a fresh TLS handshake per ``requests.get``.  ``YahooScheduler``
+sits in front of every call: a token bucket handed out in priority order,
+plus backoff on throttling and server errors.  With a ``SharedRateBucket``
+the tokens and any throttle pause live in SQLite, so every worker process
+draws from one app-wide bucket.  ``FanOut`` runs independent
+calls (``yahoo_api``, ``team_directory``, ...) concurrently inside the current
+Flask request context, with an overall deadline and cancellation of calls
+that are no longer needed.  ``Prefetcher`` runs deduplicated cache-warming
+jobs that outlive the request that started them.
+"""
+import contextvars, heapq, itertools, logging, os, random, sqlite3, threading, time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Dict, Hashable, Iterator, List, Optional, Tuple
+
+import requests
+from flask import copy_current_request_context
+from requests.adapters import HTTPAdapter
+
+log = logging.getLogger("fantasy-app.yahoo")
+
+
+def build_http_session(pool_size: int) -> requests.Session:
+    """A ``requests.Session`` whose HTTPS pool keeps up to ``pool_size`` connections alive."""
+    http = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, max_retries=0)
+    http.mount("https://", adapter)
+    http.mount("http://", adapter)
+    return http
+
+
+# ─────────────────────────── scheduler ────────────────────────────
+PRIORITY_INTERACTIVE = 0  # a user is waiting on the response
+PRIORITY_PREFETCH = 1     # cache warming ahead of a likely request
+PRIORITY_BATCH = 2        # bulk jobs nobody is waiting on
+PRIORITY_NAMES = {PRIORITY_INTERACTIVE: "interactive", PRIORITY_PREFETCH: "prefetch", PRIORITY_BATCH: "batch"}
+# How long a call may spend queued or backing off before it gives up, per priority.
+MAX_WAIT_SECONDS = {PRIORITY_INTERACTIVE: 20.0, PRIORITY_PREFETCH: 120.0, PRIORITY_BATCH: 600.0}
+
+# 999 is Yahoo's "Request denied" throttle; it and 429 pause every caller, 5xx only back off the one call.
+THROTTLE_STATUSES = frozenset({429, 999})
+RETRY_STATUSES = THROTTLE_STATUSES | frozenset({500, 502, 503, 504})
+
+_priority: contextvars.ContextVar = contextvars.ContextVar("yahoo_priority", default=PRIORITY_INTERACTIVE)
+
+
+@contextmanager
+def yahoo_priority(level: int) -> Iterator[None]:
+    """Run Yahoo calls made inside the block (including ``FanOut`` calls) at ``level``."""
+    token = _priority.set(level)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+class YahooThrottled(Exception):
+    """A call could not get a Yahoo slot within its priority's wait budget."""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class YahooLoginRequired(Exception):
+    """A Yahoo call was made for a caller with no OAuth token."""
+
+
+def retry_after_seconds(headers: Any, now: Optional[float] = None) -> Optional[float]:
+    """Parse ``Retry-After`` as delta-seconds or an HTTP date; ``None`` when absent or unparseable."""
+    raw = headers.get("Retry-After") if headers is not None else None
+    if not raw:
+        return None
+    try:
+        return max(0.0, float(raw))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(raw).timestamp() - (time.time() if now is None else now))
+    except (TypeError, ValueError, IndexError, OverflowError):
+        return None
+
+
+class SharedRateBucket:
+    """Token bucket and throttle pause in one SQLite row, shared by every process that opens ``path``.
+
+    Times are wall-clock so processes agree on them; each update is one ``BEGIN IMMEDIATE`` transaction.
+    """
+
+    def __init__(self, path: str, table: str = "yahoo_rate"):
+        self.path = path
+        self.table = table
+        self._connect()
+        # Forked workers (gunicorn preload_app) inherit this object; give each its own handle and lock.
+        os.register_at_fork(after_in_child=self._connect)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} (id INTEGER PRIMARY KEY CHECK (id = 0),"
+                " tokens REAL NOT NULL, refilled_at REAL NOT NULL, paused_until REAL NOT NULL)"
+            )
+
+    def _connect(self) -> None:
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=10, isolation_level=None)
+
+    def _update(self, rate: float, burst: int, change: Callable[[float, float, float], Tuple[float, float, Any]]) -> Any:
+        # change(now, refilled tokens, paused_until) -> (tokens, paused_until, result)
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(f"SELECT tokens, refilled_at, paused_until FROM {self.table} WHERE id=0").fetchone()
+                now = time.time()
+                if row is None:
+                    tokens, paused_until = float(burst), 0.0
+                else:
+                    tokens, paused_until = min(float(burst), row[0] + max(0.0, now - row[1]) * rate), row[2]
+                tokens, paused_until, result = change(now, tokens, paused_until)
+                self._conn.execute(f"INSERT OR REPLACE INTO {self.table} (id, tokens, refilled_at, paused_until)"
+                                   " VALUES (0, ?, ?, ?)", (tokens, now, paused_until))
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return result
+
+    def take(self, rate: float, burst: int) -> float:
+        """Take one token: ``0.0`` on success, else the seconds until one may be free (pause included)."""
+        def _take(now: float, tokens: float, paused_until: float) -> Tuple[float, float, float]:
+            if now < paused_until:
+                return tokens, paused_until, paused_until - now
+            if tokens >= 1:
+                return tokens - 1, paused_until, 0.0
+            return tokens, paused_until, (1 - tokens) / rate
+        return self._update(rate, burst, _take)
+
+    def pause(self, seconds: float, rate: float, burst: int) -> None:
+        self._update(rate, burst, lambda now, tokens, paused_until: (0.0, max(paused_until, now + seconds), None))
+
+    def state(self, rate: float, burst: int) -> Tuple[float, float]:
+        """``(tokens, seconds still paused)`` without taking anything."""
+        with self._lock:
+            row = self._conn.execute(f"SELECT tokens, refilled_at, paused_until FROM {self.table} WHERE id=0").fetchone()
+        if row is None:
+            return float(burst), 0.0
+        now = time.time()
+        return min(float(burst), row[0] + max(0.0, now - row[1]) * rate), max(0.0, row[2] - now)
+
+
+class YahooScheduler:
+    """Token bucket for Yahoo calls, granted strictly in priority order.
+
+    ``execute(send)`` waits for a slot, calls ``send()`` (which returns a
+    ``requests.Response``) and retries 429 / 999 / 5xx with exponential backoff
+    and full jitter, honoring ``Retry-After``.  Throttle responses drain the
+    bucket and pause every caller until the backoff has passed.  The bucket is
+    per process unless ``shared`` is given; then tokens and pauses come from
+    it, so the rate holds across worker processes, while the priority queue
+    still orders this process's callers.
+    """
+
+    def __init__(self, rate_per_second: float, burst: int, *, max_retries: int = 4,
+                 backoff_base: float = 0.5, backoff_cap: float = 30.0,
+                 max_wait: Optional[Dict[int, float]] = None, shared: Optional[SharedRateBucket] = None):
+        self.rate = max(float(rate_per_second), 0.01)
+        self.burst = max(1, int(burst))
+        self.max_retries = max(0, int(max_retries))
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.max_wait = dict(MAX_WAIT_SECONDS if max_wait is None else max_wait)
+        self.shared = shared
+        self._cond = threading.Condition()
+        self._tokens = float(self.burst)
+        self._refilled_at = time.monotonic()
+        self._paused_until = 0.0
+        self._queue: List[Tuple[int, int]] = []  # heap of (priority, arrival) tickets
+        self._arrivals = itertools.count()
+        self._random = random.Random()
+        self.sent = 0
+        self.retries: Dict[int, int] = {}
+        self.gave_up = 0
+        self.rejected = 0
+        self._waits = {level: [0, 0.0, 0.0] for level in PRIORITY_NAMES}  # count, total s, max s
+
+    # ─────────────── token bucket ───────────────
+    def _refill(self, now: float) -> None:
+        self._tokens = min(float(self.burst), self._tokens + (now - self._refilled_at) * self.rate)
+        self._refilled_at = now
+
+    def _take(self, now: float) -> float:
+        # One token from the shared bucket, or the local one: 0.0 when taken, else seconds to wait.
+        if self.shared is not None:
+            return self.shared.take(self.rate, self.burst)
+        self._refill(now)
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return 0.0
+        return (1 - self._tokens) / self.rate
+
+    def acquire(self, level: int, deadline: Optional[float] = None) -> float:
+        """Block until this caller holds a slot; returns seconds waited. Raises ``YahooThrottled`` past ``deadline``."""
+        with self._cond:
+            ticket = (level, next(self._arrivals))
+            heapq.heappush(self._queue, ticket)
+            started = time.monotonic()
+            try:
+                while True:
+                    now = time.monotonic()
+                    # Only the head sleeps on the clock; everyone else waits for it to move.
+                    delay = None
+                    if self._queue[0] == ticket:
+                        delay = self._paused_until - now
+                        if delay <= 0:
+                            delay = self._take(now)
+                        if delay <= 0:
+                            heapq.heappop(self._queue)
+                            waited = now - started
+                            stats = self._waits.setdefault(level, [0, 0.0, 0.0])
+                            stats[0] += 1
+                            stats[1] += waited
+                            stats[2] = max(stats[2], waited)
+                            self._cond.notify_all()  # the next ticket becomes head
+                            return waited
+                    if deadline is not None:
+                        remaining = deadline - now
+                        if remaining <= 0 or (delay is not None and delay > remaining):
+                            self.rejected += 1
+                            raise YahooThrottled(
+                                f"Yahoo rate limit: gave up after {now - started:.1f}s in the "
+                                f"{PRIORITY_NAMES.get(level, level)} queue",
+                                retry_after=max(delay or 0.0, 1.0),
+                            )
+                        delay = remaining if delay is None else delay
+                    self._cond.wait(timeout=delay)
+            except BaseException:
+                if ticket in self._queue:
+                    self._queue.remove(ticket)
+                    heapq.heapify(self._queue)
+                    self._cond.notify_all()
+                raise
+
+    def pause(self, seconds: float) -> None:
+        """Hold every caller for ``seconds`` and restart from an empty bucket."""
+        with self._cond:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._tokens = 0.0
+            self._refilled_at = time.monotonic()
+            if self.shared is not None:
+                self.shared.pause(seconds, self.rate, self.burst)
+            self._cond.notify_all()
+
+    def backoff(self, attempt: int, retry_after: Optional[float]) -> float:
+        # Retry-After wins; a little jitter on top stops every worker retrying on the same tick.
+        if retry_after is not None:
+            return retry_after + self._random.uniform(0, self.backoff_base)
+        return self._random.uniform(0, min(self.backoff_cap, self.backoff_base * (2 ** attempt)))
+
+    # ─────────────── calls ───────────────
+    def execute(self, send: Callable[[], Any], *, priority: Optional[int] = None) -> Any:
+        """Run ``send()`` under the rate limit; the last response is returned once retries or the wait budget run out."""
+        level = _priority.get() if priority is None else priority
+        budget = self.max_wait.get(level)
+        deadline = time.monotonic() + budget if budget is not None else None
+        attempt = 0
+        while True:
+            self.acquire(level, deadline)
+            resp = send()
+            status = resp.status_code
+            with self._cond:
+                self.sent += 1
+                if status in RETRY_STATUSES:
+                    self.retries[status] = self.retries.get(status, 0) + 1
+            if status not in RETRY_STATUSES:
+                return resp
+            delay = self.backoff(attempt, retry_after_seconds(resp.headers))
+            if attempt >= self.max_retries or (deadline is not None and time.monotonic() + delay > deadline):
+                with self._cond:
+                    self.gave_up += 1
+                return resp
+            if status in THROTTLE_STATUSES:
+                self.pause(delay)  # acquire() holds this call and everyone else
+            else:
+                time.sleep(delay)
+            attempt += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            now = time.monotonic()
+            self._refill(now)
+            tokens, paused_for = self._tokens, max(0.0, self._paused_until - now)
+            if self.shared is not None:
+                tokens, shared_pause = self.shared.state(self.rate, self.burst)
+                paused_for = max(paused_for, shared_pause)
+            depth = {name: 0 for name in PRIORITY_NAMES.values()}
+            for level, _ in self._queue:
+                name = PRIORITY_NAMES.get(level, str(level))
+                depth[name] = depth.get(name, 0) + 1
+            waits = {
+                PRIORITY_NAMES.get(level, str(level)): {
+                    "count": count,
+                    "avg_ms": round(total / count * 1000, 1) if count else None,
+                    "max_ms": round(peak * 1000, 1),
+                }
+                for level, (count, total, peak) in self._waits.items()
+            }
+            return {
+                "rate_per_second": self.rate,
+                "burst": self.burst,
+                "shared": self.shared is not None,
+                "tokens": round(tokens, 2),
+                "paused_for_s": round(paused_for, 2),
+                "queue_depth": depth,
+                "wait": waits,
+                "sent": self.sent,
+                "retries": {str(status): count for status, count in sorted(self.retries.items())},
+                "gave_up": self.gave_up,
+                "rejected": self.rejected,
+            }
+
+
+# ─────────────────────────── fan-out ────────────────────────────
+class FanOut:
+    """Bounded thread pool for one request's independent Yahoo calls.
+
+    Calls may be submitted while earlier ones are still running (e.g. follow-up
+    calls that depend on the first response).  ``timeout`` is an overall
+    deadline in seconds from construction; calls still pending at the deadline
+    are cancelled and report ``TimeoutError``.  Leaving the ``with`` block
+    cancels anything not yet started and does not wait for running calls.
+    """
+
+    def __init__(self, max_workers: int, timeout: Optional[float] = None):
+        self._pool = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="yahoo-fanout")
+        self._deadline = time.monotonic() + timeout if timeout else None
+        self._futures: Dict[Hashable, Future] = {}
+        self._yielded: set = set()
+
+    def __enter__(self) -> "FanOut":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.cancel()
+
+    def submit(self, key: Hashable, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Future:
+        # A fresh context copy per call; Flask request contexts must not be pushed twice.
+        # contextvars (e.g. the Yahoo call priority) follow the call into the pool thread.
+        future = self._pool.submit(contextvars.copy_context().run, copy_current_request_context(fn), *args, **kwargs)
+        self._futures[key] = future
+        return future
+
+    def cancel(self) -> None:
+        """Cancel every call that has not started; running calls finish in the background."""
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def _remaining(self) -> Optional[float]:
+        return None if self._deadline is None else max(0.0, self._deadline - time.monotonic())
+
+    def as_completed(self) -> Iterator[Tuple[Hashable, Future]]:
+        """Yield ``(key, future)`` as calls finish, including calls submitted during iteration.
+
+        At the deadline every unfinished call is cancelled and yielded with a ``TimeoutError``.
+        """
+        while True:
+            pending = {f: k for k, f in self._futures.items() if k not in self._yielded}
+            if not pending:
+                return
+            done, _ = wait(pending, timeout=self._remaining(), return_when=FIRST_COMPLETED)
+            if not done:
+                for future, key in pending.items():
+                    future.cancel()
+                    self._yielded.add(key)
+                    timed_out: Future = Future()
+                    timed_out.set_exception(TimeoutError(f"Yahoo call {key!r} exceeded the request deadline"))
+                    self._futures[key] = timed_out
+                    yield key, timed_out
+                return
+            for future in done:
+                key = pending[future]
+                self._yielded.add(key)
+                yield key, future
+
+    def gather(self) -> Dict[Hashable, Any]:
+        """Wait for everything; returns key -> result, or the exception the call raised."""
+        results: Dict[Hashable, Any] = {}
+        for key, future in self.as_completed():
+            exc = future.exception()
+            results[key] = exc if exc is not None else future.result()
+        return results
+
+
+# ─────────────────────────── background prefetch ────────────────────────────
+class Prefetcher:
+    """Process-wide pool for cache-warming jobs that keep running after the request returns.
+
+    ``submit`` skips a key that is still running or finished less than
+    ``dedupe_seconds`` ago.  Jobs run in a copy of the submitting request's
+    context at ``PRIORITY_PREFETCH``, so they never crowd out interactive calls.
+    """
+
+    def __init__(self, max_workers: int, dedupe_seconds: float):
+        self.max_workers = max(1, max_workers)
+        self.dedupe_seconds = dedupe_seconds
+        self._pool: Optional[ThreadPoolExecutor] = None  # created on first use, never in a pre-fork master
+        self._lock = threading.Lock()
+        self._started: Dict[Hashable, float] = {}
+        self._running: set = set()
+        self.submitted = 0
+        self.deduped = 0
+        self.failed = 0
+
+    def submit(self, key: Hashable, fn: Callable[..., Any], *args: Any) -> bool:
+        """Queue ``fn(*args)`` under ``key``; returns False when an equivalent job is running or recent."""
+        now = time.monotonic()
+        with self._lock:
+            started = self._started.get(key)
+            if key in self._running or (started is not None and now - started < self.dedupe_seconds):
+                self.deduped += 1
+                return False
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="yahoo-prefetch")
+            # Forget old keys so the map stays bounded by the jobs of the last dedupe window.
+            for old in [k for k, t in self._started.items() if now - t >= self.dedupe_seconds and k not in self._running]:
+                del self._started[old]
+            self._started[key] = now
+            self._running.add(key)
+            self.submitted += 1
+        job = copy_current_request_context(fn)
+
+        def _run() -> None:
+            try:
+                with yahoo_priority(PRIORITY_PREFETCH):
+                    job(*args)
+            except Exception:
+                log.exception("Prefetch job %r failed", key)
+                with self._lock:
+                    self.failed += 1
+                    self._started.pop(key, None)  # let the next request try again
+            finally:
+                with self._lock:
+                    self._running.discard(key)
+
+        self._pool.submit(contextvars.copy_context().run, _run)
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "running": len(self._running),
+                "submitted": self.submitted,
+                "deduped": self.deduped,
+                "failed": self.failed,
+            }
@@ -0,0 +1,418 @@
+# yahoo_decode.py
+"""One-pass decoding of Yahoo Fantasy ``fantasy_content`` payloads into small typed records.
+
+Yahoo encodes collections as ``{"0": {"team": ...}, "1": ..., "count": n}`` and
+objects as lists of one-key dicts, sometimes nested (``[[attrs...], {"team_stats":
+...}]``).  Instead of re-scanning those lists with ``_first()`` once per field,
+each object's attributes are merged into one dict in a single pass and read by
+key, producing ``__slots__`` records: ``League``, ``Team``, ``Manager``,
+``Player``, ``Stat`` and ``Matchup``.  Fields Yahoo left out keep their defaults.
+
+Decoding is on demand below the top level: a league's teams are decoded as they
+are reached (``League.iter_teams`` lets a search stop early) and a matchup's
+teams when first read, so de-duplicating ``teams;out=matchups`` by
+``Matchup.team_keys`` never decodes the second copy.  ``query`` / ``query_one``
+cover the one-off lookups that don't warrant a record.
+"""
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+
+def _flag(raw: Any) -> bool:
+    return raw == "1" or raw == 1 or raw is True
+
+
+def _int(raw: Any) -> Optional[int]:
+    try:
+        return int(raw)
+    except (TypeError, ValueError):
+        return None
+
+
+def _merged(blob: Any) -> Dict[str, Any]:
+    # An object's attributes as one dict, whether Yahoo sent a dict or a (one-level nested) list of one-key dicts.
+    if type(blob) is dict:
+        return blob
+    merged: Dict[str, Any] = {}
+    if type(blob) is list:
+        for piece in blob:
+            if type(piece) is dict:
+                merged |= piece
+            elif type(piece) is list:
+                for attr in piece:
+                    if type(attr) is dict:
+                        merged |= attr
+    return merged
+
+
+def _members(blob: Any, key: str) -> List[Any]:
+    # Members of a `{"0": {key: ...}, "count": n}` (or list) collection.
+    if not blob:
+        return []
+    items = blob.values() if type(blob) is dict else blob
+    return [item[key] for item in items if type(item) is dict and key in item]
+
+
+def _logo_url(logos: Any) -> Optional[str]:
+    for logo in _members(logos, "team_logo"):
+        if type(logo) is dict and logo.get("url"):
+            return logo["url"]
+    return None
+
+
+def _team_key(blob: Any) -> Optional[str]:
+    # A team's key without decoding it; Yahoo puts team_key first, so this stops almost at once.
+    for piece in (blob if type(blob) is list else (blob,)):
+        if type(piece) is dict:
+            if "team_key" in piece:
+                return piece["team_key"]
+        elif type(piece) is list:
+            for attr in piece:
+                if type(attr) is dict and "team_key" in attr:
+                    return attr["team_key"]
+    return None
+
+
+def _stat_values(stats_blob: Any) -> Dict[str, Any]:
+    # `{"stats": [{"stat": {"stat_id", "value"}}]}` -> {stat_id: raw value}
+    values: Dict[str, Any] = {}
+    stats = stats_blob.get("stats") if type(stats_blob) is dict else None
+    if not stats:
+        return values
+    for wrapper in (stats.values() if type(stats) is dict else stats):
+        stat = wrapper.get("stat") if type(wrapper) is dict else None
+        if type(stat) is dict:
+            stat_id = stat.get("stat_id")
+            values[stat_id if type(stat_id) is str else str(stat_id)] = stat.get("value")
+    return values
+
+
+# ─────────────────────────── records ────────────────────────────
+class Stat:
+    """A scoring or display category from league settings."""
+    __slots__ = ("stat_id", "name", "display_name", "sort_order", "enabled", "display_only")
+
+    def __init__(self, stat_id: str = "", name: Optional[str] = None, display_name: Optional[str] = None,
+                 sort_order: Any = "1", enabled: bool = True, display_only: bool = False):
+        self.stat_id = stat_id
+        self.name = name
+        self.display_name = display_name
+        self.sort_order = sort_order
+        self.enabled = enabled
+        self.display_only = display_only
+
+    @property
+    def higher_is_better(self) -> bool:
+        return str(self.sort_order) != "0"  # Yahoo's "0" means lower wins (TO)
+
+
+class Manager:
+    __slots__ = ("manager_id", "guid", "nickname", "is_current_login", "is_commissioner")
+
+    def __init__(self, manager_id: Any = None, guid: Optional[str] = None, nickname: Optional[str] = None,
+                 is_current_login: bool = False, is_commissioner: bool = False):
+        self.manager_id = manager_id
+        self.guid = guid
+        self.nickname = nickname
+        self.is_current_login = is_current_login
+        self.is_commissioner = is_commissioner
+
+
+class Player:
+    __slots__ = ("player_key", "player_id", "name_full", "display_position", "editorial_team_abbr",
+                 "ownership_type", "owner_team_key", "stats")
+
+    def __init__(self, player_key: Optional[str] = None, player_id: Any = None, name_full: str = "",
+                 display_position: str = "", editorial_team_abbr: Optional[str] = None,
+                 ownership_type: Optional[str] = None, owner_team_key: Optional[str] = None,
+                 stats: Optional[Dict[str, Any]] = None):
+        self.player_key = player_key
+        self.player_id = player_id
+        self.name_full = name_full
+        self.display_position = display_position
+        self.editorial_team_abbr = editorial_team_abbr
+        self.ownership_type = ownership_type
+        self.owner_team_key = owner_team_key
+        self.stats = stats if stats is not None else {}
+
+
+class Team:
+    __slots__ = ("team_key", "team_id", "name", "url", "logo_url", "managers", "is_owned_by_current_login",
+                 "stats", "points", "matchups", "players")
+
+    def __init__(self, team_key: Optional[str] = None, team_id: Any = None, name: Optional[str] = None,
+                 url: Optional[str] = None, logo_url: Optional[str] = None,
+                 managers: Optional[List[Manager]] = None, is_owned_by_current_login: bool = False,
+                 stats: Optional[Dict[str, Any]] = None, points: Any = None,
+                 matchups: Optional[List["Matchup"]] = None, players: Optional[List[Player]] = None):
+        self.team_key = team_key
+        self.team_id = team_id
+        self.name = name
+        self.url = url
+        self.logo_url = logo_url
+        self.managers = managers if managers is not None else []
+        self.is_owned_by_current_login = is_owned_by_current_login
+        self.stats = stats if stats is not None else {}
+        self.points = points
+        self.matchups = matchups if matchups is not None else []
+        self.players = players if players is not None else []
+
+    @property
+    def manager_logged_in(self) -> bool:
+        for manager in self.managers:
+            if manager.is_current_login:
+                return True
+        return False
+
+    @property
+    def is_mine(self) -> bool:
+        return self.is_owned_by_current_login or self.manager_logged_in
+
+
+class Matchup:
+    __slots__ = ("week", "week_start", "status", "is_playoffs", "is_consolation", "is_tied", "winner_team_key",
+                 "_teams", "_team_blobs", "_stat_winners")
+
+    def __init__(self, week: Optional[int] = None, week_start: Optional[str] = None, status: Optional[str] = None,
+                 is_playoffs: bool = False, is_consolation: bool = False, is_tied: bool = False,
+                 winner_team_key: Optional[str] = None, team_blobs: Optional[List[Any]] = None,
+                 stat_winners: Any = None):
+        self.week = week
+        self.week_start = week_start
+        self.status = status
+        self.is_playoffs = is_playoffs
+        self.is_consolation = is_consolation
+        self.is_tied = is_tied
+        self.winner_team_key = winner_team_key
+        self._teams: Optional[List[Team]] = None
+        self._team_blobs = team_blobs or []
+        self._stat_winners = stat_winners
+
+    @property
+    def team_keys(self) -> Tuple[Optional[str], ...]:
+        """Both sides' team keys, read without decoding the teams (enough to de-duplicate matchups)."""
+        if self._teams is not None:
+            return tuple(team.team_key for team in self._teams)
+        return tuple(_team_key(blob) for blob in self._team_blobs)
+
+    @property
+    def teams(self) -> List[Team]:
+        if self._teams is None:
+            self._teams = [decode_team(blob) for blob in self._team_blobs]
+        return self._teams
+
+    @property
+    def stat_winners(self) -> Dict[str, Optional[str]]:
+        """stat_id -> winning team_key (None when tied); decoded on first use, few callers need it."""
+        if type(self._stat_winners) is not dict:
+            self._stat_winners = {
+                str(winner.get("stat_id")): None if _flag(winner.get("is_tied")) else winner.get("winner_team_key")
+                for winner in _members(self._stat_winners, "stat_winner") if type(winner) is dict
+            }
+        return self._stat_winners
+
+
+class League:
+    __slots__ = ("league_key", "league_id", "name", "season", "scoring_type", "current_week", "start_week",
+                 "end_week", "num_teams", "renew", "renewed", "meta", "settings", "stat_categories", "players",
+                 "matchups", "_teams", "_team_blobs")
+
+    def __init__(self, meta: Optional[Dict[str, Any]] = None):
+        meta = meta if meta is not None else {}
+        get = meta.get
+        self.meta = meta  # every attribute Yahoo sent, raw, for fields without a slot
+        self.league_key = get("league_key")
+        self.league_id = get("league_id")
+        self.name = get("name")
+        self.season = get("season")
+        self.scoring_type = get("scoring_type")
+        self.current_week = _int(get("current_week"))
+        self.start_week = _int(get("start_week"))
+        self.end_week = _int(get("end_week"))
+        self.num_teams = _int(get("num_teams"))
+        self.renew = get("renew")
+        self.renewed = get("renewed")
+        self.settings: Optional[Dict[str, Any]] = None
+        self.stat_categories: List[Stat] = []
+        self.players: List[Player] = []
+        self.matchups: List[Matchup] = []  # from `scoreboard`
+        self._teams: List[Team] = []
+        self._team_blobs: List[Any] = _members(get("teams"), "team")
+
+    def iter_teams(self) -> Iterator[Team]:
+        """Teams in Yahoo's order, decoded as the caller reaches them (so a search can stop early)."""
+        decoded, blobs = self._teams, self._team_blobs
+        for i, blob in enumerate(blobs):
+            if i == len(decoded):
+                decoded.append(decode_team(blob))
+            yield decoded[i]
+
+    @property
+    def teams(self) -> List[Team]:
+        if len(self._teams) < len(self._team_blobs):
+            self._teams.extend(decode_team(blob) for blob in self._team_blobs[len(self._teams):])
+        return self._teams
+
+
+# ─────────────────────────── decoders ────────────────────────────
+def decode_manager(blob: Any) -> Manager:
+    get = _merged(blob).get
+    return Manager(get("manager_id"), get("guid"), get("nickname"),
+                   _flag(get("is_current_login")), _flag(get("is_commissioner")))
+
+
+def decode_stat_category(blob: Any) -> Stat:
+    get = _merged(blob).get
+    return Stat(str(get("stat_id")), get("name"), get("display_name"), get("sort_order", "1"),
+                str(get("enabled", "1")) == "1", _flag(get("is_only_display_stat")))
+
+
+def decode_player(blob: Any) -> Player:
+    get = _merged(blob).get
+    name = get("name")
+    if type(name) is dict:
+        name_full = name.get("full") or " ".join(filter(None, [name.get("first"), name.get("last")]))
+    else:
+        name_full = str(name) if name else ""
+    ownership = get("ownership")
+    if type(ownership) is not dict:
+        ownership = {}
+    stats = get("player_stats")
+    return Player(get("player_key"), get("player_id"), name_full, get("display_position") or "",
+                  get("editorial_team_abbr"), ownership.get("ownership_type"), ownership.get("owner_team_key"),
+                  _stat_values(stats) if stats else None)
+
+
+def decode_team(blob: Any) -> Team:
+    get = _merged(blob).get
+    managers = get("managers")
+    logos = get("team_logos")
+    stats = get("team_stats")
+    points = get("team_points")
+    matchups = get("matchups")
+    players = get("players")
+    if players is None:
+        roster = get("roster")
+        players = (roster.get("0") or {}).get("players") if type(roster) is dict else None
+    return Team(
+        get("team_key"), get("team_id"), get("name"), get("url"),
+        _logo_url(logos) if logos else None,
+        [decode_manager(m) for m in _members(managers, "manager")] if managers else None,
+        _flag(get("is_owned_by_current_login")),
+        _stat_values(stats) if stats else None,
+        points.get("total") if type(points) is dict else None,
+        [decode_matchup(m) for m in _members(matchups, "matchup")] if matchups else None,
+        [decode_player(p) for p in _members(players, "player")] if players else None,
+    )
+
+
+def decode_matchup(blob: Any) -> Matchup:
+    get = _merged(blob).get
+    teams = get("teams")
+    if teams is None:
+        nested = get("0")
+        teams = nested.get("teams") if type(nested) is dict else None
+    return Matchup(
+        _int(get("week")), get("week_start"), get("status"),
+        _flag(get("is_playoffs")), _flag(get("is_consolation")), _flag(get("is_tied")), get("winner_team_key"),
+        _members(teams, "team"),
+        get("stat_winners"),
+    )
+
+
+def decode_league(payload: Any) -> League:
+    """``{"fantasy_content": {"league": [meta, {section: ...}, ...]}}`` (or the bare league blob) -> ``League``."""
+    blob = payload.get("fantasy_content", payload).get("league") if type(payload) is dict else payload
+    attrs = _merged(blob)
+    league = League(attrs)
+    get = attrs.get
+    players = get("players")
+    if players:
+        league.players = [decode_player(p) for p in _members(players, "player")]
+    settings = get("settings")
+    if type(settings) is list:
+        settings = settings[0] if settings else None
+    if type(settings) is dict:
+        league.settings = settings
+        league.stat_categories = [decode_stat_category(s) for s in
+                                  _members((settings.get("stat_categories") or {}).get("stats"), "stat")]
+    scoreboard = get("scoreboard")
+    if type(scoreboard) is dict:
+        league.matchups = [decode_matchup(m) for m in _members((scoreboard.get("0") or {}).get("matchups"), "matchup")]
+    return league
+
+
+def decode_team_payload(payload: Any) -> Team:
+    """``{"fantasy_content": {"team": [...]}}`` (``team/{key}/players/stats`` and friends) -> ``Team``."""
+    return decode_team(payload.get("fantasy_content", payload).get("team") if type(payload) is dict else payload)
+
+
+def decode_user_leagues(payload: Any) -> List[Tuple[Optional[str], League]]:
+    """``users;use_login=1/games/leagues`` -> ``(user guid, League)`` pairs; a league without a season takes its game's."""
+    content = payload.get("fantasy_content", payload) if type(payload) is dict else {}
+    out: List[Tuple[Optional[str], League]] = []
+    for user in _members(content.get("users"), "user"):
+        user_attrs = _merged(user)
+        guid = user_attrs.get("guid")
+        for game in _members(user_attrs.get("games"), "game"):
+            game_attrs = _merged(game)
+            for blob in _members(game_attrs.get("leagues"), "league"):
+                league = decode_league(blob)
+                league.season = game_attrs.get("season") or league.season
+                out.append((guid, league))
+    return out
+
+
+# ─────────────────────────── path queries ────────────────────────────
+@lru_cache(maxsize=256)
+def _segments(path: str) -> Tuple[str, ...]:
+    return tuple(part for part in path.split("/") if part)
+
+
+def query(blob: Any, path: str) -> List[Any]:
+    """Every value at ``path``, e.g. ``query(payload, "fantasy_content/league/teams/*/team")``.
+
+    Each segment is a dict key, a list index, or ``*`` (every member of a collection, skipping
+    ``count``).  On a Yahoo attribute list a key segment matches the dicts that carry it, so
+    ``league/settings`` works whether ``league`` arrived as a dict or as ``[meta, {"settings": ...}]``.
+    """
+    current = [blob]
+    for segment in _segments(path):
+        found: List[Any] = []
+        for node in current:
+            if segment == "*":
+                if type(node) is dict:
+                    found.extend(value for key, value in node.items() if key != "count")
+                elif type(node) is list:
+                    found.extend(node)
+            elif type(node) is dict:
+                if segment in node:
+                    found.append(node[segment])
+            elif type(node) is list:
+                if segment.isdigit():
+                    if int(segment) < len(node):
+                        found.append(node[int(segment)])
+                else:
+                    found.extend(_attrs_with(node, segment))
+        current = found
+        if not current:
+            break
+    return current
+
+
+def _attrs_with(blob: List[Any], key: str) -> List[Any]:
+    # Values of ``key`` across an attribute list, in order (nested attribute lists included).
+    found: List[Any] = []
+    for piece in blob:
+        if type(piece) is dict:
+            if key in piece:
+                found.append(piece[key])
+        elif type(piece) is list:
+            found.extend(attr[key] for attr in piece if type(attr) is dict and key in attr)
+    return found
+
+
+def query_one(blob: Any, path: str, default: Any = None) -> Any:
+    """The first value at ``path`` (see ``query``), or ``default``."""
+    found = query(blob, path)
+    return found[0] if found else default